@@ -27,12 +27,15 @@ import random
 
 # Import rules system with error handling
 try:
-    from rules.domains.movember_ai import MovemberAIRulesEngine
+    from rules.domains.movember_ai import MovemberAIRulesEngine, get_movember_engine
+    from rules.domains.movember_ai.replay import grant_evaluation_data
     from rules.types import ExecutionContext, ContextType, RulePriority
     RULES_SYSTEM_AVAILABLE = True
 except ImportError as e:
     logger.warning(f"Rules system not available: {e}")
     MovemberAIRulesEngine = None
+    get_movember_engine = None
+    grant_evaluation_data = None
     ExecutionContext = None
     ContextType = None
     RulePriority = None
@@ -469,7 +472,8 @@ class MovemberAPIService:
     def __init__(self):
 
 
-        self.engine = MovemberAIRulesEngine()
+        # One long-lived engine per process; rule changes are hot-swapped into it
+        self.engine = get_movember_engine()
         self.db = SessionLocal()
         self.logger = logging.getLogger(__name__)
 
@@ -1006,35 +1010,28 @@ async def evaluate_grant(grant_data: dict):
     Evaluate a grant application using the AI rules engine and ML predictions
     """
     try:
-        # Extract grant details
-        grant_id = grant_data.get("grant_id", f"grant_{int(time.time())}")
-        title = grant_data.get("title", "")
-        description = grant_data.get("description", "")
-        budget = grant_data.get("budget", 0)
-        timeline_months = grant_data.get("timeline_months", 12)
-        organisation = grant_data.get("organisation", "")
-        contact_person = grant_data.get("contact_person", "")
-        email = grant_data.get("email", "")
-
-        # Create evaluation context
-        context = {
-            "grant_id": grant_id,
-            "title": title,
-            "description": description,
-            "budget": budget,
-            "timeline_months": timeline_months,
-            "organisation": organisation,
-            "contact_person": contact_person,
-            "email": email,
-            "evaluation_timestamp": datetime.now().isoformat(),
-            "context_type": "GRANT_EVALUATION"
-        }
+        # Create evaluation context; stored evaluations are replayed from the same data
+        if grant_evaluation_data is not None:
+            context = grant_evaluation_data(grant_data, datetime.now().isoformat())
+        else:
+            context = {
+                "grant_id": grant_data.get("grant_id", f"grant_{int(time.time())}"),
+                "evaluation_timestamp": datetime.now().isoformat()
+            }
+        grant_id = context["grant_id"]
 
         # Run rules engine evaluation
         if RULES_SYSTEM_AVAILABLE and MovemberAIRulesEngine:
             try:
-                engine = MovemberAIRulesEngine()
-                evaluation_results = engine.evaluate_context(context)
+                rules_engine = get_movember_engine()
+                evaluation_results = await rules_engine.evaluate_context(
+                    ExecutionContext(
+                        context_type=ContextType.GRANT_EVALUATION,
+                        context_id=f"grant-eval-{grant_id}",
+                        data=context
+                    ),
+                    mode="grant_submission"
+                )
             except Exception as e:
                 logger.error(f"Rules engine evaluation failed: {e}")
                 evaluation_results = {"status": "error", "message": "Rules engine unavailable"}
@@ -1172,6 +1169,20 @@ async def get_system_metrics(
     }
 
 
+@app.post("/rules/reload/", response_model=Dict)
+async def reload_rules(
+    service: MovemberAPIService = Depends(get_api_service),
+    _: bool = Depends(verify_api_key)
+):
+    """Hot-reload rule definitions; requests in flight finish on the previous rules."""
+    version = await service.engine.reload_rules_async()
+    return {
+        "status": "success",
+        "rules_version": version,
+        "active_rules": len(service.engine.engine.rules)
+    }
+
+
 @app.get("/impact/dashboard/")
 async def get_impact_dashboard():
     """Get comprehensive impact dashboard data with real Movember data."""
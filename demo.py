@@ -478,7 +478,7 @@ async def main():
     finally:
         # Cleanup
         for engine in engines:
-            engine.shutdown()
+            await engine.shutdown_async()
 
 
 if __name__ == "__main__":
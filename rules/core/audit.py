@@ -0,0 +1,337 @@
+"""
+Audit Trail
+
+Bounded in-memory history of rule evaluations, plus append-only sinks that
+a background writer fills in batches so the evaluation path never
+serialises results itself.
+"""
+
+from typing import Dict, List, Any, Optional, Iterator, Sequence
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from enum import Enum
+import json
+import logging
+import queue
+import sqlite3
+import threading
+
+from ..types import ContextType, RuleResult
+
+logger = logging.getLogger(__name__)
+
+
+class AuditRecord:
+    """
+    One evaluation's audit entry.
+
+    Holds references to the results and serialises them only when the entry
+    is read or written to a sink, then keeps the serialised form.
+    """
+    __slots__ = ('timestamp', 'context_type', 'context_id', 'results', 'total_time', 'subexpressions', '_dict')
+
+    def __init__(self, timestamp: datetime, context_type: ContextType, context_id: str,
+                 results: Sequence[RuleResult], total_time: float,
+                 subexpressions: Optional[Dict[str, int]] = None):
+
+
+        self.timestamp = timestamp
+        self.context_type = context_type
+        self.context_id = context_id
+        self.results = results
+        self.total_time = total_time
+        # Memoisation of shared sub-expressions, for evaluations of generated rules
+        self.subexpressions = subexpressions
+        self._dict: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+
+
+        """Convert to dictionary for serialization."""
+        if self._dict is None:
+            self._dict = {
+                'timestamp': self.timestamp.isoformat(),
+                'context_type': self.context_type,
+                'context_id': self.context_id,
+                'total_rules': len(self.results),
+                'successful_rules': sum(1 for r in self.results if r.success),
+                'total_execution_time': self.total_time,
+                'results': [r.to_dict() for r in self.results]
+            }
+            if self.subexpressions is not None:
+                self._dict['subexpressions'] = self.subexpressions
+        return self._dict
+
+
+class AuditRingBuffer:
+    """Fixed-capacity buffer of the most recent audit records."""
+
+    def __init__(self, capacity: int = 1000):
+
+
+        self.capacity = capacity
+        self._records: deque = deque(maxlen=capacity)
+
+    def append(self, record: AuditRecord) -> None:
+
+
+        """Add a record, dropping the oldest when full."""
+        self._records.append(record)
+
+    def tail(self, limit: int = 100) -> List[Dict[str, Any]]:
+
+
+        """Get up to ``limit`` of the most recent entries, oldest first."""
+        if limit <= 0:
+            return []
+        count = min(limit, len(self._records))
+        # Walk from the newest end so only the requested entries are touched
+        newest = [self._records[-i].to_dict() for i in range(1, count + 1)]
+        newest.reverse()
+        return newest
+
+    def clear(self) -> None:
+
+
+        """Remove all records."""
+        self._records.clear()
+
+    def __len__(self) -> int:
+
+
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+
+
+        return (record.to_dict() for record in list(self._records))
+
+
+def _json_default(value: Any) -> Any:
+
+
+    """Encode enums, datetimes and other values JSON does not handle."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_entry(entry: Dict[str, Any]) -> str:
+
+
+    """Encode an audit entry as a single JSON line."""
+    return json.dumps(entry, default=_json_default, separators=(',', ':'))
+
+
+class AuditSink(ABC):
+    """Append-only destination for audit entries."""
+
+    @abstractmethod
+    def write_batch(self, entries: List[Dict[str, Any]]) -> None:
+
+
+        """Append a batch of serialised audit entries."""
+
+    def close(self) -> None:
+
+
+        """Release any resources held by the sink."""
+
+
+class JsonLinesAuditSink(AuditSink):
+    """Appends audit entries to a newline-delimited JSON file."""
+
+    def __init__(self, path: str):
+
+
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write_batch(self, entries: List[Dict[str, Any]]) -> None:
+
+
+        self._file.write(''.join(encode_entry(entry) + '\n' for entry in entries))
+        self._file.flush()
+
+    def close(self) -> None:
+
+
+        self._file.close()
+
+
+class SQLiteAuditSink(AuditSink):
+    """Appends audit entries to a SQLite table that can be queried by context."""
+
+    def __init__(self, path: str):
+
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS audit_entries ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "timestamp TEXT NOT NULL, "
+            "context_type TEXT NOT NULL, "
+            "context_id TEXT NOT NULL, "
+            "total_rules INTEGER NOT NULL, "
+            "successful_rules INTEGER NOT NULL, "
+            "total_execution_time REAL NOT NULL, "
+            "entry TEXT NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audit_context ON audit_entries (context_type, context_id)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_entries (timestamp)"
+        )
+        self._connection.commit()
+
+    def write_batch(self, entries: List[Dict[str, Any]]) -> None:
+
+
+        rows = [
+            (
+                entry['timestamp'],
+                _json_default(entry['context_type']),
+                entry['context_id'],
+                entry['total_rules'],
+                entry['successful_rules'],
+                entry['total_execution_time'],
+                encode_entry(entry)
+            )
+            for entry in entries
+        ]
+        with self._lock:
+            self._connection.executemany(
+                "INSERT INTO audit_entries (timestamp, context_type, context_id, total_rules, "
+                "successful_rules, total_execution_time, entry) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._connection.commit()
+
+    def query(self, context_id: Optional[str] = None, context_type: Optional[str] = None,
+              since: Optional[datetime] = None, limit: int = 100) -> List[Dict[str, Any]]:
+
+
+        """Get audit entries matching the filters, newest first."""
+        clauses = []
+        params: List[Any] = []
+        if context_id is not None:
+            clauses.append("context_id = ?")
+            params.append(context_id)
+        if context_type is not None:
+            clauses.append("context_type = ?")
+            params.append(context_type)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since.isoformat())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT entry FROM audit_entries {where} ORDER BY id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self) -> None:
+
+
+        with self._lock:
+            self._connection.close()
+
+
+class AuditWriter:
+    """
+    Background thread that drains audit records into a sink in batches.
+
+    ``submit`` only enqueues, so callers never wait on serialisation or
+    I/O. When the queue is full, new records are dropped and counted
+    rather than blocking evaluation.
+    """
+
+    def __init__(self, sink: AuditSink, batch_size: int = 100, max_queue: int = 10000):
+
+
+        self.sink = sink
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Optional[AuditRecord]]" = queue.Queue(maxsize=max_queue)
+        self.stats = {"written": 0, "dropped": 0, "errors": 0, "batches": 0}
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="rules-audit-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: AuditRecord) -> None:
+
+
+        """Queue a record for writing."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def flush(self) -> None:
+
+
+        """Block until every queued record has been written."""
+        self._queue.join()
+
+    def close(self, timeout: float = 5.0) -> None:
+
+
+        """Write outstanding records, stop the writer thread and close the sink."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self.sink.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+
+
+        """Get writer statistics."""
+        return {**self.stats, "queued": self._queue.qsize()}
+
+    def _run(self) -> None:
+
+
+        while True:
+            record = self._queue.get()
+            batch = [] if record is None else [record]
+            stop = record is None
+
+            # Take whatever queued up while the previous batch was written;
+            # under load batches fill up without adding latency when idle
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                else:
+                    batch.append(record)
+
+            if batch:
+                self._write(batch)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: List[AuditRecord]) -> None:
+
+
+        try:
+            self.sink.write_batch([record.to_dict() for record in batch])
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Failed to write {len(batch)} audit entries", exc_info=e)
@@ -0,0 +1,248 @@
+"""
+Rule Bundles
+
+A precompiled rule catalogue written to a single versioned file at build
+time, so new workers load ready-made rules instead of importing rule
+modules, re-running the AST analysis and compiling each expression on
+first use.
+
+A bundle is a magic line, a JSON header line and a ``marshal`` payload.
+The header records the bundle format, the interpreter the payload was
+written by (compiled code is interpreter-specific), the analysis
+environment the rules were analysed in and the payload's SHA-256 digest.
+Loading checks all of them before unmarshalling anything.
+"""
+
+from typing import Dict, Any, Optional, Iterable, List, Mapping
+from dataclasses import dataclass
+from datetime import datetime
+import hashlib
+import json
+import logging
+import marshal
+import os
+import sys
+import tempfile
+
+from .dependencies import FieldDependencies
+from ..types import Rule
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_MAGIC = b"RULE-BUNDLE\n"
+BUNDLE_FORMAT = 1
+
+
+class BundleError(ValueError):
+    """Raised when a rule bundle cannot be built or fails its integrity checks."""
+
+
+@dataclass
+class RuleEntry:
+
+
+    """A bundled rule with the analysis the engine derived from it."""
+    rule: Rule
+    tags: frozenset
+    fingerprint: str
+    dependencies: FieldDependencies
+    requirements: frozenset
+
+
+@dataclass
+class RuleBundle:
+
+
+    """A verified rule bundle."""
+    header: Dict[str, Any]
+    payload: Dict[str, Any]
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+
+
+        """Caller-supplied metadata recorded at build time."""
+        return self.header.get('metadata', {})
+
+    @property
+    def analysis(self) -> str:
+
+
+        """Key of the analysis environment the rules were analysed in."""
+        return self.header['analysis']
+
+    @property
+    def modes(self) -> Dict[str, frozenset]:
+
+
+        """Registered modes and the tags each selects."""
+        return {mode: frozenset(tags) for mode, tags in self.payload['modes'].items()}
+
+    @property
+    def compiled(self) -> Dict[str, Any]:
+
+
+        """Compiled code of every valid condition expression, keyed by expression."""
+        return self.payload['code']
+
+    def entries(self) -> List[RuleEntry]:
+
+
+        """Rebuild the bundled rules and their analysis."""
+        return [
+            RuleEntry(
+                rule=Rule.from_dict(record['rule']),
+                tags=frozenset(record['tags']),
+                fingerprint=record['fingerprint'],
+                dependencies=FieldDependencies(frozenset(record['paths']), record['complete']),
+                requirements=frozenset(record['requirements'])
+            )
+            for record in self.payload['rules']
+        ]
+
+
+def analysis_key(functions: Iterable[str], custom_actions: Iterable[str]) -> str:
+
+
+    """Identify the evaluator functions and custom actions rule analysis depends on."""
+    names = json.dumps([sorted(functions), sorted(custom_actions)])
+    return hashlib.sha256(names.encode()).hexdigest()
+
+
+def _interpreter() -> str:
+
+
+    return f"{sys.implementation.cache_tag}/marshal-{marshal.version}"
+
+
+def _check_serialisable(rule: Rule) -> None:
+
+
+    """Reject rules whose behaviour lives in Python callables, which a bundle cannot carry."""
+    if rule.applicability_check is not None:
+        raise BundleError(f"Rule '{rule.name}' has an applicability check and cannot be bundled")
+    for condition in rule.conditions:
+        if condition.custom_evaluator is not None:
+            raise BundleError(f"Rule '{rule.name}' has a custom condition evaluator and cannot be bundled")
+    for action in rule.actions:
+        if action.custom_executor is not None:
+            raise BundleError(f"Rule '{rule.name}' has a custom action executor and cannot be bundled")
+
+
+def dump_bundle(entries: Iterable[RuleEntry], modes: Mapping[str, Iterable[str]],
+                compiled: Mapping[str, Any], analysis: str,
+                metadata: Optional[Dict[str, Any]] = None) -> bytes:
+
+
+    """
+    Serialise rules, their analysis and compiled expressions into a bundle.
+
+    Args:
+        entries: The rules with their index tags and derived analysis
+        modes: Registered modes and the tags each selects
+        compiled: Compiled code per condition expression
+        analysis: Key of the analysis environment, see ``analysis_key``
+        metadata: JSON-serialisable metadata, e.g. the source revision
+
+    Raises:
+        BundleError: If a rule or value cannot be serialised
+    """
+    records = []
+    for entry in entries:
+        _check_serialisable(entry.rule)
+        definition = entry.rule.to_dict()
+        definition.pop('created_at', None)
+        definition.pop('updated_at', None)
+        records.append({
+            'rule': definition,
+            'tags': sorted(entry.tags),
+            'fingerprint': entry.fingerprint,
+            'paths': frozenset(entry.dependencies.paths),
+            'complete': entry.dependencies.complete,
+            'requirements': frozenset(entry.requirements)
+        })
+
+    try:
+        payload = marshal.dumps({
+            'rules': records,
+            'modes': {mode: sorted(tags) for mode, tags in modes.items()},
+            'code': dict(compiled)
+        })
+    except ValueError as e:
+        raise BundleError(f"Rule catalogue contains values that cannot be bundled: {e}") from e
+
+    header = {
+        'format': BUNDLE_FORMAT,
+        'interpreter': _interpreter(),
+        'analysis': analysis,
+        'rules': len(records),
+        'size': len(payload),
+        'sha256': hashlib.sha256(payload).hexdigest(),
+        'created_at': datetime.now().isoformat(),
+        'metadata': metadata or {}
+    }
+    return BUNDLE_MAGIC + json.dumps(header, sort_keys=True).encode() + b"\n" + payload
+
+
+def load_bundle(data: bytes) -> RuleBundle:
+
+
+    """
+    Verify and decode a bundle.
+
+    Raises:
+        BundleError: If the bundle is malformed, corrupt, of another format
+            or written by an incompatible interpreter
+    """
+    if not data.startswith(BUNDLE_MAGIC):
+        raise BundleError("Not a rule bundle")
+    header_end = data.find(b"\n", len(BUNDLE_MAGIC))
+    if header_end < 0:
+        raise BundleError("Rule bundle header is truncated")
+    try:
+        header = json.loads(data[len(BUNDLE_MAGIC):header_end])
+    except ValueError as e:
+        raise BundleError(f"Rule bundle header is malformed: {e}") from e
+
+    if header.get('format') != BUNDLE_FORMAT:
+        raise BundleError(f"Unsupported rule bundle format {header.get('format')!r}")
+    if header.get('interpreter') != _interpreter():
+        raise BundleError(
+            f"Rule bundle was built by {header.get('interpreter')}, not {_interpreter()}"
+        )
+
+    payload = data[header_end + 1:]
+    if len(payload) != header.get('size') or hashlib.sha256(payload).hexdigest() != header.get('sha256'):
+        raise BundleError("Rule bundle payload does not match its digest")
+
+    try:
+        decoded = marshal.loads(payload)
+    except (EOFError, ValueError, TypeError) as e:
+        raise BundleError(f"Rule bundle payload is unreadable: {e}") from e
+    return RuleBundle(header, decoded)
+
+
+def write_bundle(path: str, data: bytes) -> None:
+
+
+    """Write a bundle atomically, so workers never load a partly written file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.rules-bundle-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_bundle(path: str) -> RuleBundle:
+
+
+    """Read and verify a bundle file."""
+    with open(path, 'rb') as f:
+        return load_bundle(f.read())
@@ -4,12 +4,20 @@ Rule Caching System for Movember AI Rules Engine
 Implements intelligent rule caching to reduce evaluation time by 40%
 """
 
-import json
-import hashlib
-from typing import Dict, Any, Optional, List
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Any, Optional, List, Iterable, Set, FrozenSet
 from datetime import datetime, timedelta
 import logging
 
+from .hashing import structural_hash
+from .shared_cache import GLOBAL_SCOPE, SharedCacheTier
+
 logger = logging.getLogger(__name__)
 
 class CacheStrategy(Enum):
@@ -32,6 +40,10 @@ class CacheEntry:
     ttl: timedelta
     hit_count: int = 0
     last_accessed: datetime = None
+    size_bytes: int = 0
+    rule_name: str = ""
+    context_type: str = ""
+    tags: FrozenSet[str] = frozenset()
 
     def is_expired(self) -> bool:
 
@@ -55,20 +67,49 @@ class CacheEntry:
 class RuleCache:
 
 
-    """Intelligent rule caching system."""
+    """
+    Intelligent rule caching system.
+
+    Entries are kept in least-recently-used order so lookups, inserts and
+    evictions are O(1). The cache is bounded both by entry count and by an
+    estimate of the real memory held by cached results.
+
+    An optional shared tier lets worker processes on one host reuse each
+    other's results: local misses fall through to it, and its hits are
+    promoted into the local tier.
 
-    def __init__(self, strategy: CacheStrategy = CacheStrategy.INTELLIGENT):
+    The cache is shared by every engine in the process, so the local tier
+    and its indexes are guarded by a lock: rule changes invalidate entries
+    from whichever thread makes them while event loops read and write.
+    """
+
+    def __init__(self, strategy: CacheStrategy = CacheStrategy.INTELLIGENT,
+                 max_size: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 shared_tier: Optional[SharedCacheTier] = None):
 
 
         self.strategy = strategy
-        self.cache: Dict[str, CacheEntry] = {}
+        self._lock = threading.RLock()
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.shared_tier = shared_tier
         self.stats = {
             "hits": 0,
             "misses": 0,
+            "local_hits": 0,
+            "shared_hits": 0,
             "evictions": 0,
+            "expirations": 0,
             "total_requests": 0
         }
-        self.max_size = 1000
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+
+        # Secondary indexes so invalidation only touches matching entries
+        self._keys_by_rule: Dict[str, Set[str]] = {}
+        self._keys_by_tag: Dict[str, Set[str]] = {}
+        self._keys_by_context_type: Dict[str, Set[str]] = {}
+
         self.default_ttl = timedelta(minutes=30)
         self.adaptive_ttl = timedelta(minutes=15)
 
@@ -78,10 +119,9 @@ class RuleCache:
 
 
         """Generate cache key from rule name and context data."""
-        # Create a deterministic hash of the context data
-        context_str = json.dumps(context_data, sort_keys=True)
-        context_hash = hashlib.md5(context_str.encode()).hexdigest()
-        return f"{rule_name}:{context_hash}"
+        # Structural hash handles datetimes, Decimals, enums, sets and
+        # non-string keys deterministically; circular data raises ValueError
+        return f"{rule_name}:{structural_hash(context_data)}"
 
     def _get_adaptive_ttl(self, rule_name: str, context_type: str) -> timedelta:
 
@@ -97,33 +137,55 @@ class RuleCache:
 
     async def get(self, rule_name: str, context_data: Dict[str, Any]) -> Optional[Any]:
         """Get cached result for rule evaluation."""
-        self.stats["total_requests"] += 1
-        cache_key = self._generate_cache_key(rule_name, context_data)
-
-        if cache_key in self.cache:
-            entry = self.cache[cache_key]
-
-            if entry.is_expired():
-                # Remove expired entry
-                del self.cache[cache_key]
-                self.stats["evictions"] += 1
-                self.stats["misses"] += 1
-                return None
+        if self.strategy == CacheStrategy.NONE:
+            return None
 
-            # Update access statistics
-            entry.touch()
-            self.stats["hits"] += 1
-
-            logger.debug(f"Cache HIT for rule: {rule_name}")
-            return entry.result
+        cache_key = self._generate_cache_key(rule_name, context_data)
 
-        self.stats["misses"] += 1
+        if self.shared_tier is not None:
+            self._apply_shared_invalidations()
+
+        with self._lock:
+            self.stats["total_requests"] += 1
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                if entry.is_expired():
+                    # Remove expired entry
+                    self._remove(cache_key)
+                    self.stats["expirations"] += 1
+                else:
+                    # Mark as most recently used and update access statistics
+                    self.cache.move_to_end(cache_key)
+                    entry.touch()
+                    self.stats["hits"] += 1
+                    self.stats["local_hits"] += 1
+
+                    logger.debug(f"Cache HIT for rule: {rule_name}")
+                    return entry.result
+
+        if self.shared_tier is not None:
+            shared = self.shared_tier.get(cache_key, rule_name)
+            if shared is not None:
+                result, remaining, tags = shared
+                with self._lock:
+                    self._store(cache_key, result, timedelta(seconds=remaining), rule_name,
+                                context_data.get("context_type", ""), tags)
+                    self.stats["hits"] += 1
+                    self.stats["shared_hits"] += 1
+                logger.debug(f"Shared cache HIT for rule: {rule_name}")
+                return result
+
+        with self._lock:
+            self.stats["misses"] += 1
         logger.debug(f"Cache MISS for rule: {rule_name}")
         return None
 
     async def set(self, rule_name: str, context_data: Dict[str, Any], result: Any,
-                  ttl: Optional[timedelta] = None) -> None:
-        """Cache rule evaluation result."""
+                  ttl: Optional[timedelta] = None, tags: Optional[Iterable[str]] = None) -> None:
+        """Cache rule evaluation result, indexed by rule name, context type and tags."""
+        if self.strategy == CacheStrategy.NONE:
+            return
+
         cache_key = self._generate_cache_key(rule_name, context_data)
 
         # Determine TTL based on strategy
@@ -133,76 +195,188 @@ class RuleCache:
             else:
                 ttl = self.default_ttl
 
+        context_type = context_data.get("context_type", "") or ""
+        tags = frozenset(tags or ())
+        with self._lock:
+            self._store(cache_key, result, ttl, rule_name, context_type, tags)
+        if self.shared_tier is not None:
+            self.shared_tier.set(cache_key, result, rule_name, context_type, tags, ttl)
+
+        logger.debug(f"Cached result for rule: {rule_name}")
+
+    def _store(self, cache_key: str, result: Any, ttl: timedelta, rule_name: str,
+               context_type: str, tags: FrozenSet[str]) -> None:
+
+
+        """Store an entry in the local tier, evicting to stay within budget; the caller holds the lock."""
+        size_bytes = estimate_size(result) + sys.getsizeof(cache_key)
+        if size_bytes > self.max_bytes:
+            logger.debug(f"Result for rule {rule_name} exceeds cache budget, not cached")
+            return
+
         # Create cache entry
+        now = datetime.now()
         entry = CacheEntry(
             key=cache_key,
             result=result,
-            timestamp=datetime.now(),
+            timestamp=now,
             ttl=ttl,
-            last_accessed=datetime.now()
+            last_accessed=now,
+            size_bytes=size_bytes,
+            rule_name=rule_name,
+            context_type=context_type or "",
+            tags=frozenset(tags)
         )
 
-        # Check cache size and evict if necessary
-        if len(self.cache) >= self.max_size:
-            await self._evict_least_used()
+        if cache_key in self.cache:
+            self._remove(cache_key)
 
         self.cache[cache_key] = entry
-        logger.debug(f"Cached result for rule: {rule_name}")
+        self.current_bytes += size_bytes
+        self._index_entry(entry)
+
+        # Evict least recently used entries until within both budgets
+        while len(self.cache) > self.max_size or self.current_bytes > self.max_bytes:
+            self._evict_one()
+
+    def _apply_shared_invalidations(self) -> None:
+
+
+        """Drop local entries invalidated by other workers through the shared tier."""
+        for scope in self.shared_tier.sync():
+            kind, _, name = scope.partition(':')
+            if scope == GLOBAL_SCOPE:
+                self._clear_local()
+            elif kind == 'rule':
+                self._invalidate_local(rule_name=name)
+            elif kind == 'tag':
+                self._invalidate_local(tag=name)
+            elif kind == 'context_type':
+                self._invalidate_local(context_type=name)
+
+    def _index_entry(self, entry: CacheEntry) -> None:
+
+
+        """Add an entry to the secondary indexes."""
+        self._keys_by_rule.setdefault(entry.rule_name, set()).add(entry.key)
+        if entry.context_type:
+            self._keys_by_context_type.setdefault(entry.context_type, set()).add(entry.key)
+        for tag in entry.tags:
+            self._keys_by_tag.setdefault(tag, set()).add(entry.key)
+
+    def _unindex_entry(self, entry: CacheEntry) -> None:
+
+
+        """Remove an entry from the secondary indexes."""
+        _discard_key(self._keys_by_rule, entry.rule_name, entry.key)
+        if entry.context_type:
+            _discard_key(self._keys_by_context_type, entry.context_type, entry.key)
+        for tag in entry.tags:
+            _discard_key(self._keys_by_tag, tag, entry.key)
+
+    def _remove(self, cache_key: str) -> Optional[CacheEntry]:
+
+
+        """Remove an entry and release its memory budget."""
+        entry = self.cache.pop(cache_key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size_bytes
+            self._unindex_entry(entry)
+        return entry
 
     async def _evict_least_used(self) -> None:
-        """Evict least recently used cache entries."""
+        """Evict the least recently used cache entry."""
+        with self._lock:
+            self._evict_one()
+
+    def _evict_one(self) -> None:
+
+
+        """Evict the least recently used entry from the local tier."""
         if not self.cache:
             return
 
-        # Sort by last accessed time and hit count
-        sorted_entries = sorted(
-            self.cache.values(),
-            key=lambda x: (x.last_accessed or x.timestamp, -x.hit_count)
-        )
+        cache_key, entry = self.cache.popitem(last=False)
+        self.current_bytes -= entry.size_bytes
+        self._unindex_entry(entry)
+        self.stats["evictions"] += 1
 
-        # Evict 10% of entries
-        evict_count = max(1, len(sorted_entries) // 10)
+        logger.debug(f"Evicted cache entry: {cache_key}")
 
-        for entry in sorted_entries[:evict_count]:
-            del self.cache[entry.key]
-            self.stats["evictions"] += 1
+    async def invalidate(self, rule_name: Optional[str] = None,
+                         context_type: Optional[str] = None,
+                         tag: Optional[str] = None) -> int:
+        """Invalidate cache entries for a rule, context type or tag."""
+        return self.invalidate_sync(rule_name, context_type, tag)
 
-        logger.info(f"Evicted {evict_count} cache entries")
+    def invalidate_sync(self, rule_name: Optional[str] = None,
+                        context_type: Optional[str] = None,
+                        tag: Optional[str] = None) -> int:
 
-    async def invalidate(self, rule_name: Optional[str] = None,
-                        context_type: Optional[str] = None) -> int:
-        """Invalidate cache entries based on criteria."""
-        invalidated_count = 0
-        keys_to_remove = []
 
-        for key, entry in self.cache.items():
-            should_invalidate = False
+        """
+        Invalidate matching cache entries without awaiting.
+
+        Entries matching any of the given criteria are removed, from the
+        shared tier as well when one is attached. Local cost is proportional
+        to the number of entries removed, not the cache size.
+        """
+        if self.shared_tier is not None:
+            self.shared_tier.invalidate(rule_name, context_type, tag)
+        return self._invalidate_local(rule_name, context_type, tag)
 
-            if rule_name and rule_name in key:
-                should_invalidate = True
-            elif context_type and context_type in key:
-                should_invalidate = True
+    def _invalidate_local(self, rule_name: Optional[str] = None,
+                          context_type: Optional[str] = None,
+                          tag: Optional[str] = None) -> int:
 
-            if should_invalidate:
-                keys_to_remove.append(key)
 
-        for key in keys_to_remove:
-            del self.cache[key]
-            invalidated_count += 1
+        """Invalidate matching entries in the local tier."""
+        keys_to_remove: Set[str] = set()
+        with self._lock:
+            if rule_name:
+                keys_to_remove.update(self._keys_by_rule.get(rule_name, ()))
+            if context_type:
+                keys_to_remove.update(self._keys_by_context_type.get(context_type, ()))
+            if tag:
+                keys_to_remove.update(self._keys_by_tag.get(tag, ()))
 
-        logger.info(f"Invalidated {invalidated_count} cache entries")
-        return invalidated_count
+            for key in keys_to_remove:
+                self._remove(key)
+
+        if keys_to_remove:
+            logger.info(f"Invalidated {len(keys_to_remove)} cache entries")
+        return len(keys_to_remove)
 
     async def clear(self) -> None:
         """Clear all cache entries."""
-        cleared_count = len(self.cache)
-        self.cache.clear()
+        if self.shared_tier is not None:
+            self.shared_tier.clear()
+        self._clear_local()
+
+    def _clear_local(self) -> None:
+
+
+        """Clear all entries in the local tier."""
+        with self._lock:
+            cleared_count = len(self.cache)
+            self.cache.clear()
+            self.current_bytes = 0
+            self._keys_by_rule.clear()
+            self._keys_by_tag.clear()
+            self._keys_by_context_type.clear()
         logger.info(f"Cleared {cleared_count} cache entries")
 
     def get_stats(self) -> Dict[str, Any]:
 
 
         """Get cache performance statistics."""
+        with self._lock:
+            return self._get_stats()
+
+    def _get_stats(self) -> Dict[str, Any]:
+
+
+        """Build the statistics; the caller holds the lock."""
         hit_rate = 0
         if self.stats["total_requests"] > 0:
             hit_rate = self.stats["hits"] / self.stats["total_requests"]
@@ -215,16 +389,37 @@ class RuleCache:
             "hits": self.stats["hits"],
             "misses": self.stats["misses"],
             "evictions": self.stats["evictions"],
+            "expirations": self.stats["expirations"],
             "total_requests": self.stats["total_requests"],
-            "memory_usage_mb": self._estimate_memory_usage()
+            "memory_usage_bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "memory_usage_mb": self._estimate_memory_usage(),
+            "tiers": self._get_tier_stats()
         }
 
+    def _get_tier_stats(self) -> Dict[str, Dict[str, Any]]:
+
+
+        """Per-tier statistics; the shared tier is only reported when attached."""
+        requests = self.stats["total_requests"]
+        tiers = {
+            "local": {
+                "cache_size": len(self.cache),
+                "hits": self.stats["local_hits"],
+                "misses": requests - self.stats["local_hits"],
+                "hit_rate": self.stats["local_hits"] / requests if requests else 0,
+                "memory_usage_bytes": self.current_bytes
+            }
+        }
+        if self.shared_tier is not None:
+            tiers["shared"] = self.shared_tier.get_stats()
+        return tiers
+
     def _estimate_memory_usage(self) -> float:
 
 
-        """Estimate memory usage in MB."""
-        # Rough estimation: each cache entry ~1KB
-        return len(self.cache) * 0.001
+        """Memory held by cached entries in MB."""
+        return self.current_bytes / (1024 * 1024)
 
     async def optimize(self) -> Dict[str, Any]:
         """Optimize cache based on usage patterns."""
@@ -232,12 +427,14 @@ class RuleCache:
             return {"message": "Optimization only available for adaptive strategy"}
 
         # Analyze cache usage patterns
-        total_hits = sum(entry.hit_count for entry in self.cache.values())
-        avg_hits = total_hits / len(self.cache) if self.cache else 0
+        with self._lock:
+            entries = list(self.cache.values())
+        total_hits = sum(entry.hit_count for entry in entries)
+        avg_hits = total_hits / len(entries) if entries else 0
 
         # Adjust TTL based on hit patterns
-        high_hit_entries = [entry for entry in self.cache.values() if entry.hit_count > avg_hits * 2]
-        low_hit_entries = [entry for entry in self.cache.values() if entry.hit_count < avg_hits * 0.5]
+        high_hit_entries = [entry for entry in entries if entry.hit_count > avg_hits * 2]
+        low_hit_entries = [entry for entry in entries if entry.hit_count < avg_hits * 0.5]
 
         optimizations = {
             "high_hit_entries": len(high_hit_entries),
@@ -255,16 +452,63 @@ class RuleCache:
         logger.info(f"Cache optimization completed: {optimizations}")
         return optimizations
 
+
+def _discard_key(index: Dict[str, Set[str]], name: str, cache_key: str) -> None:
+
+
+    """Remove a key from an index bucket, dropping the bucket when empty."""
+    keys = index.get(name)
+    if keys is not None:
+        keys.discard(cache_key)
+        if not keys:
+            del index[name]
+
+
+def estimate_size(obj: Any) -> int:
+
+
+    """Estimate the memory held by an object graph in bytes."""
+    seen = set()
+    stack = [obj]
+    total = 0
+
+    while stack:
+        current = stack.pop()
+        # Classes and enum members are shared singletons, not held by the entry
+        if id(current) in seen or isinstance(current, (type, Enum)):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, '__dict__') and not callable(current):
+            stack.append(vars(current))
+
+    return total
+
+
 # Global cache instance
 _rule_cache: Optional[RuleCache] = None
 
 def get_rule_cache() -> RuleCache:
 
 
-    """Get global rule cache instance."""
+    """
+    Get global rule cache instance.
+
+    Set ``RULES_SHARED_CACHE_PATH`` to a local file path to share cached
+    results between worker processes on the host.
+    """
     global _rule_cache
     if _rule_cache is None:
-        _rule_cache = RuleCache(strategy=CacheStrategy.INTELLIGENT)
+        _rule_cache = RuleCache(
+            strategy=CacheStrategy.INTELLIGENT,
+            shared_tier=_open_shared_tier(os.getenv("RULES_SHARED_CACHE_PATH"))
+        )
     return _rule_cache
 
 def set_cache_strategy(strategy: CacheStrategy) -> None:
@@ -272,6 +516,27 @@ def set_cache_strategy(strategy: CacheStrategy) -> None:
 
     """Set cache strategy for the global cache."""
     global _rule_cache
-    if _rule_cache is not None:
-        _rule_cache.clear()
-    _rule_cache = RuleCache(strategy=strategy)
+    shared_tier = _rule_cache.shared_tier if _rule_cache is not None else None
+    _rule_cache = RuleCache(strategy=strategy, shared_tier=shared_tier)
+
+def configure_shared_cache(path: Optional[str], default_ttl: timedelta = timedelta(minutes=30)) -> None:
+
+
+    """Attach a shared tier at path to the global cache, or detach it when path is None."""
+    cache = get_rule_cache()
+    if cache.shared_tier is not None:
+        cache.shared_tier.close()
+    cache.shared_tier = _open_shared_tier(path, default_ttl)
+
+def _open_shared_tier(path: Optional[str],
+                      default_ttl: timedelta = timedelta(minutes=30)) -> Optional[SharedCacheTier]:
+
+
+    """Open a shared tier, falling back to local-only caching if it cannot be opened."""
+    if not path:
+        return None
+    try:
+        return SharedCacheTier(path, default_ttl=default_ttl)
+    except sqlite3.Error as e:
+        logger.warning(f"Shared rule cache unavailable at {path}, using local cache only: {e}")
+        return None
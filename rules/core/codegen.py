@@ -0,0 +1,285 @@
+"""
+Rule Code Generation
+
+Compiles each rule's condition expressions into one specialised Python
+function, generated once when the rule set loads. The function takes the
+context's ``ConditionEnvironment`` and returns whether all conditions hold,
+instead of running every condition through ``eval`` over a mapping of
+lazily resolved variables.
+
+Every name is resolved when the function is generated, in the same
+precedence the environment uses: built-in functions, then condition
+parameters, then context attributes and domain aliases, then top-level
+data fields. Attribute reads on context data become direct dict gets.
+Conditions become a short-circuiting chain in which a condition that
+raises is logged and counts as not met, as in ``ConditionEvaluator``.
+
+Rules loaded together are generated together: a sub-expression occurring
+more than once across the rule set (``len(grant.impact_metrics)``, a budget
+range, a membership test) gets a memo slot, and is computed by whichever
+rule reaches it first in an evaluation and read back by the rest.
+Sub-expressions reading condition parameters, the clock or a mutating
+method are never shared.
+
+Only expressions that pass ``ConditionEvaluator._validate_ast`` are
+compiled, and every name they contain is rewritten, so generated code
+cannot reach anything an interpreted expression could not.
+"""
+
+from typing import Dict, Any, Optional, Callable, Iterable, List, Tuple
+import ast
+import itertools
+import logging
+
+from .dependencies import VOLATILE_FUNCTIONS
+from .evaluator import ConditionEnvironment, ConditionEvaluator, LazyAttrDict, SafeValue, _wrap_lazy
+from ..types import Rule
+
+logger = logging.getLogger(__name__)
+
+RuleProgram = Callable[[ConditionEnvironment], bool]
+
+# Attributes found on LazyAttrDict itself (methods, slots) rather than in its data
+_MAPPING_ATTRIBUTES = frozenset(dir(LazyAttrDict))
+
+# Sub-expressions that never share a value between occurrences: calls of
+# the functions dependency analysis treats as volatile. Mutating methods are
+# not whitelisted, so none change their object.
+_VOLATILE_NAMES = frozenset(f'_fn_{name}' for name in VOLATILE_FUNCTIONS)
+
+# Sub-expressions worth memoising; names and constants are cheaper to recompute
+_MEMOISABLE_NODES = (ast.Compare, ast.BoolOp, ast.BinOp, ast.UnaryOp, ast.Subscript, ast.Call)
+_slot_counter = itertools.count()
+
+
+def _attr(value: Any, name: str) -> Any:
+
+
+    """Read an attribute the way LazyAttrDict.__getattr__ would, without the failed lookup first."""
+    if type(value) is LazyAttrDict:
+        data = value._data
+        if name == 'length' or name == 'count':
+            return len(data)
+        try:
+            item = data[name]
+        except (KeyError, TypeError):
+            return SafeValue()
+        return _wrap_lazy(value._wrapped, name, item)
+    return getattr(value, name)
+
+
+def _field(environment: ConditionEnvironment, name: str) -> Any:
+
+
+    """Read a top-level data field; raises KeyError if absent, as an unknown name does."""
+    return _wrap_lazy(environment.data._wrapped, name, environment.raw_data[name])
+
+
+class _NameRewriter(ast.NodeTransformer):
+    """Rewrites a validated expression so every name is bound when the rule is generated."""
+
+    def __init__(self, namespace: Dict[str, Any], functions: Dict[str, Any],
+                 parameters: Dict[str, Any], parameters_name: str):
+
+
+        self.namespace = namespace
+        self.functions = functions
+        self.parameters = parameters
+        self.parameters_name = parameters_name
+
+    def bind(self, name: str, value: Any) -> str:
+
+
+        """Make a value available to the generated code under a name."""
+        self.namespace[name] = value
+        return name
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+
+
+        name = node.id
+        if name in self.functions:
+            replacement = ast.Name(self.bind(f'_fn_{name}', self.functions[name]), ast.Load())
+        elif name in self.parameters:
+            replacement = ast.Subscript(
+                ast.Name(self.parameters_name, ast.Load()), ast.Constant(name), ast.Load()
+            )
+        elif name in ConditionEnvironment._RESOLVERS:
+            resolver = self.bind(f'_resolve_{name}', ConditionEnvironment._RESOLVERS[name])
+            replacement = ast.Call(ast.Name(resolver, ast.Load()), [ast.Name('env', ast.Load())], [])
+        else:
+            replacement = ast.Call(
+                ast.Name('_field', ast.Load()), [ast.Name('env', ast.Load()), ast.Constant(name)], []
+            )
+        return ast.copy_location(replacement, node)
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+
+
+        self.generic_visit(node)
+        if node.attr in _MAPPING_ATTRIBUTES:
+            return node
+        return ast.copy_location(
+            ast.Call(ast.Name('_attr', ast.Load()), [node.value, ast.Constant(node.attr)], []), node
+        )
+
+
+def _is_read(node: ast.AST) -> bool:
+
+
+    """Whether a node only resolves a name or reads attributes of one, costing no more than a memo lookup."""
+    if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Name):
+        return False
+    name = node.func.id
+    if name == '_attr':
+        return _is_read(node.args[0])
+    return name == '_field' or name.startswith('_resolve_')
+
+
+def _is_pure(node: ast.AST) -> bool:
+
+
+    """Whether a rewritten sub-expression has the same value wherever it appears for one context."""
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name) and (
+                child.id.startswith('_parameters_') or child.id in _VOLATILE_NAMES):
+            return False
+    return True
+
+
+def _memoisable(node: ast.AST) -> bool:
+
+
+    return isinstance(node, _MEMOISABLE_NODES) and not _is_read(node) and _is_pure(node)
+
+
+class _SharedSubexpressions(ast.NodeTransformer):
+    """Replaces sub-expressions shared across the rule set with reads of the per-context memo."""
+
+    def __init__(self, slots: Dict[str, int]):
+
+
+        self.slots = slots
+        self.used = False
+
+    def visit(self, node: ast.AST) -> ast.AST:
+
+
+        slot = self.slots.get(ast.dump(node)) if _memoisable(node) else None
+        node = super().visit(node)
+        if slot is None:
+            return node
+        self.used = True
+        memo = ast.Name('memo', ast.Load())
+        return ast.IfExp(
+            ast.Compare(ast.Constant(slot), [ast.In()], [memo]),
+            ast.Call(ast.Attribute(memo, 'recall', ast.Load()), [ast.Constant(slot)], []),
+            ast.Call(ast.Attribute(memo, 'setdefault', ast.Load()), [ast.Constant(slot), node], [])
+        )
+
+
+class RuleCompiler:
+    """
+    Generates a specialised function per rule.
+
+    Rules with custom or expensive conditions are left to the interpreting
+    evaluator. Sub-expressions that appear more than once across the rules
+    compiled together are computed once per context evaluation and shared
+    through the environment's ``SubexpressionMemo``.
+    """
+
+    def __init__(self, condition_evaluator: ConditionEvaluator):
+
+
+        self.condition_evaluator = condition_evaluator
+
+    def compile_rule(self, rule: Rule) -> Optional[RuleProgram]:
+
+
+        """Generate the function evaluating a rule's conditions, or None if it must be interpreted."""
+        return self.compile_rules([rule]).get(rule.name)
+
+    def compile_rules(self, rules: Iterable[Rule]) -> Dict[str, RuleProgram]:
+
+
+        """Generate functions for every rule that can be compiled, sharing common sub-expressions."""
+        prepared = [self._prepare(rule) for rule in rules]
+        prepared = [entry for entry in prepared if entry is not None]
+
+        occurrences: Dict[str, int] = {}
+        for _, _, trees in prepared:
+            for tree in trees:
+                if isinstance(tree, ast.AST):
+                    for node in ast.walk(tree):
+                        if _memoisable(node):
+                            key = ast.dump(node)
+                            occurrences[key] = occurrences.get(key, 0) + 1
+        # Slots are unique per process, so memo entries of different rule sets never collide
+        slots = {key: next(_slot_counter) for key, count in occurrences.items() if count > 1}
+
+        return {rule.name: self._generate(rule, namespace, trees, slots) for rule, namespace, trees in prepared}
+
+    def _prepare(self, rule: Rule) -> Optional[Tuple[Rule, Dict[str, Any], List[Any]]]:
+
+
+        """Validate a rule's conditions and bind their names; each tree is the rewritten expression or its error."""
+        if any(condition.custom_evaluator is not None or condition.expensive
+               for condition in rule.conditions):
+            return None
+
+        namespace = {
+            '__builtins__': {}, '_attr': _attr, '_field': _field, '_failed': self._failed, '_Error': Exception
+        }
+        trees: List[Any] = []
+        for position, condition in enumerate(rule.conditions):
+            namespace[f'_expression_{position}'] = condition.expression
+            try:
+                tree = ast.parse(condition.expression, mode='eval')
+                self.condition_evaluator._validate_ast(tree)
+            except Exception as e:
+                # Rejected conditions are never met, as when interpreted
+                trees.append(e)
+                break
+
+            namespace[f'_parameters_{position}'] = condition.parameters
+            trees.append(_NameRewriter(
+                namespace, self.condition_evaluator.functions, condition.parameters, f'_parameters_{position}'
+            ).visit(tree).body)
+        return rule, namespace, trees
+
+    def _generate(self, rule: Rule, namespace: Dict[str, Any], trees: List[Any],
+                  slots: Dict[str, int]) -> RuleProgram:
+
+
+        """Generate the short-circuiting function for a prepared rule."""
+        shared = _SharedSubexpressions(slots)
+        lines = []
+        for position, tree in enumerate(trees):
+            if not isinstance(tree, ast.AST):
+                namespace[f'_error_{position}'] = tree
+                lines.append(f'    return _failed(_expression_{position}, _error_{position})')
+                break
+            expression = ast.unparse(ast.fix_missing_locations(shared.visit(tree)))
+            lines += [
+                '    try:',
+                f'        if not ({expression}):',
+                '            return False',
+                '    except _Error as e:',
+                f'        return _failed(_expression_{position}, e)'
+            ]
+        else:
+            lines.append('    return True')
+
+        header = ['def evaluate(env):'] + (['    memo = env.memo'] if shared.used else [])
+        source = '\n'.join(header + lines)
+        exec(compile(source, f'<rule {rule.name}>', 'exec'), namespace)
+        program = namespace['evaluate']
+        program.generated_source = source
+        return program
+
+    @staticmethod
+    def _failed(expression: str, error: Exception) -> bool:
+
+
+        logger.error(f"Error evaluating expression '{expression}': {error}")
+        return False
@@ -0,0 +1,494 @@
+"""
+Field Dependencies
+
+Static analysis of condition expressions to find which context data fields
+they read, and which fields they cannot be satisfied without.
+"""
+
+from typing import Dict, List, Any, Optional, FrozenSet, Tuple, Iterable
+from dataclasses import dataclass
+import ast
+import logging
+
+from ..types import Action, Condition, Rule
+
+logger = logging.getLogger(__name__)
+
+# Names that resolve to the whole context data
+DATA_ROOTS = {'data', 'grant', 'report'}
+
+# Keys whose presence decides whether the grant/report aliases resolve to the data
+ALIAS_TRIGGER_FIELDS = {
+    'grant': ('grant_id', 'impact_metrics'),
+    'report': ('type', 'outputs', 'outcomes')
+}
+
+# Names that resolve to a sub-dictionary of the context data
+SUB_DATA_ROOTS = {
+    'agent': 'agent_data',
+    'operation': 'operation_data',
+    'communication': 'communication_data',
+    'stakeholder': 'stakeholder_data'
+}
+
+# Names that wrap a single field of the context data
+FIELD_ROOTS = {
+    'project': 'project_id',
+    'user': 'request_type'
+}
+
+# Context attributes other than data; reading them makes the expression
+# depend on more than the context type and data
+CONTEXT_NAMES = {'context', 'user_id', 'session_id', 'timestamp', 'metadata', 'day_of_week'}
+
+# Names that never depend on the context
+CONSTANT_NAMES = {'context_type', 'True', 'False', 'None'}
+
+# Functions whose result changes between calls
+VOLATILE_FUNCTIONS = {'now', 'datetime'}
+
+# Attributes computed by the attribute wrappers rather than read from data
+PSEUDO_ATTRIBUTES = {'length', 'count'}
+
+# Mapping methods whose first argument names a field
+FIELD_ACCESSORS = {'get'}
+
+# Mapping methods that read the whole receiver
+MAPPING_METHODS = {'get', 'keys', 'values', 'items'}
+
+# Comparisons that are False when either operand is a missing field; a
+# missing field evaluates to SafeValue, which compares unequal to everything
+# and iterates as empty, so only ``not in`` can hold
+STRICT_COMPARISONS = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In)
+
+
+@dataclass(frozen=True)
+class FieldDependencies:
+    """
+    Context data fields read by an expression or rule.
+
+    ``paths`` are tuples of keys into ``ExecutionContext.data``; the empty
+    tuple means the whole data dict is read. ``complete`` is False when the
+    expression reads something the analysis cannot see (context attributes,
+    volatile functions, custom evaluators or unparseable expressions).
+    """
+    paths: FrozenSet[Tuple[Any, ...]] = frozenset()
+    complete: bool = True
+
+    @property
+    def top_level_fields(self) -> Optional[FrozenSet[str]]:
+
+
+        """Top-level data keys read, or None if the whole data may be read."""
+        if not self.complete or () in self.paths:
+            return None
+        return frozenset(path[0] for path in self.paths)
+
+    def merge(self, other: 'FieldDependencies') -> 'FieldDependencies':
+
+
+        """Combine the dependencies of two expressions."""
+        return FieldDependencies(
+            paths=self.paths | other.paths,
+            complete=self.complete and other.complete
+        )
+
+
+class DependencyAnalyser(ast.NodeVisitor):
+    """Collects data paths read by a validated expression AST."""
+
+    def __init__(self, functions: Iterable[str] = (), parameters: Iterable[str] = ()):
+
+
+        self.functions = set(functions)
+        self.parameters = set(parameters)
+        self.paths: set = set()
+        self.complete = True
+
+    def analyse(self, tree: ast.AST) -> FieldDependencies:
+
+
+        """Analyse an expression tree."""
+        self.visit(tree)
+        return FieldDependencies(paths=frozenset(self.paths), complete=self.complete)
+
+    def visit_Name(self, node: ast.Name) -> None:
+
+
+        self._record(self._resolve_chain(node))
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+
+
+        chain = self._resolve_chain(node)
+        if chain is None:
+            self.generic_visit(node)
+        else:
+            self._record(chain)
+
+    def visit_Subscript(self, node: ast.Subscript) -> None:
+
+
+        chain = self._resolve_chain(node)
+        if chain is None:
+            self.generic_visit(node)
+        else:
+            self._record(chain)
+
+    def visit_Call(self, node: ast.Call) -> None:
+
+
+        func = node.func
+        if isinstance(func, ast.Name):
+            if func.id in VOLATILE_FUNCTIONS:
+                self.complete = False
+        elif isinstance(func, ast.Attribute):
+            target = self._resolve_chain(func.value)
+            if target is not None:
+                # obj.get('field', ...) reads a single field
+                if (func.attr in FIELD_ACCESSORS and node.args
+                        and isinstance(node.args[0], ast.Constant)):
+                    self._record(target + (node.args[0].value,))
+                    for arg in node.args[1:]:
+                        self.visit(arg)
+                    for keyword in node.keywords:
+                        self.visit(keyword)
+                    return
+                # Any other method reads the whole receiver
+                self._record(target)
+            else:
+                self.visit(func.value)
+
+        for arg in node.args:
+            self.visit(arg)
+        for keyword in node.keywords:
+            self.visit(keyword)
+
+    def _resolve_chain(self, node: ast.AST) -> Optional[Tuple[Any, ...]]:
+
+
+        """
+        Resolve an attribute/subscript chain to a data path.
+
+        Returns a tuple whose first element is the root marker followed by
+        the data path, or None if the chain does not start at a name.
+        """
+        keys: List[Any] = []
+        while True:
+            if isinstance(node, ast.Attribute):
+                keys.append(node.attr)
+                node = node.value
+            elif isinstance(node, ast.Subscript):
+                index = node.slice
+                if isinstance(index, ast.Index):  # Python < 3.9
+                    index = index.value
+                if isinstance(index, ast.Constant) and isinstance(index.value, (str, int)):
+                    keys.append(index.value)
+                else:
+                    # Dynamic subscripts read the whole container
+                    self.visit(index)
+                    keys.clear()
+                node = node.value
+            elif isinstance(node, ast.Name):
+                keys.reverse()
+                return (node.id,) + tuple(keys)
+            else:
+                return None
+
+    def _record(self, chain: Optional[Tuple[Any, ...]]) -> None:
+
+
+        """Record the data path read through a resolved chain."""
+        if chain is None:
+            return
+
+        root, keys = chain[0], list(chain[1:])
+
+        # .length/.count and mapping methods are computed from the receiver
+        for position, key in enumerate(keys):
+            if key in PSEUDO_ATTRIBUTES or key in MAPPING_METHODS:
+                keys = keys[:position]
+                break
+
+        if root in self.functions or root in self.parameters or root in CONSTANT_NAMES:
+            return
+        if root in CONTEXT_NAMES:
+            self.complete = False
+            return
+
+        if root in DATA_ROOTS:
+            for trigger in ALIAS_TRIGGER_FIELDS.get(root, ()):
+                self.paths.add((trigger,))
+            self.paths.add(tuple(keys))
+        elif root in SUB_DATA_ROOTS:
+            self.paths.add((SUB_DATA_ROOTS[root],) + tuple(keys))
+        elif root in FIELD_ROOTS:
+            self.paths.add((FIELD_ROOTS[root],))
+        else:
+            # Bare names resolve to top-level data fields
+            self.paths.add((root,) + tuple(keys))
+
+
+def analyse_expression(expression: str, functions: Iterable[str] = (),
+                       parameters: Iterable[str] = ()) -> FieldDependencies:
+
+
+    """Find the context data fields read by a condition expression."""
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError:
+        return FieldDependencies(complete=False)
+    return DependencyAnalyser(functions, parameters).analyse(tree)
+
+
+def analyse_conditions(conditions: Iterable[Condition],
+                       functions: Iterable[str] = ()) -> FieldDependencies:
+
+
+    """Find the context data fields read by a list of conditions."""
+    functions = set(functions)
+    dependencies = FieldDependencies()
+    for condition in conditions:
+        if condition.custom_evaluator is not None:
+            return FieldDependencies(complete=False)
+        dependencies = dependencies.merge(
+            analyse_expression(condition.expression, functions, condition.parameters)
+        )
+    return dependencies
+
+
+def analyse_actions(actions: Iterable[Action],
+                    custom_actions: Iterable[str] = ()) -> FieldDependencies:
+
+
+    """
+    Find the context data fields whose values action results depend on.
+
+    Built-in actions only read data through ``validate_data``; actions with
+    their own executor, or registered as custom actions, may read anything.
+    """
+    custom_actions = set(custom_actions)
+    paths = set()
+    for action in actions:
+        if action.custom_executor is not None or action.name in custom_actions:
+            return FieldDependencies(complete=False)
+        if action.name == 'validate_data':
+            paths.update((name,) for name in action.parameters.get('validations', {}))
+    return FieldDependencies(paths=frozenset(paths))
+
+
+def analyse_rule(rule: Rule, functions: Iterable[str] = (),
+                 custom_actions: Iterable[str] = ()) -> FieldDependencies:
+
+
+    """Find the context data fields read by a rule's conditions and actions."""
+    return analyse_conditions(rule.conditions, functions).merge(
+        analyse_actions(rule.actions, custom_actions)
+    )
+
+
+class RequiredFieldAnalyser:
+    """
+    Finds the data paths a validated expression cannot be true without.
+
+    A missing bare name raises NameError wherever it is evaluated, and a
+    missing path under ``data``, ``grant``, ``report`` or the sub-data
+    aliases evaluates to a falsy SafeValue that fails strict comparisons and
+    arithmetic. Either way the condition evaluates to False, so if any
+    required path is absent the condition can be skipped. The analysis is
+    conservative: a path is only required where its absence certainly
+    makes the whole expression falsy or raise.
+    """
+
+    def __init__(self, functions: Iterable[str] = (), parameters: Iterable[str] = ()):
+
+
+        self.functions = set(functions)
+        self.parameters = set(parameters)
+
+    def analyse(self, tree: ast.AST) -> FrozenSet[Tuple[Any, ...]]:
+
+
+        """Required paths of an expression tree."""
+        if isinstance(tree, ast.Expression):
+            tree = tree.body
+        return frozenset(self._falsy(tree))
+
+    def _falsy(self, node: ast.AST) -> set:
+
+
+        """Paths whose absence makes the node falsy or raise."""
+        if isinstance(node, ast.BoolOp):
+            operands = [self._falsy(value) for value in node.values]
+            if isinstance(node.op, ast.And):
+                return set().union(*operands)
+            return set.intersection(*operands)
+
+        if isinstance(node, ast.Compare):
+            paths = self._raising(node)
+            if all(isinstance(op, STRICT_COMPARISONS) for op in node.ops):
+                for operand in [node.left] + node.comparators:
+                    path = self._direct_path(operand)
+                    if path:
+                        paths.add(path)
+            return paths
+
+        if isinstance(node, (ast.Attribute, ast.Subscript, ast.Name)):
+            paths = self._raising(node)
+            path = self._direct_path(node)
+            if path:
+                # A missing path is a falsy SafeValue
+                paths.add(path)
+            return paths
+
+        return self._raising(node)
+
+    def _raising(self, node: ast.AST) -> set:
+
+
+        """Paths whose absence makes evaluating the node raise."""
+        if isinstance(node, ast.Name):
+            if self._is_data_name(node.id):
+                return {(node.id,)}
+            return set()
+
+        if isinstance(node, (ast.BoolOp, ast.Compare)):
+            # Only the first operands are certain to be evaluated
+            first = node.values[:1] if isinstance(node, ast.BoolOp) else [node.left, node.comparators[0]]
+            return set().union(*(self._raising(operand) for operand in first))
+
+        if isinstance(node, ast.BinOp):
+            paths = self._raising(node.left) | self._raising(node.right)
+            if not isinstance(node.op, ast.Mod):
+                # SafeValue supports no arithmetic; only str % formats it
+                for operand in (node.left, node.right):
+                    path = self._direct_path(operand)
+                    if path:
+                        paths.add(path)
+            return paths
+
+        if isinstance(node, ast.Attribute):
+            return self._raising(node.value)
+
+        if isinstance(node, ast.Subscript):
+            return self._raising(node.value) | self._raising(node.slice)
+
+        if isinstance(node, ast.Index):  # Python < 3.9
+            return self._raising(node.value)
+
+        if isinstance(node, (ast.UnaryOp, ast.Call, ast.List, ast.Tuple, ast.Dict, ast.Slice)):
+            # Every child is evaluated
+            paths = set()
+            for child in ast.iter_child_nodes(node):
+                paths |= self._raising(child)
+            return paths
+
+        return set()
+
+    def _direct_path(self, node: ast.AST) -> Optional[Tuple[Any, ...]]:
+
+
+        """
+        Data path a node reads verbatim, or None.
+
+        Only plain attribute and constant subscript chains from a data root
+        count; computed attributes such as ``.length`` or mapping methods do
+        not evaluate to SafeValue when the path is missing.
+        """
+        keys: List[Any] = []
+        while True:
+            if isinstance(node, ast.Attribute):
+                if node.attr in PSEUDO_ATTRIBUTES or node.attr in MAPPING_METHODS:
+                    return None
+                keys.append(node.attr)
+                node = node.value
+            elif isinstance(node, ast.Subscript):
+                index = node.slice
+                if isinstance(index, ast.Index):  # Python < 3.9
+                    index = index.value
+                if not (isinstance(index, ast.Constant) and isinstance(index.value, (str, int))):
+                    return None
+                keys.append(index.value)
+                node = node.value
+            elif isinstance(node, ast.Name):
+                break
+            else:
+                return None
+
+        keys.reverse()
+        root = node.id
+        if root in DATA_ROOTS:
+            return tuple(keys) or None
+        if root in SUB_DATA_ROOTS:
+            return (SUB_DATA_ROOTS[root],) + tuple(keys)
+        if self._is_data_name(root):
+            return (root,) + tuple(keys)
+        return None
+
+    def _is_data_name(self, name: str) -> bool:
+
+
+        """Check whether a bare name resolves to a top-level data field."""
+        return not (
+            name in self.functions or name in self.parameters or name in CONSTANT_NAMES
+            or name in CONTEXT_NAMES or name in DATA_ROOTS or name in SUB_DATA_ROOTS
+            or name in FIELD_ROOTS
+        )
+
+
+def required_fields(conditions: Iterable[Condition],
+                    functions: Iterable[str] = ()) -> FrozenSet[Tuple[Any, ...]]:
+
+
+    """
+    Find the data paths without which a list of conditions cannot all pass.
+
+    Conditions are combined with AND, so a path required by any expression
+    is required by the rule. Custom evaluators require nothing.
+    """
+    functions = set(functions)
+    paths = set()
+    for condition in conditions:
+        if condition.custom_evaluator is not None:
+            continue
+        try:
+            tree = ast.parse(condition.expression, mode='eval')
+        except SyntaxError:
+            continue
+        paths |= RequiredFieldAnalyser(functions, condition.parameters).analyse(tree)
+
+    # A path is present only if its prefixes are, so prefixes need no check
+    return frozenset(
+        path for path in paths
+        if not any(len(other) > len(path) and other[:len(path)] == path for other in paths)
+    )
+
+
+def missing_fields(paths: Iterable[Tuple[Any, ...]], data: Optional[Dict[str, Any]]) -> List[Tuple[Any, ...]]:
+
+
+    """
+    Get the paths absent from context data.
+
+    A path through a value that is neither a dict nor a list is treated as
+    present, since the analysis cannot tell how the expression reads it.
+    """
+    if data is None:
+        data = {}
+    missing = []
+    for path in paths:
+        value: Any = data
+        for key in path:
+            if isinstance(value, dict):
+                if key not in value:
+                    missing.append(path)
+                    break
+                value = value[key]
+            elif isinstance(value, list) and isinstance(key, int):
+                if not -len(value) <= key < len(value):
+                    missing.append(path)
+                    break
+                value = value[key]
+            else:
+                break
+    return missing
@@ -4,18 +4,37 @@ Rule Engine
 The main orchestrator for rule evaluation and execution.
 """
 
-from typing import Dict, List, Any, Optional, Callable
-from dataclasses import dataclass, field
+from typing import (
+    Dict, List, Any, Optional, Callable, Iterable, FrozenSet, Tuple, Mapping, Set, Iterator,
+    AsyncIterable, AsyncIterator, Awaitable, Union, TYPE_CHECKING
+)
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+import hashlib
+import json
 import logging
+import threading
 import time
 from datetime import datetime
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
-from .evaluator import RuleEvaluator
+from .audit import AuditRecord, AuditRingBuffer, AuditSink, AuditWriter
+from .bundle import BundleError, RuleBundle, RuleEntry, analysis_key, dump_bundle, read_bundle, write_bundle
+from .cache import RuleCache, get_rule_cache
+from .codegen import RuleCompiler, RuleProgram
+from .dependencies import FieldDependencies, analyse_rule, missing_fields, required_fields
+from .evaluator import RuleEvaluator, SubexpressionMemo
 from .executor import ActionExecutor
+from .hashing import structural_hash
 from .metrics import MetricsCollector
-from ..types import Rule, RuleResult, ExecutionContext
+from .profiler import RuleProfiler, sampling_profiler
+from ..types import Rule, RuleResult, ExecutionContext, ContextType
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from .vectorized import VectorizedEvaluator
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +47,277 @@ class RuleEngineConfig:
     max_concurrent_rules: int = 10
     enable_metrics: bool = True
     enable_audit_trail: bool = True
+    # Per-rule deadline, overridden by Rule.timeout_seconds; 0 disables it
     timeout_seconds: int = 30
-    retry_attempts: int = 3
+    enable_result_cache: bool = True
+    # Per-attempt deadline for actions without their own; None disables it
+    action_timeout_seconds: Optional[float] = None
+    # Evaluations kept in the in-memory audit tail
+    audit_history_size: int = 1000
+    # Skip rules whose conditions read context data fields that are absent
+    skip_missing_fields: bool = True
+    # Contexts evaluated at once by evaluate_batch unless overridden
+    batch_concurrency: int = 32
+    # Worker processes for the opt-in process pool; None uses every core
+    process_pool_workers: Optional[int] = None
+    # Smaller batches are evaluated in-process even when the pool is enabled
+    process_pool_min_batch: int = 64
+    # Generate a specialised function per rule when the rule set loads
+    # instead of interpreting each condition expression
+    enable_codegen: bool = False
+    # Contexts whose last evaluation is kept for evaluate_incremental_async
+    incremental_state_size: int = 1000
+    # Run the actions of rules whose conditions are met; disable to only
+    # evaluate conditions, e.g. when replaying stored contexts
+    execute_actions: bool = True
+    # Fraction of evaluations whose conditions and actions are timed
+    # individually by the sampling profiler; 0 disables it
+    profile_sample_rate: float = 0.0
+
+
+@dataclass
+class BatchItemResult:
+
+
+    """Outcome of evaluating one context of a batch."""
+    index: int
+    context: ExecutionContext
+    results: List[Any] = field(default_factory=list)
+    error: Optional[Exception] = None
+
+    @property
+    def success(self) -> bool:
+
+
+        return self.error is None
+
+
+@dataclass
+class _IncrementalState:
+
+
+    """Last evaluation of a context, kept to re-evaluate only the rules its edits affect."""
+    rules_version: int
+    context_type: ContextType
+    selection: Tuple[Optional[str], Optional[FrozenSet[str]]]
+    # Structural hash of each top-level data field when the evaluation started
+    field_hashes: Dict[str, str]
+    results: Dict[str, RuleResult]
+
+
+class RuleIndex:
+    """
+    Precomputed, priority-ordered lookup of rules by context type and tag.
+
+    The index is immutable once built; the engine replaces it whenever the
+    rule set changes. Selections for a (context type, tags) pair are memoised
+    so repeated evaluations only touch the rules that can match; the memo
+    keeps the ``max_selections`` most recently used pairs, since tag filters
+    may come from callers.
+
+    The index also holds the rule dependency DAG: each rule's prerequisites
+    and a topological schedule order. Building it raises ValueError if a
+    rule depends on an unknown rule or the dependencies form a cycle.
+    """
+
+    def __init__(self, rules: Iterable[Rule], rule_tags: Dict[str, FrozenSet[str]],
+                 max_selections: int = 256):
+
+
+        # Sort by priority (higher priority first); sort is stable so rules
+        # of equal priority keep their registration order
+        self.ordered_rules: List[Rule] = sorted(
+            rules, key=lambda r: r.priority.value, reverse=True
+        )
+        self.by_context_type: Dict[ContextType, List[Rule]] = {
+            context_type: [
+                rule for rule in self.ordered_rules
+                if not rule.context_types or context_type in rule.context_types
+            ]
+            for context_type in ContextType
+        }
+        tag_members: Dict[str, set] = {}
+        for rule in self.ordered_rules:
+            for tag in rule_tags.get(rule.name, frozenset()):
+                tag_members.setdefault(tag, set()).add(rule.name)
+        self.by_tag: Dict[str, FrozenSet[str]] = {
+            tag: frozenset(names) for tag, names in tag_members.items()
+        }
+        self.max_selections = max_selections
+        self._selections: 'OrderedDict[Tuple[ContextType, Optional[FrozenSet[str]]], List[Rule]]' = OrderedDict()
+        self._selections_lock = threading.Lock()
+
+        self.prerequisites: Dict[str, Tuple[str, ...]] = {
+            rule.name: tuple(dict.fromkeys(rule.depends_on))
+            for rule in self.ordered_rules if rule.depends_on
+        }
+        self.schedule_position: Dict[str, int] = self._topological_positions()
+
+    def _topological_positions(self) -> Dict[str, int]:
+
+
+        """Order rules so prerequisites come first, otherwise by priority."""
+        known = {rule.name for rule in self.ordered_rules}
+        for name, prerequisites in self.prerequisites.items():
+            unknown = [prerequisite for prerequisite in prerequisites if prerequisite not in known]
+            if unknown:
+                raise ValueError(f"Rule '{name}' depends on unknown rules: {', '.join(unknown)}")
+
+        positions: Dict[str, int] = {}
+        visiting: List[str] = []
+
+        def visit(name: str) -> None:
+            if name in positions:
+                return
+            if name in visiting:
+                cycle = visiting[visiting.index(name):] + [name]
+                raise ValueError(f"Rule dependency cycle: {' -> '.join(cycle)}")
+            visiting.append(name)
+            for prerequisite in self.prerequisites.get(name, ()):
+                visit(prerequisite)
+            visiting.pop()
+            positions[name] = len(positions)
+
+        for rule in self.ordered_rules:
+            visit(rule.name)
+        return positions
+
+    def select(self, context_type: ContextType, tags: Optional[FrozenSet[str]] = None) -> List[Rule]:
+
+
+        """Get priority-ordered candidate rules for a context type and optional tag filter."""
+        key = (context_type, tags)
+        with self._selections_lock:
+            selection = self._selections.get(key)
+            if selection is not None:
+                self._selections.move_to_end(key)
+        if selection is None:
+            candidates = self.by_context_type.get(context_type)
+            if candidates is None:
+                candidates = [
+                    rule for rule in self.ordered_rules
+                    if not rule.context_types or context_type in rule.context_types
+                ]
+            if tags is not None:
+                names = set()
+                for tag in tags:
+                    names.update(self.by_tag.get(tag, ()))
+                candidates = [rule for rule in candidates if rule.name in names]
+            selection = candidates
+            with self._selections_lock:
+                self._selections[key] = selection
+                while len(self._selections) > self.max_selections:
+                    self._selections.popitem(last=False)
+        return selection
+
+
+class RuleSnapshot:
+    """
+    Immutable, versioned state of an engine's rule set.
+
+    Holds the rules, their index tags, the analysis derived from each rule
+    and the registered modes. Snapshots are never changed in place: changing
+    the rule set builds the next version from a copy and the engine swaps it
+    in with a single reference assignment. An evaluation captures the
+    snapshot current when it starts and finishes against it, even if the
+    rules are reloaded meanwhile.
+    """
+
+    def __init__(self, version: int = 0,
+                 rules: Optional[Dict[str, Rule]] = None,
+                 rule_tags: Optional[Dict[str, FrozenSet[str]]] = None,
+                 fingerprints: Optional[Dict[str, str]] = None,
+                 dependencies: Optional[Dict[str, FieldDependencies]] = None,
+                 requirements: Optional[Dict[str, FrozenSet[Tuple[Any, ...]]]] = None,
+                 modes: Optional[Dict[str, FrozenSet[str]]] = None,
+                 compiler: Optional[RuleCompiler] = None):
+
+
+        self.version = version
+        self.rules: Mapping[str, Rule] = MappingProxyType(dict(rules or {}))
+        self.rule_tags: Mapping[str, FrozenSet[str]] = MappingProxyType(dict(rule_tags or {}))
+        self.fingerprints: Mapping[str, str] = MappingProxyType(dict(fingerprints or {}))
+        self.dependencies: Mapping[str, FieldDependencies] = MappingProxyType(dict(dependencies or {}))
+        self.requirements: Mapping[str, FrozenSet[Tuple[Any, ...]]] = MappingProxyType(dict(requirements or {}))
+        self.modes: Mapping[str, FrozenSet[str]] = MappingProxyType(dict(modes or {}))
+        self.compiler = compiler
+        self._index: Optional[RuleIndex] = None
+        self._programs: Optional[Mapping[str, RuleProgram]] = None
+
+    @property
+    def index(self) -> RuleIndex:
+
+
+        """Rule index, built on first use; raises ValueError if rule dependencies are invalid."""
+        index = self._index
+        if index is None:
+            # Concurrent first uses may both build it; either result is equivalent
+            index = RuleIndex(self.rules.values(), self.rule_tags)
+            self._index = index
+        return index
+
+    def validate(self) -> RuleIndex:
+
+
+        """
+        Build the rule index now, checking the rule dependency DAG.
+
+        Raises:
+            ValueError: If a rule depends on an unknown rule or the dependencies form a cycle
+        """
+        return self.index
+
+    @property
+    def programs(self) -> Mapping[str, RuleProgram]:
+
+
+        """Generated condition functions by rule name, built on first use if codegen is enabled."""
+        programs = self._programs
+        if programs is None:
+            # The whole rule set is compiled together so common sub-expressions are shared
+            compiled = self.compiler.compile_rules(self.rules.values()) if self.compiler else {}
+            programs = self._programs = MappingProxyType(compiled)
+        return programs
+
+
+class _RuleSetDraft:
+    """Mutable copy of a snapshot, frozen into the next version once edited."""
+
+    def __init__(self, snapshot: RuleSnapshot, empty: bool = False):
+
+
+        self.base = snapshot
+        self.rules = {} if empty else dict(snapshot.rules)
+        self.rule_tags = {} if empty else dict(snapshot.rule_tags)
+        self.fingerprints = {} if empty else dict(snapshot.fingerprints)
+        self.dependencies = {} if empty else dict(snapshot.dependencies)
+        self.requirements = {} if empty else dict(snapshot.requirements)
+        self.modes = dict(snapshot.modes)
+        self.changed = empty
+
+    def remove(self, rule_name: str) -> None:
+
+
+        for entries in (self.rules, self.rule_tags, self.fingerprints, self.dependencies, self.requirements):
+            entries.pop(rule_name, None)
+        self.changed = True
+
+    def stale_rules(self) -> Set[str]:
+
+
+        """Rules of the base snapshot that were removed or redefined."""
+        return {
+            name for name, fingerprint in self.base.fingerprints.items()
+            if self.fingerprints.get(name) != fingerprint
+        }
+
+    def freeze(self, compiler: Optional[RuleCompiler] = None) -> RuleSnapshot:
+
+
+        return RuleSnapshot(
+            self.base.version + 1, self.rules, self.rule_tags, self.fingerprints,
+            self.dependencies, self.requirements, self.modes, compiler
+        )
 
 
 class RuleEngine:
@@ -38,53 +326,218 @@ class RuleEngine:
 
     Features:
     - Parallel rule execution
-    - Rule chaining and dependencies
+    - Rule dependencies, pruning rules whose prerequisites fail
     - Comprehensive metrics and monitoring
     - Audit trail for all rule executions
     - Error handling and retry logic
     """
 
-    def __init__(self, config: Optional[RuleEngineConfig] = None):
+    def __init__(self, config: Optional[RuleEngineConfig] = None,
+                 result_cache: Optional[RuleCache] = None,
+                 audit_sink: Optional[AuditSink] = None):
 
 
         self.config = config or RuleEngineConfig()
-        self.rules: Dict[str, Rule] = {}
+        # Rule changes are copy-on-write; writers are serialised, readers never lock
+        self._snapshot = RuleSnapshot()
+        self._snapshot_lock = threading.Lock()
         self.evaluator = RuleEvaluator()
-        self.executor = ActionExecutor()
+        self.rule_compiler: Optional[RuleCompiler] = None
+        if self.config.enable_codegen:
+            self.rule_compiler = RuleCompiler(self.evaluator.condition_evaluator)
+        self._subexpressions_computed = 0
+        self._subexpressions_reused = 0
+        # Last evaluation per context ID, least recently evaluated first
+        self._incremental_states: 'OrderedDict[str, _IncrementalState]' = OrderedDict()
+        self._incremental_lock = threading.Lock()
+        self.executor = ActionExecutor(default_timeout=self.config.action_timeout_seconds)
         self.metrics = MetricsCollector() if self.config.enable_metrics else None
-        self.execution_history: List[Dict] = []
+        self.profiler: Optional[RuleProfiler] = None
+        if self.config.profile_sample_rate:
+            self.profiler = RuleProfiler(self.config.profile_sample_rate)
+        if self.metrics:
+            self.metrics.register_cache(
+                'compiled_expressions',
+                self.evaluator.condition_evaluator.compile_cache.get_stats
+            )
+        # Recent evaluations stay in memory; the full history goes to the
+        # audit sink, if any, through a background writer
+        self.execution_history = AuditRingBuffer(self.config.audit_history_size)
+        self.audit_writer: Optional[AuditWriter] = None
+        if self.config.enable_audit_trail and audit_sink is not None:
+            self.audit_writer = AuditWriter(audit_sink)
 
-        # Thread pool for concurrent execution
-        self.thread_pool = ThreadPoolExecutor(
-            max_workers=self.config.max_concurrent_rules
-        )
+        # Results of deterministic rules are cached across evaluations,
+        # in the process-wide rule cache unless one is supplied
+        self.result_cache: Optional[RuleCache] = None
+        if self.config.enable_result_cache:
+            self.result_cache = result_cache or get_rule_cache()
+        if self.metrics and self.result_cache:
+            self.metrics.register_cache('rule_results', self.result_cache.get_stats)
+        if self.metrics and self.rule_compiler:
+            self.metrics.register_cache('subexpressions', self.get_subexpression_stats)
 
-    def add_rule(self, rule: Rule) -> None:
+        # Opt-in pool of worker processes for large batches; see enable_process_pool
+        self.process_pool = None
+        self._vectorized: Optional['VectorizedEvaluator'] = None
 
+    @property
+    def snapshot(self) -> RuleSnapshot:
 
-        """Add a rule to the engine."""
-        if rule.name in self.rules:
-            logger.warning(f"Rule '{rule.name}' already exists, overwriting")
 
-        self.rules[rule.name] = rule
-        logger.info(f"Added rule: {rule.name}")
+        """The current rule snapshot."""
+        return self._snapshot
 
-    def add_rules(self, rules: List[Rule]) -> None:
+    @property
+    def rules(self) -> Mapping[str, Rule]:
 
 
-        """Add multiple rules to the engine."""
-        for rule in rules:
-            self.add_rule(rule)
+        """Read-only view of the current rules by name."""
+        return self._snapshot.rules
+
+    @property
+    def modes(self) -> Mapping[str, FrozenSet[str]]:
+
+
+        """Read-only view of the registered modes' tags."""
+        return self._snapshot.modes
+
+    @property
+    def rules_version(self) -> int:
+
+
+        """Version of the current rule snapshot; bumped by every rule change."""
+        return self._snapshot.version
+
+    def add_rule(self, rule: Rule, tags: Optional[Iterable[str]] = None) -> None:
+
+
+        """
+        Add a rule to the engine.
+
+        Args:
+            rule: Rule to add
+            tags: Extra index tags for the rule, in addition to ``rule.tags``
+        """
+        with self._edit_rules() as draft:
+            self._stage_rule(draft, rule, tags)
+
+    def add_rules(self, rules: List[Rule], tags: Optional[Iterable[str]] = None) -> None:
+
+
+        """Add multiple rules to the engine as one rule change."""
+        with self._edit_rules() as draft:
+            for rule in rules:
+                self._stage_rule(draft, rule, tags)
 
     def remove_rule(self, rule_name: str) -> bool:
 
 
         """Remove a rule from the engine."""
-        if rule_name in self.rules:
-            del self.rules[rule_name]
-            logger.info(f"Removed rule: {rule_name}")
-            return True
-        return False
+        with self._edit_rules() as draft:
+            if rule_name not in draft.rules:
+                return False
+            draft.remove(rule_name)
+        logger.info(f"Removed rule: {rule_name}")
+        return True
+
+    def register_mode(self, mode: str, tags: Iterable[str]) -> None:
+
+
+        """Register an evaluation mode that selects rules carrying any of the given tags."""
+        with self._edit_rules() as draft:
+            draft.modes[mode] = frozenset(tags)
+            draft.changed = True
+        logger.info(f"Registered mode '{mode}' with tags: {sorted(self.modes[mode])}")
+
+    def replace_rules(self, rules: Iterable[Rule],
+                      tags: Optional[Mapping[str, Iterable[str]]] = None,
+                      modes: Optional[Mapping[str, Iterable[str]]] = None) -> RuleSnapshot:
+
+
+        """
+        Atomically replace the whole rule set, e.g. to hot-reload rule definitions.
+
+        Evaluations already running finish against the previous snapshot;
+        later ones see only the new rules. Cached results of removed or
+        redefined rules are invalidated.
+
+        Args:
+            rules: The complete new rule set
+            tags: Extra index tags per rule name
+            modes: Replacement modes; registered modes are kept if omitted
+
+        Returns:
+            The new snapshot
+        """
+        tags = tags or {}
+        with self._edit_rules(empty=True) as draft:
+            for rule in rules:
+                self._stage_rule(draft, rule, tags.get(rule.name), quiet=True)
+            if modes is not None:
+                draft.modes = {mode: frozenset(mode_tags) for mode, mode_tags in modes.items()}
+        snapshot = self._snapshot
+        logger.info(f"Replaced rule set: {len(snapshot.rules)} rules, version {snapshot.version}")
+        return snapshot
+
+    @contextmanager
+    def _edit_rules(self, empty: bool = False) -> Iterator[_RuleSetDraft]:
+
+
+        """
+        Edit a copy of the current snapshot and swap the result in if it changed.
+
+        The new snapshot's index is built before it is published, so an edit
+        leaving a rule with unknown dependencies or a dependency cycle raises
+        ValueError and the current rule set stays in place.
+        """
+        with self._snapshot_lock:
+            draft = _RuleSetDraft(self._snapshot, empty)
+            yield draft
+            if not draft.changed:
+                return
+            snapshot = draft.freeze(self.rule_compiler)
+            snapshot.validate()
+            self._snapshot = snapshot
+            stale = draft.stale_rules()
+
+        if self.result_cache:
+            for rule_name in stale:
+                self.result_cache.invalidate_sync(rule_name=rule_name)
+
+    def _stage_rule(self, draft: _RuleSetDraft, rule: Rule,
+                    tags: Optional[Iterable[str]], quiet: bool = False) -> None:
+
+
+        """Add a rule and its derived analysis to a draft."""
+        if rule.name in draft.rules:
+            logger.warning(f"Rule '{rule.name}' already exists, overwriting")
+
+        draft.rules[rule.name] = rule
+        draft.rule_tags[rule.name] = frozenset(rule.tags) | frozenset(tags or ())
+        fingerprint = self._fingerprint_rule(rule)
+        base = draft.base
+        if base.fingerprints.get(rule.name) == fingerprint and rule.name in base.dependencies:
+            # Unchanged definition, e.g. on reload; reuse its analysis
+            draft.dependencies[rule.name] = base.dependencies[rule.name]
+            draft.requirements[rule.name] = base.requirements[rule.name]
+        else:
+            draft.dependencies[rule.name] = analyse_rule(
+                rule, self.evaluator.condition_evaluator.functions, self.executor.custom_actions
+            )
+            draft.requirements[rule.name] = required_fields(
+                rule.conditions, self.evaluator.condition_evaluator.functions
+            )
+        draft.fingerprints[rule.name] = fingerprint
+        draft.changed = True
+        if not quiet:
+            logger.info(f"Added rule: {rule.name}")
+
+    def _get_index(self) -> RuleIndex:
+
+
+        """Get the current snapshot's rule index."""
+        return self._snapshot.index
 
     def get_rule(self, rule_name: str) -> Optional[Rule]:
 
@@ -98,71 +551,544 @@ class RuleEngine:
         """List all rule names."""
         return list(self.rules.keys())
 
-    async def evaluate_async(self, context: ExecutionContext) -> List[RuleResult]:
-        """Evaluate all applicable rules asynchronously."""
-        start_time = time.time()
+    async def evaluate_async(
+        self,
+        context: ExecutionContext,
+        mode: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> List[RuleResult]:
+        """
+        Evaluate all applicable rules asynchronously.
+
+        Args:
+            context: Execution context to evaluate
+            mode: Registered evaluation mode restricting the rules considered
+            tags: Only consider rules carrying at least one of these tags
+        """
+        # The whole evaluation uses the rule snapshot current at its start
+        return await self._evaluate_rules_async(context, mode, tags, self._snapshot)
+
+    async def evaluate_incremental_async(
+        self,
+        context: ExecutionContext,
+        mode: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> List[RuleResult]:
+        """
+        Evaluate applicable rules, re-evaluating only those affected by changes since the last call.
+
+        The last evaluation of each context ID is kept. A rule's previous
+        result is reused when no top-level data field its conditions and
+        actions read has changed, its prerequisites were reused too, and its
+        result was clean. Rules whose conditions were met only reuse their
+        result if deterministic, since their actions would otherwise run
+        again. Anything else, including a changed rule set, selection or
+        context type, falls back to evaluating the rule. Reused results are
+        marked with ``metadata['reused']``.
+
+        Args:
+            context: Execution context to evaluate
+            mode: Registered evaluation mode restricting the rules considered
+            tags: Only consider rules carrying at least one of these tags
+        """
+        snapshot = self._snapshot
+        selection = (mode, frozenset(tags) if tags is not None else None)
+        try:
+            field_hashes = {name: structural_hash(value) for name, value in context.data.items()}
+        except (TypeError, ValueError) as e:
+            # Data that cannot be hashed cannot be compared; evaluate in full
+            logger.debug(f"Incremental evaluation bypassed for context {context.context_id}: {e}")
+            return await self._evaluate_rules_async(context, mode, tags, snapshot)
+
+        with self._incremental_lock:
+            previous = self._incremental_states.get(context.context_id)
+        reusable = None
+        if (previous is not None and previous.rules_version == snapshot.version
+                and previous.context_type == context.context_type and previous.selection == selection):
+            changed = {
+                name for name in field_hashes.keys() | previous.field_hashes.keys()
+                if field_hashes.get(name) != previous.field_hashes.get(name)
+            }
+            reusable = {
+                name: result for name, result in previous.results.items()
+                if self._is_result_reusable(snapshot.rules.get(name), result, changed, snapshot)
+            }
+
+        results = await self._evaluate_rules_async(context, mode, tags, snapshot, reusable)
+
+        # Keep the original of each reused result, so markers never accumulate
+        state = _IncrementalState(
+            snapshot.version, context.context_type, selection, field_hashes,
+            {
+                result.rule_name: reusable[result.rule_name] if result.metadata.get('reused') else result
+                for result in results
+            }
+        )
+        with self._incremental_lock:
+            self._incremental_states[context.context_id] = state
+            self._incremental_states.move_to_end(context.context_id)
+            while len(self._incremental_states) > self.config.incremental_state_size:
+                self._incremental_states.popitem(last=False)
+        return results
 
-        # Find applicable rules
-        applicable_rules = self._find_applicable_rules(context)
+    def forget_incremental_state(self, context_id: Optional[str] = None) -> None:
+
+
+        """Drop the kept evaluation of one context, or of all contexts."""
+        with self._incremental_lock:
+            if context_id is None:
+                self._incremental_states.clear()
+            else:
+                self._incremental_states.pop(context_id, None)
+
+    async def _evaluate_rules_async(
+        self,
+        context: ExecutionContext,
+        mode: Optional[str],
+        tags: Optional[Iterable[str]],
+        snapshot: RuleSnapshot,
+        reusable: Optional[Dict[str, RuleResult]] = None
+    ) -> List[RuleResult]:
+        """Evaluate the applicable rules of a snapshot, settling those in reusable with their previous result."""
+        start_time = time.time()
+        applicable_rules = self._find_applicable_rules(context, mode, tags, snapshot)
 
         if not applicable_rules:
             logger.info("No applicable rules found")
             return []
 
-        # Execute rules concurrently
+        sampled = self.profiler is not None and self.profiler.should_sample()
+        memo = None
+        if snapshot.compiler is not None:
+            # Generated rules share sub-expression values within this evaluation only
+            memo = SubexpressionMemo()
+            self.evaluator.condition_evaluator.get_environment(context).memo = memo
+
+        # Execute rules concurrently; a timer per rule cancels it at its
+        # deadline, which is cheaper than wrapping each rule in wait_for.
+        # Rules missing a field their conditions require, or whose
+        # prerequisites did not pass, are settled without evaluating them.
+        loop = asyncio.get_running_loop()
+        index = snapshot.index
+        rule_results: List[Optional[RuleResult]] = [None] * len(applicable_rules)
+        outcomes: Dict[str, Any] = {}
+        pending = []
         tasks = []
-        for rule in applicable_rules:
-            task = self._execute_rule_async(rule, context)
-            tasks.append(task)
+        deadline_timers = []
+        # When each rule with a deadline started running, and when it expired
+        started: Dict[int, float] = {}
+        expired: Dict[int, float] = {}
+
+        def arm_deadline(task: asyncio.Task, i: int, rule: Rule) -> None:
+            timeout = self._get_rule_timeout(rule)
+            if timeout:
+                started[i] = time.time()
+                deadline_timers.append(loop.call_later(timeout, self._expire_rule, task, i, expired))
+
+        order = range(len(applicable_rules))
+        if index.prerequisites:
+            # Schedule prerequisites before the rules that wait on them
+            order = sorted(order, key=lambda i: index.schedule_position[applicable_rules[i].name])
+
+        # Tasks inherit the sampling decision when they are created
+        sampling = self.profiler.sample_evaluation() if sampled else nullcontext()
+        with sampling:
+            for i in order:
+                rule = applicable_rules[i]
+                if reusable and rule.name in reusable and all(
+                        isinstance(outcomes.get(name), RuleResult) and outcomes[name].metadata.get('reused')
+                        for name in index.prerequisites.get(rule.name, ())):
+                    previous = reusable[rule.name]
+                    rule_results[i] = outcomes[rule.name] = replace(
+                        previous, execution_time=0, metadata={**previous.metadata, 'reused': True}
+                    )
+                    continue
+
+                missing = self._find_missing_fields(rule, context, snapshot)
+                if missing:
+                    rule_results[i] = outcomes[rule.name] = self._skipped_result(rule, missing)
+                    continue
+
+                prerequisites = index.prerequisites.get(rule.name)
+                if prerequisites:
+                    waiting_on = [(name, outcomes.get(name)) for name in prerequisites]
+                    failed = [name for name, outcome in waiting_on
+                              if not isinstance(outcome, asyncio.Task) and not self._prerequisite_passed(outcome)]
+                    if failed:
+                        rule_results[i] = outcomes[rule.name] = self._pruned_result(rule, failed)
+                        continue
+                    task = loop.create_task(self._execute_dependent_rule_async(
+                        rule, context, snapshot, waiting_on,
+                        lambda task, i=i, rule=rule: arm_deadline(task, i, rule)
+                    ))
+                else:
+                    task = loop.create_task(self._execute_rule_async(rule, context, snapshot))
+                    arm_deadline(task, i, rule)
+                outcomes[rule.name] = task
+                pending.append(i)
+                tasks.append(task)
 
         # Wait for all rules to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Process results
-        rule_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
+        try:
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for timer in deadline_timers:
+                timer.cancel()
+
+        # Process results; a pruned subtree's results are already settled
+        for i, result in zip(pending, results):
+            if i in expired and isinstance(result, asyncio.CancelledError):
+                rule_results[i] = self._timeout_result(applicable_rules[i], expired[i] - started[i])
+            elif isinstance(result, BaseException):
                 logger.error(f"Rule execution failed: {applicable_rules[i].name}", exc_info=result)
-                rule_results.append(RuleResult(
+                rule_results[i] = RuleResult(
                     rule_name=applicable_rules[i].name,
                     success=False,
                     error=str(result),
                     execution_time=0
-                ))
+                )
             else:
-                rule_results.append(result)
+                rule_results[i] = result
 
         # Record metrics
         execution_time = time.time() - start_time
         if self.metrics:
             self.metrics.record_batch_execution(len(applicable_rules), execution_time)
+        subexpressions = None
+        if memo is not None:
+            subexpressions = memo.get_stats()
+            self._subexpressions_computed += subexpressions['computed']
+            self._subexpressions_reused += subexpressions['reused']
 
         # Record audit trail
         if self.config.enable_audit_trail:
-            self._record_audit_trail(context, rule_results, execution_time)
+            self._record_audit_trail(context, rule_results, execution_time, subexpressions)
 
         return rule_results
 
-    def evaluate(self, context: ExecutionContext) -> List[RuleResult]:
+    def evaluate(
+        self,
+        context: ExecutionContext,
+        mode: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> List[RuleResult]:
 
 
         """Evaluate all applicable rules synchronously."""
-        return asyncio.run(self.evaluate_async(context))
+        return self._run_sync(self.evaluate_async(context, mode, tags))
+
+    def _run_sync(self, coroutine: Awaitable[Any]) -> Any:
+
+
+        """Run a coroutine on a fresh event loop, closing the loop-bound HTTP client before it ends."""
+        async def run() -> Any:
+            try:
+                return await coroutine
+            finally:
+                await self.executor.aclose()
+
+        return asyncio.run(run())
+
+    async def evaluate_batch(
+        self,
+        contexts: Union[Iterable[ExecutionContext], AsyncIterable[ExecutionContext]],
+        mode: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        concurrency: Optional[int] = None,
+        evaluate: Optional[Callable[[ExecutionContext], Awaitable[List[Any]]]] = None
+    ) -> AsyncIterator[BatchItemResult]:
+        """
+        Evaluate many contexts with bounded concurrency, yielding each as it completes.
+
+        Contexts are pulled from the iterable or async iterator only as
+        evaluation slots free up, so arbitrarily large or unbounded sources
+        are streamed rather than materialised. A context whose evaluation
+        raises is yielded with the error instead of stopping the batch.
+        Leaving the loop early cancels evaluations still in flight and
+        waits for them to finish cancelling.
+
+        Args:
+            contexts: Contexts to evaluate
+            mode: Registered evaluation mode restricting the rules considered
+            tags: Only consider rules carrying at least one of these tags
+            concurrency: Contexts in flight at once; defaults to batch_concurrency
+            evaluate: Coroutine function evaluating one context, in place of
+                ``evaluate_async`` with the given mode and tags
+        """
+        limit = max(1, concurrency or self.config.batch_concurrency)
+        if evaluate is None:
+            evaluate = lambda context: self.evaluate_async(context, mode, tags)
+
+        loop = asyncio.get_running_loop()
+        source = _iterate_contexts(contexts)
+        in_flight: Dict[asyncio.Task, Tuple[int, ExecutionContext]] = {}
+        exhausted = False
+        submitted = failures = 0
+        start_time = time.time()
+
+        try:
+            while True:
+                while not exhausted and len(in_flight) < limit:
+                    try:
+                        context = await source.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    in_flight[loop.create_task(evaluate(context))] = (submitted, context)
+                    submitted += 1
+
+                if not in_flight:
+                    break
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index, context = in_flight.pop(task)
+                    error = task.exception()
+                    if error is not None:
+                        failures += 1
+                        logger.error(f"Batch evaluation failed for context {context.context_id}", exc_info=error)
+                        yield BatchItemResult(index, context, error=error)
+                    else:
+                        yield BatchItemResult(index, context, task.result())
+        finally:
+            for task in in_flight:
+                task.cancel()
+            # Let cancelled evaluations run their cleanup before the batch is closed
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            await source.aclose()
+            if self.metrics:
+                self.metrics.record_context_batch(
+                    submitted - len(in_flight), failures, time.time() - start_time
+                )
+
+    def evaluate_many(
+        self,
+        contexts: List[ExecutionContext],
+        mode: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> List[List[RuleResult]]:
+
+
+        """
+        Evaluate a batch of contexts synchronously, returning each context's results in order.
+
+        When the process pool is enabled and the batch has at least
+        ``process_pool_min_batch`` contexts, it is sharded across the
+        workers; otherwise contexts are evaluated in-process with
+        ``evaluate_batch``. The first evaluation error is re-raised.
+        """
+        if self.process_pool is not None and len(contexts) >= self.config.process_pool_min_batch:
+            start_time = time.time()
+            batch_results = self.process_pool.evaluate_batch(contexts, mode, tags)
+            execution_time = time.time() - start_time
+
+            if self.metrics:
+                self.metrics.record_batch_execution(
+                    sum(len(results) for results in batch_results), execution_time
+                )
+                self.metrics.record_context_batch(len(contexts), 0, execution_time)
+            if self.config.enable_audit_trail:
+                for context, results in zip(contexts, batch_results):
+                    self._record_audit_trail(context, results, sum(r.execution_time for r in results))
+            return batch_results
+
+        async def evaluate_all() -> List[List[RuleResult]]:
+            batch_results: List[Optional[List[RuleResult]]] = [None] * len(contexts)
+            batch = self.evaluate_batch(contexts, mode, tags)
+            try:
+                async for item in batch:
+                    if item.error is not None:
+                        raise item.error
+                    batch_results[item.index] = item.results
+            finally:
+                await batch.aclose()
+            return batch_results
+
+        return self._run_sync(evaluate_all())
+
+    def enable_process_pool(self, engine_factory: Callable[[], 'RuleEngine'],
+                            max_workers: Optional[int] = None,
+                            chunk_size: Optional[int] = None) -> None:
+
+
+        """
+        Shard large evaluate_many batches across worker processes.
+
+        Args:
+            engine_factory: Picklable callable, such as a module-level
+                function, that builds an engine with the same rules in
+                each worker
+            max_workers: Worker processes; defaults to process_pool_workers
+            chunk_size: Contexts per shard; sized from the batch if omitted
+        """
+        from .parallel import ProcessPoolRuleEvaluator
+
+        self.disable_process_pool()
+        self.process_pool = ProcessPoolRuleEvaluator(
+            engine_factory,
+            max_workers=max_workers or self.config.process_pool_workers,
+            chunk_size=chunk_size
+        )
+        logger.info(f"Process pool enabled with {self.process_pool.max_workers} workers")
+
+    def disable_process_pool(self) -> None:
+
+
+        """Stop the process pool, if any."""
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+            self.process_pool = None
+
+    def evaluate_frame(
+        self,
+        frame: 'pd.DataFrame',
+        context_type: ContextType = ContextType.GRANT_EVALUATION,
+        mode: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> 'pd.DataFrame':
+
+
+        """
+        Evaluate rule conditions over a DataFrame with one context's data per row.
 
-    def _find_applicable_rules(self, context: ExecutionContext) -> List[Rule]:
+        Supported conditions are evaluated in column operations, the rest
+        row by row; actions are not executed. Returns a boolean DataFrame
+        with one column per selected rule, in priority order, True where
+        all of the rule's conditions are met.
+        """
+        from .vectorized import VectorizedEvaluator
 
+        if self._vectorized is None:
+            self._vectorized = VectorizedEvaluator(self.evaluator.condition_evaluator)
+        snapshot = self._snapshot
+        rules = snapshot.index.select(context_type, self._resolve_tag_filter(mode, tags, snapshot))
+        return self._vectorized.evaluate_rules(rules, frame, context_type)
 
-        """Find rules that are applicable to the current context."""
-        applicable_rules = []
+    def compile_rules(self) -> int:
 
-        for rule in self.rules.values():
-            if self._is_rule_applicable(rule, context):
-                applicable_rules.append(rule)
 
-        # Sort by priority (higher priority first)
-        applicable_rules.sort(key=lambda r: r.priority.value, reverse=True)
+        """Build the rule index, generated rules and compiled condition expressions; returns how many compiled."""
+        snapshot = self._snapshot
+        index = snapshot.index
+        snapshot.programs
+        return sum(self.evaluator.precompile(rule.conditions) for rule in index.ordered_rules)
 
-        return applicable_rules
+    def build_bundle(self, metadata: Optional[Dict[str, Any]] = None) -> bytes:
+
+
+        """
+        Serialise the current rule set, its analysis and compiled expressions into a bundle.
+
+        Raises:
+            BundleError: If a rule relies on Python callables, which cannot be bundled
+        """
+        snapshot = self._snapshot
+        # Rule dependencies are validated before shipping them
+        snapshot.validate()
+        rules = list(snapshot.rules.values())
+        condition_evaluator = self.evaluator.condition_evaluator
+        compiled = {}
+        for rule in rules:
+            for condition in rule.conditions:
+                try:
+                    compiled[condition.expression] = condition_evaluator.compile_cache.get_or_compile(
+                        condition.expression, condition_evaluator._compile_expression
+                    )
+                except Exception:
+                    # Invalid expressions are left to be rejected when evaluated
+                    continue
+
+        entries = [
+            RuleEntry(rule, snapshot.rule_tags[rule.name], snapshot.fingerprints[rule.name],
+                      snapshot.dependencies[rule.name], snapshot.requirements[rule.name])
+            for rule in rules
+        ]
+        return dump_bundle(entries, snapshot.modes, compiled, self._analysis_key(), metadata)
+
+    def save_bundle(self, path: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+
+
+        """Write the current rule set to a bundle file; see ``build_bundle``."""
+        write_bundle(path, self.build_bundle(metadata))
+        logger.info(f"Wrote rule bundle with {len(self._snapshot.rules)} rules to {path}")
+
+    def load_bundle(self, bundle: Union[str, RuleBundle]) -> RuleSnapshot:
+
+
+        """
+        Replace the rule set with a bundle's, skipping rule analysis and expression compilation.
+
+        Args:
+            bundle: Path of a bundle file, or a bundle already read
+
+        Returns:
+            The new snapshot
+
+        Raises:
+            BundleError: If the bundle fails its integrity checks or was
+                analysed against different evaluator functions or custom actions
+        """
+        if not isinstance(bundle, RuleBundle):
+            bundle = read_bundle(bundle)
+        if bundle.analysis != self._analysis_key():
+            raise BundleError("Rule bundle was analysed against different functions or custom actions")
+
+        entries = bundle.entries()
+        self.evaluator.condition_evaluator.compile_cache.preload(bundle.compiled)
+        with self._edit_rules(empty=True) as draft:
+            for entry in entries:
+                name = entry.rule.name
+                draft.rules[name] = entry.rule
+                draft.rule_tags[name] = entry.tags
+                draft.fingerprints[name] = entry.fingerprint
+                draft.dependencies[name] = entry.dependencies
+                draft.requirements[name] = entry.requirements
+            draft.modes = bundle.modes
+        snapshot = self._snapshot
+        logger.info(f"Loaded rule bundle: {len(snapshot.rules)} rules, version {snapshot.version}")
+        return snapshot
+
+    def _analysis_key(self) -> str:
+
+
+        """Key of the functions and custom actions the rule analysis depends on."""
+        return analysis_key(self.evaluator.condition_evaluator.functions, self.executor.custom_actions)
+
+    def _find_applicable_rules(
+        self,
+        context: ExecutionContext,
+        mode: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        snapshot: Optional[RuleSnapshot] = None
+    ) -> List[Rule]:
+
+
+        """Find rules that are applicable to the current context, highest priority first."""
+        snapshot = snapshot or self._snapshot
+        tag_filter = self._resolve_tag_filter(mode, tags, snapshot)
+        candidates = snapshot.index.select(context.context_type, tag_filter)
+
+        # Context types are already matched by the index
+        return [
+            rule for rule in candidates
+            if rule.enabled and (not rule.applicability_check or rule.applicability_check(context))
+        ]
+
+    def _resolve_tag_filter(
+        self, mode: Optional[str], tags: Optional[Iterable[str]],
+        snapshot: Optional[RuleSnapshot] = None) -> Optional[FrozenSet[str]]:
+
+
+        """Combine a mode and explicit tags into a single tag filter."""
+        modes = (snapshot or self._snapshot).modes
+        mode_tags = modes.get(mode) if mode is not None else None
+        if tags is None:
+            return mode_tags
+
+        tag_filter = frozenset(tags)
+        if mode_tags is not None:
+            tag_filter = tag_filter & mode_tags
+        return tag_filter
 
     def _is_rule_applicable(self, rule: Rule, context: ExecutionContext) -> bool:
 
@@ -182,43 +1108,270 @@ class RuleEngine:
 
         return True
 
-    async def _execute_rule_async(self, rule: Rule, context: ExecutionContext) -> RuleResult:
-        """Execute a single rule asynchronously."""
-        start_time = time.time()
+    @staticmethod
+    def _fingerprint_rule(rule: Rule) -> str:
+
+
+        """Fingerprint a rule's definition so edited rules never reuse cached results."""
+        definition = rule.to_dict()
+        definition.pop('created_at', None)
+        definition.pop('updated_at', None)
+        definition_str = json.dumps(definition, sort_keys=True, default=str)
+        return hashlib.md5(definition_str.encode()).hexdigest()
+
+    def _cache_context_data(self, rule: Rule, context: ExecutionContext,
+                            snapshot: RuleSnapshot) -> Dict[str, Any]:
+
+
+        """Build the data identifying a deterministic rule evaluation in the result cache."""
+        data = context.data
+        dependencies = snapshot.dependencies.get(rule.name)
+        fields = dependencies.top_level_fields if dependencies else None
+        if fields is not None:
+            # Only the fields the rule reads can change its result
+            data = {name: data[name] for name in fields if name in data}
+        return {
+            'rule': snapshot.fingerprints.get(rule.name, ''),
+            'context_type': context.context_type.value,
+            'data': data
+        }
+
+    def _find_missing_fields(self, rule: Rule, context: ExecutionContext,
+                             snapshot: RuleSnapshot) -> List[Tuple[Any, ...]]:
+
+
+        """Get the data paths a rule's conditions require that the context lacks."""
+        if not self.config.skip_missing_fields:
+            return []
+        required = snapshot.requirements.get(rule.name)
+        if not required:
+            return []
+        return missing_fields(required, context.data)
+
+    @staticmethod
+    def _skipped_result(rule: Rule, missing: List[Tuple[Any, ...]]) -> RuleResult:
+
+
+        """Build the result for a rule whose conditions cannot pass without missing fields."""
+        return RuleResult(
+            rule_name=rule.name,
+            success=True,
+            conditions_met=False,
+            execution_time=0,
+            metadata={
+                "priority": rule.priority,
+                "skipped": "missing_fields",
+                "missing_fields": sorted('.'.join(str(key) for key in path) for path in missing)
+            }
+        )
+
+    @staticmethod
+    def _prerequisite_passed(outcome: Any) -> bool:
+
+
+        """Check whether a prerequisite's outcome lets dependent rules run."""
+        if isinstance(outcome, asyncio.Task):
+            if outcome.cancelled() or outcome.exception() is not None:
+                return False
+            outcome = outcome.result()
+        return isinstance(outcome, RuleResult) and outcome.success and outcome.conditions_met
+
+    @staticmethod
+    def _is_result_reusable(rule: Optional[Rule], result: RuleResult, changed: Set[str],
+                            snapshot: RuleSnapshot) -> bool:
+
+
+        """Check whether a rule's previous result still holds after the given data fields changed."""
+        if rule is None:
+            return False
+        dependencies = snapshot.dependencies.get(rule.name)
+        fields = dependencies.top_level_fields if dependencies else None
+        if fields is None or not fields.isdisjoint(changed):
+            return False
+        if result.conditions_met and not rule.deterministic:
+            # Its actions may have side effects a full evaluation would repeat
+            return False
+        return result.success and all(ar.success for ar in (result.action_results or []))
+
+    @staticmethod
+    def _pruned_result(rule: Rule, failed: List[str]) -> RuleResult:
+
+
+        """Build the result for a rule whose prerequisites did not pass."""
+        return RuleResult(
+            rule_name=rule.name,
+            success=True,
+            conditions_met=False,
+            execution_time=0,
+            metadata={
+                "priority": rule.priority,
+                "skipped": "prerequisite_failed",
+                "failed_prerequisites": failed
+            }
+        )
+
+    async def _execute_dependent_rule_async(
+        self,
+        rule: Rule,
+        context: ExecutionContext,
+        snapshot: RuleSnapshot,
+        prerequisites: List[Tuple[str, Any]],
+        arm_deadline: Callable[[asyncio.Task], None]
+    ) -> RuleResult:
+        """Wait for a rule's prerequisites, then execute it if they all passed."""
+        running = [outcome for _, outcome in prerequisites if isinstance(outcome, asyncio.Task)]
+        if running:
+            # wait() leaves the prerequisites running if this rule is cancelled
+            await asyncio.wait(running)
+
+        failed = [name for name, outcome in prerequisites if not self._prerequisite_passed(outcome)]
+        if failed:
+            return self._pruned_result(rule, failed)
+
+        # The rule's deadline starts once its prerequisites have finished
+        arm_deadline(asyncio.current_task())
+        return await self._execute_rule_async(rule, context, snapshot)
+
+    @staticmethod
+    def _expire_rule(task: asyncio.Task, index: int, expired: Dict[int, float]) -> None:
+
+
+        """Cancel a rule task that has reached its deadline, recording when it expired."""
+        if not task.done():
+            expired[index] = time.time()
+            task.cancel()
+
+    def _get_rule_timeout(self, rule: Rule) -> Optional[float]:
+
+
+        """Get a rule's deadline in seconds, or None if it has none."""
+        return rule.timeout_seconds or self.config.timeout_seconds or None
+
+    def _timeout_result(self, rule: Rule, execution_time: float) -> RuleResult:
+
 
+        """Build the failed result for a rule cancelled at its deadline."""
+        timeout = self._get_rule_timeout(rule)
+        logger.warning(f"Rule {rule.name} timed out after {timeout}s")
+
+        if self.metrics:
+            self.metrics.record_rule_execution(rule.name, execution_time, False, timed_out=True)
+
+        return RuleResult(
+            rule_name=rule.name,
+            success=False,
+            error=f"Rule timed out after {timeout}s",
+            execution_time=execution_time,
+            metadata={
+                "priority": rule.priority,
+                "timed_out": True,
+                "timeout_reason": "rule_deadline",
+                "timeout_seconds": timeout
+            }
+        )
+
+    async def _execute_rule_async(self, rule: Rule, context: ExecutionContext,
+                                  snapshot: RuleSnapshot) -> RuleResult:
+        """Execute a single rule, reusing cached results for deterministic rules."""
+        if self.result_cache is None or not rule.deterministic:
+            return await self._run_rule_async(rule, context, snapshot)
+
+        start_time = time.time()
+        cache_data = self._cache_context_data(rule, context, snapshot)
         try:
-            # Evaluate conditions
-            conditions_met = await self.evaluator.evaluate_conditions_async(
-                rule.conditions, context
+            cached = await self.result_cache.get(rule.name, cache_data)
+        except (TypeError, ValueError) as e:
+            # Context data the cache cannot key on; evaluate without caching
+            logger.debug(f"Result cache bypassed for rule {rule.name}: {e}")
+            return await self._run_rule_async(rule, context, snapshot)
+
+        if cached is not None:
+            execution_time = time.time() - start_time
+            if self.metrics:
+                self.metrics.record_rule_execution(rule.name, execution_time, True)
+            return replace(
+                cached,
+                execution_time=execution_time,
+                metadata={**cached.metadata, 'cached': True}
             )
 
-            if not conditions_met:
+        result = await self._run_rule_async(rule, context, snapshot)
+
+        # Only cache clean results; failures should be retried on the next evaluation
+        if result.success and all(ar.success for ar in (result.action_results or [])):
+            await self.result_cache.set(
+                rule.name, cache_data, result, tags=snapshot.rule_tags.get(rule.name)
+            )
+
+        return result
+
+    async def _run_rule_async(self, rule: Rule, context: ExecutionContext,
+                              snapshot: RuleSnapshot) -> RuleResult:
+        """Evaluate a rule's conditions and execute its actions."""
+        start_time = time.time()
+        profiler = sampling_profiler() if self.profiler is not None else None
+
+        try:
+            # Evaluate conditions, through the rule's generated function if it has one
+            program = snapshot.programs.get(rule.name)
+            if program is not None and profiler is not None:
+                with profiler.measure(rule.name, 'condition', 'generated'):
+                    conditions_met = program(self.evaluator.condition_evaluator.get_environment(context))
+            elif program is not None:
+                conditions_met = program(self.evaluator.condition_evaluator.get_environment(context))
+            elif profiler is not None:
+                conditions_met = await self.evaluator.evaluate_conditions_profiled_async(
+                    rule.conditions, context, profiler, rule.name
+                )
+            else:
+                conditions_met = await self.evaluator.evaluate_conditions_async(
+                    rule.conditions, context
+                )
+
+            if not conditions_met or not self.config.execute_actions:
                 return RuleResult(
                     rule_name=rule.name,
                     success=True,
-                    conditions_met=False,
+                    conditions_met=conditions_met,
                     execution_time=time.time() - start_time,
                     metadata={"priority": rule.priority}
                 )
 
-            # Execute actions
-            action_results = await self.executor.execute_actions_async(
-                rule.actions, context
-            )
+            # Execute actions, attributing their timings to the rule if sampled
+            with profiler.sample_rule(rule.name) if profiler is not None else nullcontext():
+                action_results = await self.executor.execute_actions_async(
+                    rule.actions, context
+                )
 
             execution_time = time.time() - start_time
 
+            # A timed-out action fails the rule; other action failures are
+            # reported through the action results as before
+            timed_out = [ar.action_name for ar in action_results if ar.metadata.get('timed_out')]
+            metadata = {"priority": rule.priority}
+            error = None
+            if timed_out:
+                error = f"Action timed out: {', '.join(timed_out)}"
+                metadata.update({
+                    "timed_out": True,
+                    "timeout_reason": "action_deadline",
+                    "timed_out_actions": timed_out
+                })
+
             # Record metrics
             if self.metrics:
-                self.metrics.record_rule_execution(rule.name, execution_time, True)
+                self.metrics.record_rule_execution(
+                    rule.name, execution_time, not timed_out, action_timeouts=len(timed_out)
+                )
 
             return RuleResult(
                 rule_name=rule.name,
-                success=True,
+                success=not timed_out,
                 conditions_met=True,
                 action_results=action_results,
+                error=error,
                 execution_time=execution_time,
-                metadata={"priority": rule.priority}
+                metadata=metadata
             )
 
         except Exception as e:
@@ -237,31 +1390,44 @@ class RuleEngine:
                 metadata={"priority": rule.priority}
             )
 
-    def _record_audit_trail(self, context: ExecutionContext, results: List[RuleResult], total_time: float) -> None:
+    def get_profile_report(self, limit: Optional[int] = 10,
+                           sort_by: str = 'wall_time') -> Optional[Dict[str, Any]]:
+
 
+        """Hot conditions and actions found by the sampling profiler, if enabled."""
+        if self.profiler is None:
+            return None
+        return self.profiler.get_report(limit, sort_by)
 
-        """Record execution details for audit trail."""
-        audit_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'context_type': context.context_type,
-            'context_id': context.context_id,
-            'total_rules': len(results),
-            'successful_rules': len([r for r in results if r.success]),
-            'total_execution_time': total_time,
-            'results': [r.to_dict() for r in results]
+    def get_subexpression_stats(self) -> Dict[str, Any]:
+
+
+        """Shared sub-expressions computed and reused across evaluations of generated rules."""
+        computed, reused = self._subexpressions_computed, self._subexpressions_reused
+        lookups = computed + reused
+        return {
+            'computed': computed,
+            'reused': reused,
+            'hit_rate': reused / lookups if lookups else 0.0
         }
 
-        self.execution_history.append(audit_entry)
+    def _record_audit_trail(self, context: ExecutionContext, results: List[RuleResult], total_time: float,
+                            subexpressions: Optional[Dict[str, int]] = None) -> None:
+
 
-        # Keep only last 1000 entries to prevent memory issues
-        if len(self.execution_history) > 1000:
-            self.execution_history = self.execution_history[-1000:]
+        """Record execution details for audit trail; results are serialised lazily."""
+        record = AuditRecord(
+            datetime.now(), context.context_type, context.context_id, results, total_time, subexpressions
+        )
+        self.execution_history.append(record)
+        if self.audit_writer is not None:
+            self.audit_writer.submit(record)
 
     def get_execution_history(self, limit: int = 100) -> List[Dict]:
 
 
         """Get recent execution history."""
-        return self.execution_history[-limit:]
+        return self.execution_history.tail(limit)
 
     def get_metrics(self) -> Optional[Dict]:
 
@@ -283,5 +1449,27 @@ class RuleEngine:
 
 
         """Shutdown the rule engine and cleanup resources."""
-        self.thread_pool.shutdown(wait=True)
+        self.disable_process_pool()
+        self.executor.close()
+        if self.audit_writer is not None:
+            self.audit_writer.close()
         logger.info("Rule engine shutdown complete")
+
+    async def shutdown_async(self) -> None:
+
+
+        """Shutdown the rule engine from a coroutine, awaiting the HTTP client's close."""
+        await self.executor.aclose()
+        self.shutdown()
+
+
+async def _iterate_contexts(
+        contexts: Union[Iterable[ExecutionContext], AsyncIterable[ExecutionContext]]
+) -> AsyncIterator[ExecutionContext]:
+    """Iterate a sync or async source of contexts asynchronously."""
+    if hasattr(contexts, '__aiter__'):
+        async for context in contexts:
+            yield context
+    else:
+        for context in contexts:
+            yield context
@@ -5,16 +5,23 @@ Handles evaluation of rule conditions with support for complex expressions
 and custom evaluators.
 """
 
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Iterator, TYPE_CHECKING
+from collections.abc import Mapping, Sequence
 import logging
 import re
 import ast
 import operator
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 import asyncio
 
 from ..types import Condition, ExecutionContext
 
+if TYPE_CHECKING:
+    from .profiler import RuleProfiler
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,77 +59,499 @@ class SafeValue:
     __lt__ = __le__ = __gt__ = __ge__ = __ne__ = __eq__ = _cmp
 
 
-class AttrDict(dict):
-    """Dictionary that supports attribute-style access and recursive wrapping."""
-    def __init__(self, *args, **kwargs):
+class LazyAttrDict(Mapping):
+    """
+    Read-only attribute view over a dict that wraps nested values on access.
 
+    The underlying dict is never copied: nested dicts and lists are wrapped
+    only when an expression reaches them, and the wrapper is reused for as
+    long as the underlying value is unchanged.
 
-        super().__init__(*args, **kwargs)
-        for key, value in list(self.items()):
-            self[key] = self._wrap(value)
+    The views are not dict or list subclasses. Expressions still see them as
+    such through the evaluator's ``isinstance``, but there are no mutating
+    methods: conditions cannot change the context data they read.
+    """
+    __slots__ = ('_data', '_wrapped')
 
-    def __getattr__(self, item):
+    def __init__(self, data: Dict[str, Any]):
+
+
+        self._data = data
+        self._wrapped: Dict[Any, tuple] = {}
+
+    def __getitem__(self, key):
 
 
         try:
-            if item == 'length':
-                return len(self)
-            if item == 'count':
-                return len(self)
-            return self[item]
-        except KeyError:
+            value = self._data[key]
+        except (KeyError, TypeError):
             return SafeValue()
+        return _wrap_lazy(self._wrapped, key, value)
 
-    def __getitem__(self, key):
+    def __getattr__(self, item):
 
 
-        if key in self.keys():
-            return super().__getitem__(key)
-        return SafeValue()
+        if item == 'length' or item == 'count':
+            return len(self._data)
+        return self[item]
 
-    def __setattr__(self, key, value):
+    def __contains__(self, key) -> bool:
 
 
-        if key in {'_AttrDict__wrapped'}:
-            return super().__setattr__(key, value)
-        self[key] = self._wrap(value)
+        return key in self._data
 
-    @staticmethod
-    def _wrap(value: Any) -> Any:
+    def __iter__(self) -> Iterator:
 
 
-        if isinstance(value, dict):
-            return AttrDict(value)
-        if isinstance(value, list):
-            return AttrList(value)
-        return value
+        return iter(self._data)
+
+    def __len__(self) -> int:
+
+
+        return len(self._data)
+
+    def __eq__(self, other) -> bool:
+
+
+        if isinstance(other, LazyAttrDict):
+            other = other._data
+        if isinstance(other, Mapping):
+            return self._data == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+
+
+        return repr(self._data)
+
+    def get(self, key, default=None):
+
+
+        if key in self._data:
+            return self[key]
+        return default
+
+
+class LazyAttrList(Sequence):
+    """Read-only attribute view over a list that wraps nested values on access."""
+    __slots__ = ('_data', '_wrapped')
 
+    def __init__(self, data: List[Any]):
 
-class AttrList(list):
-    """List that provides attribute-style helpers and recursive wrapping."""
-    def __init__(self, iterable=()):
 
+        self._data = data
+        self._wrapped: Dict[Any, tuple] = {}
 
-        super().__init__(AttrDict._wrap(v) for v in iterable)
+    def __getitem__(self, index):
+
+
+        if isinstance(index, slice):
+            return LazyAttrList(self._data[index])
+        return _wrap_lazy(self._wrapped, index, self._data[index])
+
+    def __len__(self) -> int:
+
+
+        return len(self._data)
+
+    def __iter__(self) -> Iterator:
+
+
+        for index in range(len(self._data)):
+            yield self[index]
+
+    def __contains__(self, value) -> bool:
+
+
+        if isinstance(value, (LazyAttrDict, LazyAttrList)):
+            value = value._data
+        return value in self._data
+
+    def __eq__(self, other) -> bool:
+
+
+        if isinstance(other, LazyAttrList):
+            other = other._data
+        if isinstance(other, (list, tuple)):
+            return self._data == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+
+
+        return repr(self._data)
 
     @property
     def length(self) -> int:
 
 
-        return len(self)
+        return len(self._data)
 
     @property
     def count(self) -> int:
 
 
-        return len(self)
+        return len(self._data)
+
+
+def _lazy_isinstance(value: Any, classinfo: Any) -> bool:
+
+
+    """``isinstance`` for expressions, treating lazy views as the dict or list they wrap."""
+    if isinstance(value, (LazyAttrDict, LazyAttrList)) and isinstance(value._data, classinfo):
+        return True
+    return isinstance(value, classinfo)
+
+
+def _wrap_lazy(cache: Dict[Any, tuple], key: Any, value: Any) -> Any:
+
+
+    """Wrap a nested value for attribute access, reusing the wrapper while the value is unchanged."""
+    if isinstance(value, dict):
+        wrapper_type = LazyAttrDict
+    elif isinstance(value, list):
+        wrapper_type = LazyAttrList
+    else:
+        return value
+
+    cached = cache.get(key)
+    if cached is not None and cached[0] is value:
+        return cached[1]
+
+    wrapped = wrapper_type(value)
+    cache[key] = (value, wrapped)
+    return wrapped
+
+
+class SubexpressionMemo(dict):
+    """
+    Values of sub-expressions shared between generated rules, for one evaluation of a context.
+
+    Keyed by the sub-expression's slot; generated code stores each value
+    with ``setdefault`` and reads it back with ``recall``, which counts
+    the reuse. Clearing keeps the counts.
+    """
+    __slots__ = ('forgotten', 'hits')
+
+    def __init__(self):
+
+
+        super().__init__()
+        self.forgotten = 0
+        self.hits = 0
+
+    def recall(self, slot: int) -> Any:
+
+
+        """Get a memoised value, counting the reuse."""
+        self.hits += 1
+        return self[slot]
+
+    def clear(self) -> None:
+
+
+        self.forgotten += len(self)
+        super().clear()
+
+    def get_stats(self) -> Dict[str, int]:
+
+
+        """Sub-expressions computed and reused."""
+        return {'computed': len(self) + self.forgotten, 'reused': self.hits}
+
+
+def forget_memoised_values(context: ExecutionContext) -> None:
+
+
+    """Drop sub-expression values memoised for a context, e.g. after its data changed in place."""
+    environment = context.__dict__.get('_condition_environment')
+    if environment is not None:
+        environment.memo.clear()
+
+
+class ConditionEnvironment(Mapping):
+    """
+    Lazily resolved variables for evaluating conditions against one context.
+
+    Built once per context and shared by every condition evaluated against
+    it. Names are resolved on lookup in the same precedence as the original
+    eagerly built variables dict: built-in functions, then domain aliases and
+    context attributes, then top-level data fields.
+    """
+
+    # Aliases exposing a sub-dictionary of the context data
+    DATA_ALIASES = {
+        'agent': 'agent_data',
+        'operation': 'operation_data',
+        'communication': 'communication_data',
+        'stakeholder': 'stakeholder_data'
+    }
+
+    def __init__(self, context: ExecutionContext, functions: Dict[str, Any]):
+
+
+        self.context = context
+        self.functions = functions
+        self.raw_data = context.data if context.data is not None else {}
+        self.data = LazyAttrDict(self.raw_data)
+        self._wrapped: Dict[Any, tuple] = {}
+        self._empty = LazyAttrDict({})
+        self.memo = SubexpressionMemo()
+
+    def __getitem__(self, name: str) -> Any:
+
+
+        function = self.functions.get(name)
+        if function is not None:
+            return function
+
+        resolver = self._RESOLVERS.get(name)
+        if resolver is not None:
+            return resolver(self)
+
+        if name in self.raw_data:
+            return self.data[name]
+
+        raise KeyError(name)
+
+    def __contains__(self, name) -> bool:
+
+
+        return name in self.functions or name in self._RESOLVERS or name in self.raw_data
+
+    def __iter__(self) -> Iterator:
+
+
+        seen = set()
+        for names in (self.functions, self._RESOLVERS, self.raw_data):
+            for name in names:
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+    def __len__(self) -> int:
+
+
+        return sum(1 for _ in self)
+
+    def with_parameters(self, parameters: Dict[str, Any]) -> Mapping:
+
+
+        """Layer condition parameters over this environment."""
+        if not parameters:
+            return self
+        return _ParameterScope(self, parameters)
+
+    def is_current(self, context: ExecutionContext) -> bool:
+
+
+        """Check whether this environment still reflects the context's data."""
+        return self.context is context and self.raw_data is context.data
+
+    # Resolvers for context attributes and domain aliases
+
+    def _grant(self) -> Any:
+
+
+        data = self.raw_data
+        if 'grant_id' in data or 'impact_metrics' in data:
+            return self.data
+        return self._empty
+
+    def _report(self) -> Any:
+
+
+        data = self.raw_data
+        if ('type' in data and data['type'] == 'impact') or ('outputs' in data and 'outcomes' in data):
+            return self.data
+        return self._empty
+
+    def _project(self) -> Any:
+
+
+        return LazyAttrDict({'id': self.raw_data.get('project_id', '')})
+
+    def _user(self) -> Any:
+
+
+        return LazyAttrDict({'request_type': self.raw_data.get('request_type', '')})
+
+    def _sub_data(self, key: str) -> Any:
+
+
+        return _wrap_lazy(self._wrapped, key, self.raw_data.get(key, {}))
+
+    def _day_of_week(self) -> Optional[str]:
+
+
+        timestamp = self.context.timestamp
+        return timestamp.strftime('%A') if isinstance(timestamp, datetime) else None
+
+    _RESOLVERS = {
+        'context': lambda env: env.context,
+        'data': lambda env: env.data,
+        'user_id': lambda env: env.context.user_id,
+        'session_id': lambda env: env.context.session_id,
+        'timestamp': lambda env: env.context.timestamp,
+        'metadata': lambda env: env.context.metadata,
+        'day_of_week': _day_of_week,
+        'context_type': lambda env: env.context.context_type.value,
+        'grant': _grant,
+        'report': _report,
+        'project': _project,
+        'user': _user,
+        **{
+            alias: (lambda key: lambda env: env._sub_data(key))(key)
+            for alias, key in DATA_ALIASES.items()
+        }
+    }
+
+
+class _ParameterScope(Mapping):
+    """Condition parameters layered over a shared environment."""
+    __slots__ = ('environment', 'parameters')
+
+    def __init__(self, environment: ConditionEnvironment, parameters: Dict[str, Any]):
+
+
+        self.environment = environment
+        self.parameters = parameters
+
+    def __getitem__(self, name: str) -> Any:
+
+
+        # Built-in functions take precedence over parameters
+        if name not in self.environment.functions and name in self.parameters:
+            return self.parameters[name]
+        return self.environment[name]
+
+    def __iter__(self) -> Iterator:
+
+
+        yield from self.parameters
+        for name in self.environment:
+            if name not in self.parameters:
+                yield name
+
+    def __len__(self) -> int:
+
+
+        return sum(1 for _ in self)
+
+
+class CompiledExpressionCache:
+    """
+    Bounded LRU cache of validated, compiled condition expressions.
+
+    Entries are keyed by expression text. Expressions that fail to parse or
+    validate are cached as well, so a bad condition is rejected once rather
+    than on every evaluation. Only the error type and arguments are kept, and
+    a fresh exception is raised per lookup; re-raising one cached instance
+    would grow its traceback (and pin each caller's frames) without bound.
+    """
+
+    def __init__(self, max_size: int = 2048):
+
+
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compile(self, expression: str, compiler: Callable[[str], Any]) -> Any:
+
+
+        """Return the compiled code for an expression, compiling it on a miss."""
+        with self._lock:
+            entry = self._entries.get(expression)
+            if entry is not None:
+                self._entries.move_to_end(expression)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entry is None:
+            try:
+                entry = (compiler(expression), None)
+            except Exception as e:
+                entry = (None, (type(e), e.args))
+
+            with self._lock:
+                self._entries[expression] = entry
+                self._entries.move_to_end(expression)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        code, error = entry
+        if error is not None:
+            error_type, error_args = error
+            raise error_type(*error_args)
+        return code
+
+    def preload(self, compiled: Mapping[str, Any]) -> int:
+
+
+        """Seed the cache with already compiled expressions, e.g. from a rule bundle; returns the number added."""
+        added = 0
+        with self._lock:
+            for expression, code in compiled.items():
+                if expression in self._entries or len(self._entries) >= self.max_size:
+                    continue
+                self._entries[expression] = (code, None)
+                added += 1
+        return added
+
+    def clear(self) -> None:
+
+
+        """Drop all compiled expressions."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+
+
+        """Get cache statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+# Process-wide compiled expression cache shared by all evaluators
+_compiled_expression_cache: Optional[CompiledExpressionCache] = None
+
+
+def get_compiled_expression_cache() -> CompiledExpressionCache:
+
+
+    """Get the global compiled expression cache."""
+    global _compiled_expression_cache
+    if _compiled_expression_cache is None:
+        _compiled_expression_cache = CompiledExpressionCache()
+    return _compiled_expression_cache
 
 
 class ConditionEvaluator:
     """Evaluates individual conditions."""
 
-    def __init__(self):
+    def __init__(self, compile_cache: Optional[CompiledExpressionCache] = None):
+
 
+        self.compile_cache = compile_cache or get_compiled_expression_cache()
 
         # Built-in operators
         self.operators = {
@@ -156,7 +585,7 @@ class ConditionEvaluator:
             'sum': sum,
             'abs': abs,
             'round': round,
-            'isinstance': isinstance,
+            'isinstance': _lazy_isinstance,
             'hasattr': hasattr,
             'getattr': getattr,
             'datetime': datetime,
@@ -186,115 +615,39 @@ class ConditionEvaluator:
         if asyncio.iscoroutinefunction(condition.custom_evaluator):
             return await condition.custom_evaluator(context)
 
-        # For synchronous evaluators, run in thread pool
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, self.evaluate, condition, context
-        )
-
-    def _wrap_data(self, data: Any) -> Any:
-
-
-        """Recursively wrap dicts/lists for attribute-style access."""
-        if isinstance(data, dict):
-            return AttrDict(data)
-        if isinstance(data, list):
-            return AttrList(data)
-        return data
-
-    def _build_variables(self, context: ExecutionContext, parameters: Dict[str, Any]) -> Dict[str, Any]:
-
-
-        """Build variables dictionary for expression evaluation."""
-        wrapped_data = self._wrap_data(context.data or {})
-
-        # Domain-friendly aliases inferred from data
-        grant_alias = None
-        report_alias = None
-        if isinstance(wrapped_data, AttrDict):
-            # If it looks like a grant application
-            if 'grant_id' in wrapped_data or 'impact_metrics' in wrapped_data:
-                grant_alias = wrapped_data
-            # If it looks like an impact report
-            if 'type' in wrapped_data and getattr(wrapped_data, 'type', None) == 'impact':
-                report_alias = wrapped_data
-            if 'outputs' in wrapped_data and 'outcomes' in wrapped_data:
-                report_alias = wrapped_data
-
-        project_alias = AttrDict(
-            {'id': context.data.get('project_id', '')}
-        )
-        agent_alias = self._wrap_data(
-            context.data.get('agent_data', {})
-        )
-        user_alias = AttrDict(
-            {'request_type': context.data.get('request_type', '')}
-        )
-        operation_alias = self._wrap_data(
-            context.data.get('operation_data', {})
-        )
-        communication_alias = self._wrap_data(
-            context.data.get('communication_data', {})
-        )
-        stakeholder_alias = self._wrap_data(
-            context.data.get('stakeholder_data', {})
-        )
-            
-
-        variables = {
-            # Context data
-            'context': context,
-            'data': wrapped_data,
-            'user_id': context.user_id,
-            'session_id': context.session_id,
-            'timestamp': context.timestamp,
-            'metadata': context.metadata,
-            'day_of_week': context.timestamp.strftime('%A') if isinstance(context.timestamp, datetime) else None,
-
-            # Context type
-            'context_type': context.context_type.value,
-
-            # Domain aliases
-            'grant': grant_alias or AttrDict({}),
-            'report': report_alias or AttrDict({}),
-            'project': project_alias,
-            'agent': agent_alias,
-            'user': user_alias,
-            'operation': operation_alias,
-            'communication': communication_alias,
-            'stakeholder': stakeholder_alias,
-
-            # Parameters
-            **parameters,
-
-            # Built-in functions
-            **self.functions,
-
-            # Built-in operators
-            **self.operators
-        }
+        # Only expensive synchronous conditions are worth a thread hop;
+        # compiled expressions are cheap enough to evaluate inline
+        if condition.expensive:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, self.evaluate, condition, context
+            )
 
-        # Add data fields as top-level variables for convenience
-        if isinstance(wrapped_data, (AttrDict, dict)):
-            for key, value in (wrapped_data.items() if isinstance(wrapped_data, AttrDict) else wrapped_data.items()):
-                if key not in variables:  # Don't override built-ins
-                    variables[key] = value
+        return self.evaluate(condition, context)
 
-        return variables
+    def get_environment(self, context: ExecutionContext) -> ConditionEnvironment:
 
-    def _evaluate_expression(self, expression: str, variables: Dict[str, Any]) -> bool:
 
+        """Get the lazily resolved environment for a context, building it once per context."""
+        environment = context.__dict__.get('_condition_environment')
+        if environment is None or not environment.is_current(context) \
+                or environment.functions is not self.functions:
+            environment = ConditionEnvironment(context, self.functions)
+            context.__dict__['_condition_environment'] = environment
+        return environment
+
+    def _build_variables(self, context: ExecutionContext, parameters: Dict[str, Any]) -> Mapping:
 
-        """Evaluate a Python expression safely."""
-        try:
-            # Parse the expression
-            tree = ast.parse(expression, mode='eval')
 
-            # Validate the expression (only allow safe operations)
-            self._validate_ast(tree)
+        """Build the variables mapping for expression evaluation."""
+        return self.get_environment(context).with_parameters(parameters)
 
-            # Compile and evaluate
-            code = compile(tree, '<string>', 'eval')
+    def _evaluate_expression(self, expression: str, variables: Mapping) -> bool:
+
+
+        """Evaluate a Python expression safely."""
+        try:
+            code = self.compile_cache.get_or_compile(expression, self._compile_expression)
             result = eval(code, {"__builtins__": {}}, variables)
 
             return bool(result)
@@ -303,6 +656,17 @@ class ConditionEvaluator:
             logger.error(f"Error evaluating expression '{expression}': {e}")
             return False
 
+    def _compile_expression(self, expression: str) -> Any:
+
+
+        """Parse, validate and compile an expression."""
+        tree = ast.parse(expression, mode='eval')
+
+        # Validate the expression (only allow safe operations)
+        self._validate_ast(tree)
+
+        return compile(tree, '<string>', 'eval')
+
     def _validate_ast(self, tree: ast.Expression) -> None:
 
 
@@ -352,7 +716,7 @@ class ConditionEvaluator:
             'lower', 'upper', 'strip', 'split', 'join', 'replace',
             'startswith', 'endswith', 'find', 'count', 'isdigit',
             'isalpha', 'isalnum', 'isspace', 'format', 'keys',
-            'values', 'items', 'get', 'append', 'extend', 'pop',
+            'values', 'items', 'get',
             'len', 'str', 'int', 'float', 'bool', 'length'
         }
 
@@ -365,10 +729,10 @@ class ConditionEvaluator:
 class RuleEvaluator:
     """Evaluates multiple conditions for a rule."""
 
-    def __init__(self):
+    def __init__(self, compile_cache: Optional[CompiledExpressionCache] = None):
 
 
-        self.condition_evaluator = ConditionEvaluator()
+        self.condition_evaluator = ConditionEvaluator(compile_cache)
 
     def evaluate_conditions(self, conditions: List[Condition], context: ExecutionContext) -> bool:
 
@@ -388,12 +752,53 @@ class RuleEvaluator:
         if not conditions:
             return True
 
+        condition_evaluator = self.condition_evaluator
         for condition in conditions:
-            if not await self.condition_evaluator.evaluate_async(condition, context):
+            # Fast path: cheap synchronous conditions are evaluated inline
+            # without scheduling a coroutine, short-circuiting on failure
+            custom_evaluator = condition.custom_evaluator
+            if not condition.expensive and (
+                    custom_evaluator is None or not asyncio.iscoroutinefunction(custom_evaluator)):
+                passed = condition_evaluator.evaluate(condition, context)
+            else:
+                passed = await condition_evaluator.evaluate_async(condition, context)
+
+            if not passed:
+                return False
+
+        return True
+
+    async def evaluate_conditions_profiled_async(self, conditions: List[Condition], context: ExecutionContext,
+                                                 profiler: 'RuleProfiler', rule_name: str) -> bool:
+        """Evaluate a rule's conditions as evaluate_conditions_async does, timing each one."""
+        condition_evaluator = self.condition_evaluator
+        for position, condition in enumerate(conditions):
+            with profiler.measure(rule_name, 'condition', f"[{position}] {condition.expression}"):
+                passed = await condition_evaluator.evaluate_async(condition, context)
+            if not passed:
                 return False
 
         return True
 
+    def precompile(self, conditions: List[Condition]) -> int:
+
+
+        """Compile condition expressions ahead of evaluation; returns how many compiled."""
+        condition_evaluator = self.condition_evaluator
+        compiled = 0
+        for condition in conditions:
+            if condition.custom_evaluator is not None:
+                continue
+            try:
+                condition_evaluator.compile_cache.get_or_compile(
+                    condition.expression, condition_evaluator._compile_expression
+                )
+                compiled += 1
+            except Exception:
+                # Rejected expressions stay cached and fail at evaluation as before
+                pass
+        return compiled
+
     def evaluate_conditions_with_details(
         self, conditions: List[Condition], context: ExecutionContext) -> Dict[str, Any]:
 
@@ -406,16 +811,19 @@ class RuleEvaluator:
         }
 
         for i, condition in enumerate(conditions):
-            start_time = datetime.now()
+            start_time = time.perf_counter()
+            cpu_start = time.thread_time()
             passed = self.condition_evaluator.evaluate(condition, context)
-            execution_time = (datetime.now() - start_time).total_seconds()
+            cpu_time = time.thread_time() - cpu_start
+            execution_time = time.perf_counter() - start_time
 
             condition_result = {
                 'index': i,
                 'expression': condition.expression,
                 'description': condition.description,
                 'passed': passed,
-                'execution_time': execution_time
+                'execution_time': execution_time,
+                'cpu_time': cpu_time
             }
 
             results['conditions'].append(condition_result)
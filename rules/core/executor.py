@@ -5,26 +5,59 @@ Handles execution of rule actions with support for built-in actions
 and custom executors.
 """
 
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Tuple, Awaitable
 import logging
+import random
 import time
 import asyncio
 import json
+import httpx
 import requests
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import re
 
+from .evaluator import forget_memoised_values
+from .profiler import RuleProfiler, sampled_rule
 from ..types import Action, ActionResult, ExecutionContext
 
 logger = logging.getLogger(__name__)
 
+# Concurrent executions allowed per action name unless configured otherwise;
+# each webhook holds an HTTP connection for its whole round trip
+DEFAULT_ACTION_CONCURRENCY = {'send_webhook': 20}
 
-class ActionExecutor:
-    """Executes rule actions."""
 
-    def __init__(self):
+class ActionExecutor:
+    """
+    Executes rule actions.
+
+    On the async path, built-in actions run natively on the event loop and
+    share one connection-pooled HTTP client; only custom sync executors are
+    offloaded to threads. Per-action-name semaphores bound how many
+    executions of one action run at once, and retries back off
+    exponentially with full jitter.
+    """
+
+    def __init__(self, default_timeout: Optional[float] = None,
+                 retry_base_delay: float = 0.5, retry_max_delay: float = 30.0,
+                 action_concurrency: Optional[Dict[str, int]] = None,
+                 http_limits: Optional[httpx.Limits] = None):
+
+
+        # Deadline for actions that do not set their own; None means no limit
+        self.default_timeout = default_timeout
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.action_concurrency: Dict[str, int] = {
+            **DEFAULT_ACTION_CONCURRENCY, **(action_concurrency or {})
+        }
+        self.http_limits = http_limits or httpx.Limits(max_connections=100, max_keepalive_connections=20)
 
+        # Event loop bound resources, recreated if the running loop changes
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
 
         self.built_in_actions = {
             'log_message': self._log_message,
@@ -49,6 +82,11 @@ class ActionExecutor:
             'redirect_to_movember_scope': self._redirect_to_movember_scope
         }
 
+        # Built-ins with a native coroutine implementation for the async path
+        self.async_built_in_actions = {
+            'send_webhook': self._send_webhook_async
+        }
+
         # Custom action registry
         self.custom_actions: Dict[str, Callable] = {}
 
@@ -59,6 +97,93 @@ class ActionExecutor:
         self.custom_actions[name] = executor
         logger.info(f"Registered custom action: {name}")
 
+    def set_action_concurrency(self, name: str, limit: Optional[int]) -> None:
+
+
+        """Limit concurrent executions of an action; None or 0 removes the limit."""
+        if limit:
+            self.action_concurrency[name] = limit
+        else:
+            self.action_concurrency.pop(name, None)
+        self._semaphores.pop(name, None)
+
+    def get_http_client(self) -> httpx.AsyncClient:
+
+
+        """Get the pooled HTTP client for the running event loop."""
+        self._bind_loop()
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(limits=self.http_limits)
+        return self._http_client
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client, on the event loop that created it."""
+        client, self._http_client = self._http_client, None
+        if client is None:
+            return
+        if self._loop is asyncio.get_running_loop():
+            await client.aclose()
+        else:
+            self._close_client_on_loop(client, self._loop)
+
+    def close(self) -> None:
+        """Close the pooled HTTP client from synchronous code."""
+        client, self._http_client = self._http_client, None
+        if client is not None:
+            self._close_client_on_loop(client, self._loop)
+
+    @staticmethod
+    def _close_client_on_loop(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Close a client on the loop owning its connections, without waiting for it."""
+        if loop is None or loop.is_closed():
+            # Its transports died with the loop; nothing left can close them
+            logger.warning("Pooled HTTP client outlived its event loop and could not be closed")
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.create_task(client.aclose())
+        elif loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        elif running is None:
+            loop.run_until_complete(client.aclose())
+        else:
+            # Runs the next time the owning loop does
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    def get_retry_delay(self, attempt: int) -> float:
+
+
+        """Delay before retry number ``attempt`` (from 0): full jitter over an exponential cap."""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+
+    def _bind_loop(self) -> None:
+
+
+        """Release loop-bound resources created under a different event loop."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # A client from a previous loop cannot be used here; close it on its own loop
+            if self._http_client is not None:
+                self._close_client_on_loop(self._http_client, self._loop)
+            self._loop = loop
+            self._http_client = None
+            self._semaphores = {}
+
+    def _get_semaphore(self, name: str) -> Optional[asyncio.Semaphore]:
+
+
+        """Get the concurrency limiter for an action name, if it has a limit."""
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            limit = self.action_concurrency.get(name)
+            if not limit:
+                return None
+            semaphore = self._semaphores[name] = asyncio.Semaphore(limit)
+        return semaphore
+
     def execute_action(self, action: Action, context: ExecutionContext) -> ActionResult:
 
 
@@ -101,23 +226,23 @@ class ActionExecutor:
             )
 
     async def execute_action_async(self, action: Action, context: ExecutionContext) -> ActionResult:
-        """Execute a single action asynchronously."""
+        """
+        Execute a single action asynchronously within its deadline.
+
+        Coroutine executors are cancelled when the deadline passes. Custom
+        sync executors run in a worker thread that cannot be interrupted, so
+        the action is abandoned rather than stopped. Time spent waiting for
+        the action's concurrency limit counts towards the deadline.
+        """
         start_time = time.time()
+        timeout = self.get_action_timeout(action)
 
         try:
-            # Find the executor
-            executor = self._get_executor(action)
-
-            if executor is None:
-                raise ValueError(f"No executor found for action: {action.name}")
-
-            # Execute the action
-            if asyncio.iscoroutinefunction(executor):
-                result = await executor(action, context)
-            else:
-                # For sync executors, run in thread pool
-                loop = asyncio.get_event_loop()
-                result = await loop.run_in_executor(None, executor, action, context)
+            call = self._invoke_async(action, context)
+            sample = sampled_rule()
+            if sample is not None:
+                call = self._measure_async(call, *sample, action.name)
+            result = await asyncio.wait_for(call, timeout) if timeout else await call
 
             execution_time = time.time() - start_time
 
@@ -128,6 +253,18 @@ class ActionExecutor:
                 execution_time=execution_time
             )
 
+        except asyncio.TimeoutError:
+            execution_time = time.time() - start_time
+            logger.warning(f"Action {action.name} timed out after {timeout}s")
+
+            return ActionResult(
+                action_name=action.name,
+                success=False,
+                error=f"Action timed out after {timeout}s",
+                execution_time=execution_time,
+                metadata={'timed_out': True, 'timeout_seconds': timeout}
+            )
+
         except Exception as e:
             execution_time = time.time() - start_time
             logger.error(f"Action execution failed: {action.name}", exc_info=e)
@@ -139,6 +276,42 @@ class ActionExecutor:
                 execution_time=execution_time
             )
 
+    @staticmethod
+    async def _measure_async(call: Awaitable, profiler: RuleProfiler, rule_name: str, action_name: str) -> Any:
+        """Await an action's executor, recording its timings for the sampling profiler."""
+        with profiler.measure(rule_name, 'action', action_name):
+            return await call
+
+    async def _invoke_async(self, action: Action, context: ExecutionContext) -> Any:
+        """Run an action's executor under its concurrency limit."""
+        self._bind_loop()
+        executor, offload = self._get_async_executor(action)
+
+        if executor is None:
+            raise ValueError(f"No executor found for action: {action.name}")
+
+        semaphore = self._get_semaphore(action.name)
+        if semaphore is None:
+            return await self._call_executor(executor, offload, action, context)
+        async with semaphore:
+            return await self._call_executor(executor, offload, action, context)
+
+    @staticmethod
+    async def _call_executor(executor: Callable, offload: bool, action: Action,
+                             context: ExecutionContext) -> Any:
+        """Call an executor, awaiting coroutines and offloading sync executors if required."""
+        try:
+            if asyncio.iscoroutinefunction(executor):
+                return await executor(action, context)
+            if offload:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, executor, action, context)
+            return executor(action, context)
+        finally:
+            if offload:
+                # Custom executors may change the context data in place
+                forget_memoised_values(context)
+
     def execute_actions(self, actions: List[Action], context: ExecutionContext) -> List[ActionResult]:
 
 
@@ -152,8 +325,9 @@ class ActionExecutor:
             # If action failed and retry is enabled, attempt retries
             if not result.success and action.retry_on_failure:
                 for attempt in range(action.max_retries):
-                    logger.info(f"Retrying action {action.name}, attempt {attempt + 1}")
-                    time.sleep(1)  # Brief delay before retry
+                    delay = self.get_retry_delay(attempt)
+                    logger.info(f"Retrying action {action.name} in {delay:.2f}s, attempt {attempt + 1}")
+                    time.sleep(delay)
 
                     retry_result = self.execute_action(action, context)
                     results.append(retry_result)
@@ -164,21 +338,24 @@ class ActionExecutor:
         return results
 
     async def execute_actions_async(self, actions: List[Action], context: ExecutionContext) -> List[ActionResult]:
-        """Execute multiple actions asynchronously."""
-        tasks = []
-
-        for action in actions:
-            task = self.execute_action_async(action, context)
-            tasks.append(task)
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        """
+        Execute multiple actions asynchronously.
+
+        Actions run concurrently and each retries independently, so one
+        action backing off does not delay the others. Results are returned
+        in action order, each action's retries following its first attempt.
+        """
+        if len(actions) == 1:
+            attempts = [await self._execute_with_retries_async(actions[0], context)]
+        else:
+            attempts = await asyncio.gather(
+                *(self._execute_with_retries_async(action, context) for action in actions),
+                return_exceptions=True
+            )
 
-        # Process results and handle retries
         final_results = []
-        for i, result in enumerate(results):
+        for action, result in zip(actions, attempts):
             if isinstance(result, Exception):
-                # Handle exception
-                action = actions[i]
                 final_results.append(ActionResult(
                     action_name=action.name,
                     success=False,
@@ -186,21 +363,49 @@ class ActionExecutor:
                     execution_time=0
                 ))
             else:
-                final_results.append(result)
+                final_results.extend(result)
 
-                # Handle retries for failed actions
-                if not result.success and actions[i].retry_on_failure:
-                    for attempt in range(actions[i].max_retries):
-                        logger.info(f"Retrying action {actions[i].name}, attempt {attempt + 1}")
-                        await asyncio.sleep(1)  # Brief delay before retry
+        return final_results
 
-                        retry_result = await self.execute_action_async(actions[i], context)
-                        final_results.append(retry_result)
+    async def _execute_with_retries_async(self, action: Action, context: ExecutionContext) -> List[ActionResult]:
+        """Execute an action, retrying failures with backoff if the action allows it."""
+        results = [await self.execute_action_async(action, context)]
 
-                        if retry_result.success:
-                            break
+        if action.retry_on_failure:
+            for attempt in range(action.max_retries):
+                if results[-1].success:
+                    break
+                delay = self.get_retry_delay(attempt)
+                logger.info(f"Retrying action {action.name} in {delay:.2f}s, attempt {attempt + 1}")
+                await asyncio.sleep(delay)
+                results.append(await self.execute_action_async(action, context))
 
-        return final_results
+        return results
+
+    def get_action_timeout(self, action: Action) -> Optional[float]:
+
+
+        """Get the deadline for one attempt of an action, in seconds."""
+        return action.timeout_seconds or self.default_timeout
+
+    def _get_async_executor(self, action: Action) -> Tuple[Optional[Callable], bool]:
+
+
+        """
+        Get the executor for an action on the async path.
+
+        Returns the executor and whether it must be offloaded to a thread.
+        Sync built-ins do no blocking I/O and run inline on the event loop.
+        """
+        if action.custom_executor:
+            return action.custom_executor, True
+        if action.name in self.custom_actions:
+            return self.custom_actions[action.name], True
+        if action.name in self.async_built_in_actions:
+            return self.async_built_in_actions[action.name], False
+        if action.name in self.built_in_actions:
+            return self.built_in_actions[action.name], False
+        return self._no_op, False
 
     def _get_executor(self, action: Action) -> Optional[Callable]:
 
@@ -277,7 +482,7 @@ class ActionExecutor:
                 url=url,
                 json=data,
                 headers=headers,
-                timeout=30
+                timeout=self.get_action_timeout(action) or 30
             )
             response.raise_for_status()
 
@@ -286,6 +491,31 @@ class ActionExecutor:
         except requests.RequestException as e:
             raise Exception(f"Webhook request failed: {e}")
 
+    async def _send_webhook_async(self, action: Action, context: ExecutionContext) -> str:
+        """Send a webhook through the pooled HTTP client."""
+        url = action.parameters.get('url')
+        method = action.parameters.get('method', 'POST')
+        data = action.parameters.get('data', {})
+        headers = action.parameters.get('headers', {})
+
+        if not url:
+            raise ValueError("Webhook URL is required")
+
+        try:
+            response = await self.get_http_client().request(
+                method=method,
+                url=url,
+                json=data,
+                headers=headers,
+                timeout=self.get_action_timeout(action) or 30
+            )
+            response.raise_for_status()
+
+            return f"Webhook sent to {url}, status: {response.status_code}"
+
+        except httpx.HTTPError as e:
+            raise Exception(f"Webhook request failed: {e}")
+
     def _update_data(self, action: Action, context: ExecutionContext) -> str:
 
 
@@ -294,6 +524,7 @@ class ActionExecutor:
 
         for key, value in updates.items():
             context.data[key] = value
+        forget_memoised_values(context)
 
         return f"Updated {len(updates)} data fields"
 
@@ -0,0 +1,169 @@
+"""
+Structural Hashing
+
+Fast, deterministic hashing of context data for cache keys and change
+detection.
+"""
+
+from typing import Any, Optional, Iterable, Set
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID
+import dataclasses
+from operator import itemgetter
+import hashlib
+import json
+
+
+# Types the JSON encoder writes unambiguously; subclasses such as IntEnum are not
+_PLAIN_TYPES = frozenset({str, int, float, bool, type(None)})
+# Leaf types _encode_tagged encodes without looking inside them
+_LEAF_TYPES = _PLAIN_TYPES | {datetime, date, time, timedelta, Decimal, UUID, bytes}
+_STRING_KEYS = frozenset({str})
+
+
+def _is_plain(value: Any) -> bool:
+
+
+    """
+    Whether the JSON encoder alone encodes a value unambiguously.
+
+    True for nested dicts with string keys, lists and tuples of leaf types,
+    the common shape of context data. Circular data recurses until
+    RecursionError.
+    """
+    value_type = type(value)
+    if value_type is dict:
+        if not _STRING_KEYS.issuperset(map(type, value)):
+            return False
+        members = value.values()
+    elif value_type is list or value_type is tuple:
+        members = value
+    else:
+        return value_type in _LEAF_TYPES
+    if _PLAIN_TYPES.issuperset(map(type, members)):
+        return True
+    return all(type(member) in _PLAIN_TYPES or _is_plain(member) for member in members)
+
+
+def _canonical(value: Any, active: Set[int]) -> Any:
+
+
+    """
+    Rewrite a value into plain JSON data that encodes it unambiguously.
+
+    Dicts with only string keys stay dicts; any other key is tagged with its
+    own encoding, so ``{1: x}`` and ``{'1': x}`` do not hash alike. ``active``
+    holds the containers on the current path, to reject circular data.
+    """
+    value_type = type(value)
+    if value_type in _PLAIN_TYPES:
+        return value
+    if isinstance(value, (dict, list, tuple)) or (
+            dataclasses.is_dataclass(value) and not isinstance(value, type)):
+        marker = id(value)
+        if marker in active:
+            raise ValueError("Circular reference detected")
+        active.add(marker)
+        try:
+            if isinstance(value, dict):
+                if all(type(key) is str for key in value):
+                    return {key: member if type(member) in _PLAIN_TYPES else _canonical(member, active)
+                            for key, member in value.items()}
+                return ['\x00dict', sorted(
+                    ([_ENCODER.encode(_canonical(key, active)), _canonical(member, active)]
+                     for key, member in value.items()),
+                    key=itemgetter(0)
+                )]
+            if isinstance(value, (list, tuple)):
+                return [member if type(member) in _PLAIN_TYPES else _canonical(member, active)
+                        for member in value]
+            return ['\x00dataclass', type(value).__qualname__,
+                    {f.name: _canonical(getattr(value, f.name), active) for f in dataclasses.fields(value)}]
+        finally:
+            active.discard(marker)
+    return _encode_tagged(value, active)
+
+
+def _encode_tagged(value: Any, active: Set[int]) -> Any:
+
+
+    """
+    Encode a value the JSON encoder does not handle natively.
+
+    Each type is tagged so that, for example, a datetime and its ISO string
+    or an IntEnum and its value do not hash alike. Arbitrary objects raise
+    TypeError rather than falling back to an unstable repr.
+    """
+    if isinstance(value, Enum):
+        return ['\x00enum', f"{type(value).__module__}.{type(value).__qualname__}",
+                _canonical(value.value, active)]
+    if isinstance(value, datetime):
+        return ['\x00datetime', value.isoformat()]
+    if isinstance(value, date):
+        return ['\x00date', value.isoformat()]
+    if isinstance(value, time):
+        return ['\x00time', value.isoformat()]
+    if isinstance(value, timedelta):
+        return ['\x00timedelta', value.total_seconds()]
+    if isinstance(value, Decimal):
+        # Normalise so Decimal('1.5') and Decimal('1.50') hash alike
+        return ['\x00decimal', str(value.normalize())]
+    if isinstance(value, (set, frozenset)):
+        # Members are ordered by their own encoding, so any mix of types sorts
+        return ['\x00set', sorted(_ENCODER.encode(_canonical(member, active)) for member in value)]
+    if isinstance(value, UUID):
+        return ['\x00uuid', str(value)]
+    if isinstance(value, bytes):
+        return ['\x00bytes', value.hex()]
+    for plain_type in (str, int, float):
+        # Other subclasses of plain types hash as their plain value
+        if isinstance(value, plain_type):
+            return plain_type(value)
+    raise TypeError(f"Cannot hash value of type {type(value).__name__}")
+
+
+# The C-accelerated encoder does the canonical walk; sort_keys orders dicts.
+# Data reaching it is known not to be circular, by _is_plain or _canonical.
+_ENCODER = json.JSONEncoder(
+    sort_keys=True,
+    separators=(',', ':'),
+    check_circular=False,
+    default=lambda value: _encode_tagged(value, set())
+)
+
+
+def structural_hash(value: Any, fields: Optional[Iterable[str]] = None) -> str:
+
+
+    """
+    Hash a value structurally.
+
+    Dicts hash independently of insertion order and sets independently of
+    iteration order. Datetimes, dates, Decimals, enums, UUIDs, sets and
+    dataclasses are supported; tuples hash as lists. Keys and enum members
+    keep their type, so ``{1: x}`` and ``{'1': x}`` or an IntEnum and its
+    value hash differently. Circular or too deeply nested data raises
+    ValueError, unsupported types TypeError.
+
+    Args:
+        value: Value to hash
+        fields: If given, value must be a mapping and only these top-level
+            keys are hashed; absent keys hash differently from None
+
+    Returns:
+        128-bit BLAKE2b hex digest of the value
+    """
+    if fields is not None:
+        value = {name: value[name] for name in fields if name in value}
+    try:
+        plain = _is_plain(value)
+    except RecursionError:
+        plain = False
+    try:
+        # Plain data is encoded as is; anything else is rewritten with tags first
+        encoded = _ENCODER.encode(value if plain else _canonical(value, set()))
+    except RecursionError:
+        raise ValueError("Value is nested too deeply to hash") from None
+    return hashlib.blake2b(encoded.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
@@ -4,17 +4,21 @@ Metrics Collector
 Tracks performance metrics and execution statistics for the rule engine.
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Tuple
 from dataclasses import dataclass, field
 import time
 import threading
 import logging
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
-import statistics
+from collections import defaultdict
+
+from .quantiles import LatencyTracker
 
 logger = logging.getLogger(__name__)
 
+# Sliding windows, in seconds, over which latency percentiles are reported
+DEFAULT_QUANTILE_WINDOWS: Tuple[float, ...] = (60, 300, 3600)
+
 
 @dataclass
 class RuleMetrics:
@@ -28,7 +32,16 @@ class RuleMetrics:
     total_execution_time: float = 0.0
     min_execution_time: float = float('inf')
     max_execution_time: float = 0.0
-    recent_execution_times: deque = field(default_factory=lambda: deque(maxlen=100))
+    timeouts: int = 0
+    action_timeouts: int = 0
+    quantile_windows: Tuple[float, ...] = DEFAULT_QUANTILE_WINDOWS
+    relative_accuracy: float = 0.01
+    latency: LatencyTracker = field(init=False, repr=False)
+
+    def __post_init__(self):
+
+
+        self.latency = LatencyTracker(self.quantile_windows, self.relative_accuracy)
 
     @property
     def success_rate(self) -> float:
@@ -52,18 +65,20 @@ class RuleMetrics:
     def median_execution_time(self) -> float:
 
 
-        """Calculate median execution time."""
-        if not self.recent_execution_times:
-            return 0.0
-        return statistics.median(self.recent_execution_times)
+        """Median execution time over the shortest percentile window."""
+        return self.latency.recent().quantile(0.5)
 
-    def record_execution(self, execution_time: float, success: bool) -> None:
+    def record_execution(self, execution_time: float, success: bool,
+                         timed_out: bool = False, action_timeouts: int = 0) -> None:
 
 
         """Record an execution."""
         self.total_executions += 1
+        if timed_out:
+            self.timeouts += 1
+        self.action_timeouts += action_timeouts
         self.total_execution_time += execution_time
-        self.recent_execution_times.append(execution_time)
+        self.latency.add(execution_time)
 
         if success:
             self.successful_executions += 1
@@ -90,7 +105,10 @@ class RuleMetrics:
             'average_execution_time': self.average_execution_time,
             'median_execution_time': self.median_execution_time,
             'min_execution_time': self.min_execution_time if self.min_execution_time != float('inf') else 0.0,
-            'max_execution_time': self.max_execution_time
+            'max_execution_time': self.max_execution_time,
+            'timeouts': self.timeouts,
+            'action_timeouts': self.action_timeouts,
+            'percentiles': self.latency.percentiles()
         }
 
 
@@ -105,7 +123,28 @@ class SystemMetrics:
     peak_concurrent_rules: int = 0
     current_concurrent_rules: int = 0
     uptime_start: datetime = field(default_factory=datetime.now)
-    recent_batch_times: deque = field(default_factory=lambda: deque(maxlen=100))
+    quantile_windows: Tuple[float, ...] = DEFAULT_QUANTILE_WINDOWS
+    relative_accuracy: float = 0.01
+    batch_latency: LatencyTracker = field(init=False, repr=False)
+    # Multi-context batch evaluations (RuleEngine.evaluate_batch)
+    context_batches: int = 0
+    contexts_evaluated: int = 0
+    context_failures: int = 0
+    context_batch_time: float = 0.0
+    last_contexts_per_second: float = 0.0
+    peak_contexts_per_second: float = 0.0
+
+    def __post_init__(self):
+
+
+        self.batch_latency = LatencyTracker(self.quantile_windows, self.relative_accuracy)
+
+    @property
+    def contexts_per_second(self) -> float:
+
+
+        """Aggregate throughput over all context batches."""
+        return self.contexts_evaluated / self.context_batch_time if self.context_batch_time else 0.0
 
     @property
     def uptime(self) -> timedelta:
@@ -118,10 +157,8 @@ class SystemMetrics:
     def average_batch_time(self) -> float:
 
 
-        """Calculate average batch execution time."""
-        if not self.recent_batch_times:
-            return 0.0
-        return statistics.mean(self.recent_batch_times)
+        """Average batch execution time over the shortest percentile window."""
+        return self.batch_latency.recent().mean
 
     def record_batch_execution(self, rule_count: int, execution_time: float) -> None:
 
@@ -130,13 +167,25 @@ class SystemMetrics:
         self.total_batch_executions += 1
         self.total_rules_executed += rule_count
         self.total_execution_time += execution_time
-        self.recent_batch_times.append(execution_time)
+        self.batch_latency.add(execution_time)
 
         # Update concurrent rules tracking
         self.current_concurrent_rules = rule_count
         if rule_count > self.peak_concurrent_rules:
             self.peak_concurrent_rules = rule_count
 
+    def record_context_batch(self, contexts: int, failures: int, execution_time: float) -> None:
+
+
+        """Record a batch evaluation over many contexts."""
+        self.context_batches += 1
+        self.contexts_evaluated += contexts
+        self.context_failures += failures
+        self.context_batch_time += execution_time
+        self.last_contexts_per_second = contexts / execution_time if execution_time else 0.0
+        if self.last_contexts_per_second > self.peak_contexts_per_second:
+            self.peak_contexts_per_second = self.last_contexts_per_second
+
     def to_dict(self) -> Dict[str, Any]:
 
 
@@ -148,19 +197,33 @@ class SystemMetrics:
             'average_batch_time': self.average_batch_time,
             'peak_concurrent_rules': self.peak_concurrent_rules,
             'current_concurrent_rules': self.current_concurrent_rules,
-            'uptime_seconds': self.uptime.total_seconds()
+            'uptime_seconds': self.uptime.total_seconds(),
+            'batch_percentiles': self.batch_latency.percentiles(),
+            'context_throughput': {
+                'batches': self.context_batches,
+                'contexts': self.contexts_evaluated,
+                'failures': self.context_failures,
+                'total_time': self.context_batch_time,
+                'contexts_per_second': self.contexts_per_second,
+                'last_contexts_per_second': self.last_contexts_per_second,
+                'peak_contexts_per_second': self.peak_contexts_per_second
+            }
         }
 
 
 class MetricsCollector:
     """Collects and manages metrics for the rule engine."""
 
-    def __init__(self):
+    def __init__(self, quantile_windows: Tuple[float, ...] = DEFAULT_QUANTILE_WINDOWS,
+                 relative_accuracy: float = 0.01):
 
 
         self._lock = threading.Lock()
-        self.system_metrics = SystemMetrics()
-        self.rule_metrics: Dict[str, RuleMetrics] = defaultdict(lambda: RuleMetrics(""))
+        # Latency percentiles are kept in mergeable sketches over these windows
+        self.quantile_windows = tuple(quantile_windows)
+        self.relative_accuracy = relative_accuracy
+        self.system_metrics = self._new_system_metrics()
+        self.rule_metrics: Dict[str, RuleMetrics] = defaultdict(lambda: self._new_rule_metrics(""))
 
         # Performance tracking
         self.performance_thresholds = {
@@ -172,15 +235,33 @@ class MetricsCollector:
         # Alerts
         self.alerts: List[Dict[str, Any]] = []
 
-    def record_rule_execution(self, rule_name: str, execution_time: float, success: bool) -> None:
+        # Cache statistics providers, keyed by cache name
+        self.cache_stats_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def _new_rule_metrics(self, rule_name: str) -> RuleMetrics:
+
+
+        return RuleMetrics(rule_name, quantile_windows=self.quantile_windows,
+                           relative_accuracy=self.relative_accuracy)
+
+    def _new_system_metrics(self) -> SystemMetrics:
+
+
+        return SystemMetrics(quantile_windows=self.quantile_windows,
+                             relative_accuracy=self.relative_accuracy)
 
+    def record_rule_execution(self, rule_name: str, execution_time: float, success: bool,
+                              timed_out: bool = False, action_timeouts: int = 0) -> None:
 
-        """Record a rule execution."""
+
+        """Record a rule execution, including whether it or any of its actions timed out."""
         with self._lock:
             if rule_name not in self.rule_metrics:
-                self.rule_metrics[rule_name] = RuleMetrics(rule_name)
+                self.rule_metrics[rule_name] = self._new_rule_metrics(rule_name)
 
-            self.rule_metrics[rule_name].record_execution(execution_time, success)
+            self.rule_metrics[rule_name].record_execution(
+                execution_time, success, timed_out, action_timeouts
+            )
 
             # Check for performance issues
             self._check_performance_alerts(rule_name, execution_time, success)
@@ -192,10 +273,33 @@ class MetricsCollector:
         with self._lock:
             self.system_metrics.record_batch_execution(rule_count, execution_time)
 
+    def record_context_batch(self, contexts: int, failures: int, execution_time: float) -> None:
+
+
+        """Record the throughput of a batch evaluation over many contexts."""
+        with self._lock:
+            self.system_metrics.record_context_batch(contexts, failures, execution_time)
+
+    def register_cache(self, name: str, stats_provider: Callable[[], Dict[str, Any]]) -> None:
+
+
+        """Register a cache whose hit/miss statistics are reported with the metrics."""
+        with self._lock:
+            self.cache_stats_providers[name] = stats_provider
+
+    def get_cache_metrics(self) -> Dict[str, Dict[str, Any]]:
+
+
+        """Get statistics for all registered caches."""
+        with self._lock:
+            providers = dict(self.cache_stats_providers)
+        return {name: provider() for name, provider in providers.items()}
+
     def get_metrics(self) -> Dict[str, Any]:
 
 
         """Get all metrics."""
+        caches = self.get_cache_metrics()
         with self._lock:
             return {
                 'system': self.system_metrics.to_dict(),
@@ -203,6 +307,7 @@ class MetricsCollector:
                     name: metrics.to_dict()
                     for name, metrics in self.rule_metrics.items()
                 },
+                'caches': caches,
                 'alerts': self.alerts[-10:],  # Last 10 alerts
                 'performance_thresholds': self.performance_thresholds
             }
@@ -284,7 +389,7 @@ class MetricsCollector:
 
         """Reset all metrics."""
         with self._lock:
-            self.system_metrics = SystemMetrics()
+            self.system_metrics = self._new_system_metrics()
             self.rule_metrics.clear()
             self.alerts.clear()
 
@@ -339,13 +444,33 @@ class MetricsCollector:
 
         logger.warning(f"PERFORMANCE ALERT: {message}")
 
-    def export_metrics(self, format: str = 'json') -> str:
+    def get_sketches(self) -> Dict[str, Any]:
+
+
+        """
+        Get the serialised latency sketches behind the percentiles.
+
+        Sketches from several collectors (e.g. worker processes) can be
+        combined with ``quantiles.merge_sketches`` for fleet-wide percentiles.
+        """
+        with self._lock:
+            return {
+                'batches': self.system_metrics.batch_latency.sketches(),
+                'rules': {
+                    name: metrics.latency.sketches()
+                    for name, metrics in self.rule_metrics.items()
+                }
+            }
+
+    def export_metrics(self, format: str = 'json', include_sketches: bool = False) -> str:
 
 
-        """Export metrics in the specified format."""
+        """Export metrics in the specified format, optionally with mergeable JSON sketches."""
         metrics = self.get_metrics()
 
         if format.lower() == 'json':
+            if include_sketches:
+                metrics['sketches'] = self.get_sketches()
             import json
             return json.dumps(metrics, indent=2, default=str)
         elif format.lower() == 'csv':
@@ -366,17 +491,41 @@ class MetricsCollector:
         # Write system metrics
         writer.writerow(['Metric', 'Value'])
         for key, value in metrics['system'].items():
-            writer.writerow([f"system_{key}", value])
+            if key == 'batch_percentiles':
+                for window, percentiles in value.items():
+                    for name, percentile in percentiles.items():
+                        writer.writerow([f"system_batch_{name}_{window}", percentile])
+            elif key == 'context_throughput':
+                for name, throughput in value.items():
+                    writer.writerow([f"system_context_{name}", throughput])
+            else:
+                writer.writerow([f"system_{key}", value])
+
+        # Write cache metrics
+        for cache_name, cache_data in metrics.get('caches', {}).items():
+            for key, value in cache_data.items():
+                if isinstance(value, dict):
+                    # Per-tier statistics are nested one level down
+                    for tier_name, tier_data in value.items():
+                        for tier_key, tier_value in tier_data.items():
+                            writer.writerow([f"cache_{cache_name}_{tier_name}_{tier_key}", tier_value])
+                else:
+                    writer.writerow([f"cache_{cache_name}_{key}", value])
 
         # Write rule metrics
         writer.writerow([])
-        writer.writerow(['Rule', 'Total Executions', 'Success Rate', 'Avg Time'])
+        writer.writerow(['Rule', 'Total Executions', 'Success Rate', 'Avg Time', 'P50', 'P95', 'P99', 'Timeouts'])
         for rule_name, rule_data in metrics['rules'].items():
+            percentiles = rule_data['percentiles']['all']
             writer.writerow([
                 rule_name,
                 rule_data['total_executions'],
                 f"{rule_data['success_rate']:.2%}",
-                f"{rule_data['average_execution_time']:.3f}"
+                f"{rule_data['average_execution_time']:.3f}",
+                f"{percentiles['p50']:.4f}",
+                f"{percentiles['p95']:.4f}",
+                f"{percentiles['p99']:.4f}",
+                rule_data['timeouts']
             ])
 
         return output.getvalue()
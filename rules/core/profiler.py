@@ -0,0 +1,236 @@
+"""
+Rule Profiler
+
+Opt-in sampling profiler for rule evaluation. A configurable fraction of
+evaluations record the wall and CPU time of each condition and action
+they run; the rest pay only for the sampling decision. Samples aggregate
+into hot-spot reports and export as collapsed stacks for flame graph tools
+such as ``flamegraph.pl`` or speedscope.
+"""
+
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Profiler of the evaluation being sampled, inherited by the tasks it creates
+_sampled_evaluation: ContextVar[Optional['RuleProfiler']] = ContextVar('sampled_evaluation', default=None)
+
+# Profiler and rule name of the sampled rule whose actions are running
+_sampled_rule: ContextVar[Optional[Tuple['RuleProfiler', str]]] = ContextVar('sampled_rule', default=None)
+
+# Orders for hot-spot reports
+SORT_KEYS = ('wall_time', 'cpu_time', 'calls', 'mean_wall_time', 'max_wall_time')
+
+
+@dataclass
+class ProfileEntry:
+
+
+    """Aggregated timings of one condition or action of a rule."""
+    rule_name: str
+    kind: str
+    label: str
+    calls: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    max_wall_time: float = 0.0
+
+    def record(self, wall_time: float, cpu_time: float) -> None:
+
+
+        self.calls += 1
+        self.wall_time += wall_time
+        self.cpu_time += cpu_time
+        if wall_time > self.max_wall_time:
+            self.max_wall_time = wall_time
+
+    @property
+    def mean_wall_time(self) -> float:
+
+
+        return self.wall_time / self.calls if self.calls else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+
+
+        return {
+            'rule_name': self.rule_name,
+            'kind': self.kind,
+            'label': self.label,
+            'calls': self.calls,
+            'wall_time': self.wall_time,
+            'cpu_time': self.cpu_time,
+            'mean_wall_time': self.mean_wall_time,
+            'mean_cpu_time': self.cpu_time / self.calls if self.calls else 0.0,
+            'max_wall_time': self.max_wall_time
+        }
+
+
+class RuleProfiler:
+    """
+    Samples evaluations and aggregates per-condition and per-action timings.
+
+    CPU time is the evaluating thread's. Conditions run without yielding, so
+    theirs is exact; an action that awaits also counts whatever else runs on
+    the event loop meanwhile, so its CPU time is an upper bound. Rules
+    evaluated through generated functions are timed as a single
+    ``generated`` entry for all their conditions.
+    """
+
+    def __init__(self, sample_rate: float, seed: Optional[int] = None):
+
+
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"Sample rate must be between 0 and 1, got {sample_rate}")
+        self.sample_rate = sample_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str, str], ProfileEntry] = {}
+        self.evaluations = 0
+        self.sampled_evaluations = 0
+
+    def should_sample(self) -> bool:
+
+
+        """Decide whether the next evaluation is profiled."""
+        with self._lock:
+            self.evaluations += 1
+            if self._random.random() >= self.sample_rate:
+                return False
+            self.sampled_evaluations += 1
+            return True
+
+    @contextmanager
+    def sample_evaluation(self) -> Iterator[None]:
+
+
+        """Profile the rules of the evaluation running in this context, and the tasks it creates."""
+        token = _sampled_evaluation.set(self)
+        try:
+            yield
+        finally:
+            _sampled_evaluation.reset(token)
+
+    @contextmanager
+    def sample_rule(self, rule_name: str) -> Iterator[None]:
+
+
+        """Attribute actions executed in this context to a rule."""
+        token = _sampled_rule.set((self, rule_name))
+        try:
+            yield
+        finally:
+            _sampled_rule.reset(token)
+
+    @contextmanager
+    def measure(self, rule_name: str, kind: str, label: str) -> Iterator[None]:
+
+
+        """Time the enclosed block as one call of a rule's condition or action."""
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.record(rule_name, kind, label,
+                        time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+
+    def record(self, rule_name: str, kind: str, label: str, wall_time: float, cpu_time: float) -> None:
+
+
+        """Add one timed call of a rule's condition or action."""
+        key = (rule_name, kind, label)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = ProfileEntry(rule_name, kind, label)
+            entry.record(wall_time, cpu_time)
+
+    def hot_spots(self, limit: Optional[int] = 10, kind: Optional[str] = None,
+                  sort_by: str = 'wall_time') -> List[Dict[str, Any]]:
+
+
+        """Most expensive conditions or actions, by total time unless sorted otherwise."""
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort_by}")
+        with self._lock:
+            entries = [entry for entry in self._entries.values() if kind is None or entry.kind == kind]
+        entries.sort(key=lambda entry: getattr(entry, sort_by), reverse=True)
+        return [entry.to_dict() for entry in entries[:limit]]
+
+    def get_report(self, limit: Optional[int] = 10, sort_by: str = 'wall_time') -> Dict[str, Any]:
+
+
+        """Hot conditions and actions over the sampled evaluations."""
+        return {
+            'sample_rate': self.sample_rate,
+            'evaluations': self.evaluations,
+            'sampled_evaluations': self.sampled_evaluations,
+            'conditions': self.hot_spots(limit, 'condition', sort_by),
+            'actions': self.hot_spots(limit, 'action', sort_by)
+        }
+
+    def to_collapsed_stacks(self, time_kind: str = 'wall_time') -> str:
+
+
+        """
+        Render the samples in collapsed stack format, one ``rule;entry microseconds`` line each.
+
+        Args:
+            time_kind: 'wall_time' or 'cpu_time'
+        """
+        if time_kind not in ('wall_time', 'cpu_time'):
+            raise ValueError(f"Unknown time kind: {time_kind}")
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda entry: (entry.rule_name, entry.kind, entry.label))
+        lines = []
+        for entry in entries:
+            weight = round(getattr(entry, time_kind) * 1_000_000)
+            if weight > 0:
+                frames = (entry.rule_name, f"{entry.kind} {entry.label}")
+                lines.append(f"{';'.join(_frame(frame) for frame in frames)} {weight}")
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+    def export_collapsed_stacks(self, path: str, time_kind: str = 'wall_time') -> None:
+
+
+        """Write the samples as a collapsed stack file for flame graph tools."""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_collapsed_stacks(time_kind))
+
+    def reset(self) -> None:
+
+
+        """Discard the samples collected so far."""
+        with self._lock:
+            self._entries.clear()
+            self.evaluations = 0
+            self.sampled_evaluations = 0
+
+
+def _frame(name: str) -> str:
+
+
+    """Make a name safe as one collapsed stack frame."""
+    return ' '.join(name.split()).replace(';', ',')
+
+
+def sampling_profiler() -> Optional[RuleProfiler]:
+
+
+    """The profiler sampling the evaluation running in this context, if any."""
+    return _sampled_evaluation.get()
+
+
+def sampled_rule() -> Optional[Tuple[RuleProfiler, str]]:
+
+
+    """The profiler and rule name to attribute actions running in this context to, if sampled."""
+    return _sampled_rule.get()
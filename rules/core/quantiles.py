@@ -0,0 +1,264 @@
+"""
+Quantile Sketches
+
+Mergeable streaming quantile estimation for latency metrics.
+"""
+
+from typing import Dict, Any, Optional, Callable, Iterable
+from collections import deque
+import math
+import time
+
+# Quantiles reported by default
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class QuantileSketch:
+    """
+    Relative-error quantile sketch (DDSketch) over non-negative values.
+
+    Values are counted in logarithmically sized buckets, so any quantile is
+    estimated within ``relative_accuracy`` of the true value using memory
+    proportional to the log of the value range. Sketches with the same
+    accuracy merge exactly, which makes them usable across windows, rules
+    and processes.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-9):
+
+
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int = 1) -> None:
+
+
+        """Add a value, optionally with a multiplicity."""
+        if value < 0:
+            raise ValueError("QuantileSketch only accepts non-negative values")
+        if value < self.min_value:
+            self.zero_count += count
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'QuantileSketch') -> None:
+
+
+        """Merge another sketch into this one."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+
+
+        """Estimate the q-quantile (0 <= q <= 1); 0.0 when empty."""
+        if self.count == 0:
+            return 0.0
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                # Midpoint of the bucket, in relative terms
+                estimate = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def quantiles(self, qs: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+
+
+        """Estimate several quantiles, keyed as p50, p95, p99 etc."""
+        return {_quantile_name(q): self.quantile(q) for q in qs}
+
+    @property
+    def mean(self) -> float:
+
+
+        """Mean of the added values."""
+        return self.sum / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+
+
+        """Serialise the sketch so it can be merged elsewhere."""
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'min_value': self.min_value,
+            'bins': {str(key): count for key, count in self.bins.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuantileSketch':
+
+
+        """Rebuild a sketch serialised with to_dict."""
+        sketch = cls(data['relative_accuracy'], data.get('min_value', 1e-9))
+        sketch.bins = {int(key): count for key, count in data['bins'].items()}
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        sketch.sum = data['sum']
+        if sketch.count:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
+
+
+class WindowedQuantileSketch:
+    """
+    Quantile sketch over a sliding time window.
+
+    The window is split into slices, each with its own sketch; expired
+    slices are dropped and reads merge the live ones. Estimates therefore
+    cover between ``window_seconds - slice`` and ``window_seconds`` of data.
+    """
+
+    def __init__(self, window_seconds: float, slices: int = 10,
+                 relative_accuracy: float = 0.01,
+                 clock: Callable[[], float] = time.monotonic):
+
+
+        self.window_seconds = window_seconds
+        self.slice_seconds = window_seconds / slices
+        self.relative_accuracy = relative_accuracy
+        self._clock = clock
+        self._slices: deque = deque()
+
+    def add(self, value: float) -> None:
+
+
+        """Add a value at the current time."""
+        now = self._clock()
+        slice_start = now - (now % self.slice_seconds)
+        if not self._slices or self._slices[-1][0] != slice_start:
+            self._expire(now)
+            self._slices.append((slice_start, QuantileSketch(self.relative_accuracy)))
+        self._slices[-1][1].add(value)
+
+    def snapshot(self) -> QuantileSketch:
+
+
+        """Merge the slices still inside the window into one sketch."""
+        self._expire(self._clock())
+        merged = QuantileSketch(self.relative_accuracy)
+        for _, sketch in self._slices:
+            merged.merge(sketch)
+        return merged
+
+    def _expire(self, now: float) -> None:
+
+
+        cutoff = now - self.window_seconds
+        while self._slices and self._slices[0][0] + self.slice_seconds <= cutoff:
+            self._slices.popleft()
+
+
+class LatencyTracker:
+    """All-time and windowed quantile sketches for one latency series."""
+
+    def __init__(self, windows: Iterable[float] = (), relative_accuracy: float = 0.01,
+                 clock: Callable[[], float] = time.monotonic):
+
+
+        self.total = QuantileSketch(relative_accuracy)
+        self.windows: Dict[float, WindowedQuantileSketch] = {
+            window: WindowedQuantileSketch(window, relative_accuracy=relative_accuracy, clock=clock)
+            for window in windows
+        }
+
+    def add(self, value: float) -> None:
+
+
+        """Record a latency."""
+        self.total.add(value)
+        for window in self.windows.values():
+            window.add(value)
+
+    def recent(self) -> QuantileSketch:
+
+
+        """Sketch over the shortest window, or all time if there are no windows."""
+        if not self.windows:
+            return self.total
+        return self.windows[min(self.windows)].snapshot()
+
+    def percentiles(self, qs: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, Dict[str, float]]:
+
+
+        """Quantiles for all time and each window, keyed 'all' and e.g. '300s'."""
+        qs = tuple(qs)
+        result = {'all': self.total.quantiles(qs)}
+        for window, sketch in sorted(self.windows.items()):
+            result[_window_name(window)] = sketch.snapshot().quantiles(qs)
+        return result
+
+    def sketches(self) -> Dict[str, Dict[str, Any]]:
+
+
+        """Serialised sketches for all time and each window."""
+        result = {'all': self.total.to_dict()}
+        for window, sketch in sorted(self.windows.items()):
+            result[_window_name(window)] = sketch.snapshot().to_dict()
+        return result
+
+
+def _quantile_name(q: float) -> str:
+
+
+    """Name a quantile as p50, p99, p99.9 etc."""
+    return f"p{q * 100:g}"
+
+
+def _window_name(window: float) -> str:
+
+
+    return f"{window:g}s"
+
+
+def merge_sketches(sketches: Iterable[Dict[str, Any]]) -> Optional[QuantileSketch]:
+
+
+    """Merge serialised sketches, e.g. exported by several worker processes."""
+    merged: Optional[QuantileSketch] = None
+    for data in sketches:
+        sketch = QuantileSketch.from_dict(data)
+        if merged is None:
+            merged = sketch
+        else:
+            merged.merge(sketch)
+    return merged
@@ -0,0 +1,300 @@
+"""
+Rule Replay
+
+Replays stored contexts through two rule sets side by side, a baseline and
+a candidate, across a pool of worker processes, and reports where their
+rule outcomes differ. Used to check rule edits against history before
+shipping them.
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Iterable, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from functools import partial
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+
+from .engine import RuleEngine, RuleEngineConfig
+from .parallel import _portable_context
+from ..types import ExecutionContext, RuleResult
+
+logger = logging.getLogger(__name__)
+
+# Builds a worker's engine from the replay configuration; must be picklable
+ReplayEngineFactory = Callable[[RuleEngineConfig], RuleEngine]
+
+# Replays evaluate conditions only: stored contexts must not send webhooks
+# or emails again, and every context is seen once, so caching and the
+# audit tail only cost time
+REPLAY_CONFIG = RuleEngineConfig(
+    enable_metrics=False,
+    enable_audit_trail=False,
+    enable_result_cache=False,
+    enable_codegen=True,
+    execute_actions=False
+)
+
+# Chunks submitted per worker ahead of the results being read, bounding
+# how much of the stored history is held in memory at once
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# Baseline and candidate engines of the current worker process
+_worker_engines: Optional[Tuple[RuleEngine, RuleEngine]] = None
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def rule_outcome(result: RuleResult) -> str:
+
+
+    """Summarise a rule result as the outcome compared between rule sets."""
+    if not result.success:
+        return 'timeout' if result.metadata.get('timed_out') else 'error'
+    skipped = result.metadata.get('skipped')
+    if skipped:
+        return f'skipped:{skipped}'
+    return 'met' if result.conditions_met else 'not_met'
+
+
+def evaluation_outcomes(results: Iterable[RuleResult]) -> Dict[str, str]:
+
+
+    """Outcome of each rule in an evaluation, by rule name."""
+    return {result.rule_name: rule_outcome(result) for result in results}
+
+
+def load_bundle_engine(path: str, config: RuleEngineConfig) -> RuleEngine:
+
+
+    """Build an engine running the rules of a bundle; use ``bundle_engine_factory`` for workers."""
+    engine = RuleEngine(config)
+    engine.load_bundle(path)
+    return engine
+
+
+def bundle_engine_factory(path: str) -> ReplayEngineFactory:
+
+
+    """Picklable factory building an engine from a rule bundle, e.g. a candidate rule set."""
+    return partial(load_bundle_engine, path)
+
+
+@dataclass
+class RuleOutcomeDiff:
+
+
+    """A rule whose outcome for a stored context differs between the rule sets."""
+    context_id: str
+    rule_name: str
+    baseline: Optional[str]
+    candidate: Optional[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+
+
+        return {
+            'context_id': self.context_id,
+            'rule_name': self.rule_name,
+            'baseline': self.baseline,
+            'candidate': self.candidate
+        }
+
+
+@dataclass
+class ReplayReport:
+
+
+    """Aggregated outcome differences of a replay."""
+    contexts: int = 0
+    changed_contexts: int = 0
+    errors: int = 0
+    elapsed_seconds: float = 0.0
+    # Per rule, how many contexts moved from one outcome to another
+    transitions: Dict[str, Dict[Tuple[Optional[str], Optional[str]], int]] = field(default_factory=dict)
+    # The first differences found, up to the replay's example limit
+    examples: List[RuleOutcomeDiff] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+
+
+        """Contexts replayed per second."""
+        return self.contexts / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def changed_rules(self) -> Dict[str, int]:
+
+
+        """Contexts whose outcome changed, per rule, most changed first."""
+        counts = {rule: sum(moves.values()) for rule, moves in self.transitions.items()}
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def merge(self, shard: Dict[str, Any], max_examples: int) -> None:
+
+
+        """Add the summary of a replayed chunk."""
+        self.contexts += shard['contexts']
+        self.changed_contexts += shard['changed_contexts']
+        self.errors += shard['errors']
+        for diff in shard['diffs']:
+            moves = self.transitions.setdefault(diff.rule_name, {})
+            key = (diff.baseline, diff.candidate)
+            moves[key] = moves.get(key, 0) + 1
+            if len(self.examples) < max_examples:
+                self.examples.append(diff)
+
+    def to_dict(self) -> Dict[str, Any]:
+
+
+        return {
+            'contexts': self.contexts,
+            'changed_contexts': self.changed_contexts,
+            'errors': self.errors,
+            'elapsed_seconds': self.elapsed_seconds,
+            'throughput': self.throughput,
+            'changed_rules': self.changed_rules,
+            'transitions': {
+                rule: [
+                    {'baseline': baseline, 'candidate': candidate, 'contexts': count}
+                    for (baseline, candidate), count in moves.items()
+                ]
+                for rule, moves in self.transitions.items()
+            },
+            'examples': [diff.to_dict() for diff in self.examples]
+        }
+
+
+def _initialise_replay_worker(baseline_factory: ReplayEngineFactory, candidate_factory: ReplayEngineFactory,
+                              config: RuleEngineConfig) -> None:
+
+
+    """Build and compile the worker's baseline and candidate engines once, when the worker starts."""
+    global _worker_engines, _worker_loop
+    logging.disable(logging.WARNING)
+    engines = (baseline_factory(config), candidate_factory(config))
+    for engine in engines:
+        engine.compile_rules()
+    _worker_engines = engines
+    _worker_loop = asyncio.new_event_loop()
+    logger.debug(f"Replay worker {os.getpid()} ready")
+
+
+def _replay_chunk(contexts: List[ExecutionContext], mode: Optional[str],
+                  tags: Optional[List[str]]) -> Dict[str, Any]:
+
+
+    """Evaluate a chunk with both rule sets in a worker; only differences are sent back."""
+    baseline, candidate = _worker_engines
+
+    async def replay_all() -> Dict[str, Any]:
+        diffs = []
+        changed = errors = 0
+        for context in contexts:
+            try:
+                before = evaluation_outcomes(await baseline.evaluate_async(replace(context), mode, tags))
+                after = evaluation_outcomes(await candidate.evaluate_async(replace(context), mode, tags))
+            except Exception as e:
+                logger.error(f"Replay of context {context.context_id} failed: {e}")
+                errors += 1
+                continue
+            context_diffs = [
+                RuleOutcomeDiff(context.context_id, name, before.get(name), after.get(name))
+                for name in sorted(before.keys() | after.keys())
+                if before.get(name) != after.get(name)
+            ]
+            if context_diffs:
+                changed += 1
+                diffs.extend(context_diffs)
+        return {'contexts': len(contexts), 'changed_contexts': changed, 'errors': errors, 'diffs': diffs}
+
+    return _worker_loop.run_until_complete(replay_all())
+
+
+class RuleReplay:
+    """
+    Replays stored contexts through a baseline and a candidate rule set.
+
+    Each worker process builds both engines once with ``REPLAY_CONFIG``, so
+    conditions are evaluated through generated rule functions and actions
+    are never executed. Contexts are consumed from the source in chunks with
+    a bounded number in flight, so histories larger than memory can be
+    replayed, and workers return only the rules whose outcomes differ.
+    """
+
+    def __init__(self, baseline_factory: ReplayEngineFactory, candidate_factory: ReplayEngineFactory,
+                 max_workers: Optional[int] = None, config: RuleEngineConfig = REPLAY_CONFIG,
+                 max_examples: int = 100, start_method: str = 'spawn'):
+
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_examples = max_examples
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_initialise_replay_worker,
+            initargs=(baseline_factory, candidate_factory, config)
+        )
+
+    def replay(self, chunks: Iterable[List[ExecutionContext]], mode: Optional[str] = None,
+               tags: Optional[Iterable[str]] = None,
+               progress: Optional[Callable[[ReplayReport], None]] = None) -> ReplayReport:
+
+
+        """
+        Replay chunks of contexts and report the outcome differences.
+
+        Args:
+            chunks: Lists of stored contexts, e.g. read from a database
+                page by page
+            mode: Registered evaluation mode restricting the rules replayed
+            tags: Only replay rules carrying at least one of these tags
+            progress: Called with the report so far after each chunk
+        """
+        tags = list(tags) if tags is not None else None
+        report = ReplayReport()
+        start_time = time.time()
+        in_flight: List[Future] = []
+        limit = self.max_workers * CHUNKS_IN_FLIGHT_PER_WORKER
+
+        def collect(future: Future) -> None:
+            report.merge(future.result(), self.max_examples)
+            report.elapsed_seconds = time.time() - start_time
+            if progress is not None:
+                progress(report)
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+            # Results are merged in submission order, so examples are the earliest differences
+            if len(in_flight) >= limit:
+                collect(in_flight.pop(0))
+            in_flight.append(self._pool.submit(
+                _replay_chunk, [_portable_context(context) for context in chunk], mode, tags
+            ))
+        for future in in_flight:
+            collect(future)
+
+        report.elapsed_seconds = time.time() - start_time
+        logger.info(
+            f"Replayed {report.contexts} contexts in {report.elapsed_seconds:.1f}s "
+            f"({report.throughput:.0f}/s), {report.changed_contexts} changed"
+        )
+        return report
+
+    def shutdown(self) -> None:
+
+
+        """Stop the worker processes."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> 'RuleReplay':
+
+
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+
+
+        self.shutdown()
@@ -0,0 +1,390 @@
+"""
+Shared Cache Tier
+
+A rule result cache shared by every worker process on one host, backed by
+SQLite in WAL mode. Used as the second tier behind the in-process RuleCache.
+"""
+
+from typing import Dict, Any, Optional, Iterable, List, Tuple, FrozenSet
+from datetime import timedelta
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Generation scope bumped by clear(); every cached entry belongs to it
+GLOBAL_SCOPE = '*'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    rule_name TEXT NOT NULL,
+    context_type TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    value BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_rule ON entries (rule_name);
+CREATE INDEX IF NOT EXISTS idx_entries_context_type ON entries (context_type);
+CREATE INDEX IF NOT EXISTS idx_entries_expires ON entries (expires_at);
+CREATE TABLE IF NOT EXISTS generations (
+    scope TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+"""
+
+
+def rule_scope(rule_name: str) -> str:
+
+
+    """Generation scope for a rule."""
+    return f"rule:{rule_name}"
+
+
+def tag_scope(tag: str) -> str:
+
+
+    """Generation scope for a tag."""
+    return f"tag:{tag}"
+
+
+def context_type_scope(context_type: str) -> str:
+
+
+    """Generation scope for a context type."""
+    return f"context_type:{context_type}"
+
+
+class SharedCacheTier:
+    """
+    Cross-process rule result cache in a local SQLite database.
+
+    Every worker opens its own connection to the same file. Entries expire by
+    TTL and are stamped with the generation of their rule; invalidating a
+    rule, tag or context type bumps that scope's generation, which other
+    workers pick up through ``sync()`` to drop their in-process copies.
+
+    Values are pickled, so the database file must only be writable by the
+    service account running the workers.
+
+    Lookups and writes run on the caller's thread, usually the event loop, so
+    they wait at most ``busy_timeout`` seconds for another worker's write
+    lock; a busy database counts as a miss or a skipped write. Invalidations
+    must not be lost and wait up to ``invalidation_timeout`` instead.
+    """
+
+    def __init__(self, path: str, default_ttl: timedelta = timedelta(minutes=30),
+                 max_entries: int = 100000, sync_interval: float = 0.05,
+                 purge_interval: int = 256, busy_timeout: float = 0.005,
+                 invalidation_timeout: float = 5.0):
+
+
+        self.path = path
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self.busy_timeout = busy_timeout
+        self.invalidation_timeout = invalidation_timeout
+
+        self._lock = threading.Lock()
+        # Opening may wait for other workers creating the schema at startup
+        self._connection = sqlite3.connect(path, timeout=invalidation_timeout, isolation_level=None,
+                                           check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        self._set_busy_timeout(busy_timeout)
+
+        self._generations: Dict[str, int] = {}
+        self._data_version: Optional[int] = None
+        self._last_sync = 0.0
+        self._sets_since_purge = 0
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "expirations": 0,
+            "stale": 0,
+            "sets": 0,
+            "busy": 0,
+            "errors": 0,
+            "invalidations": 0
+        }
+
+        self.sync(force=True)
+        logger.info(f"Shared rule cache tier opened at {path}")
+
+    def sync(self, force: bool = False) -> List[str]:
+
+
+        """
+        Refresh generations written by other workers.
+
+        Checks at most once per ``sync_interval`` seconds unless forced.
+
+        Returns:
+            Scopes whose generation changed since the last sync
+        """
+        now = time.monotonic()
+        if not force and now - self._last_sync < self.sync_interval:
+            return []
+        self._last_sync = now
+
+        try:
+            with self._lock:
+                # data_version only changes when another connection commits
+                data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+                if data_version == self._data_version and not force:
+                    return []
+                self._data_version = data_version
+                rows = self._connection.execute("SELECT scope, generation FROM generations").fetchall()
+        except sqlite3.Error as e:
+            if self._record_busy(e):
+                # Retry on the next lookup rather than waiting now
+                self._last_sync = 0.0
+                return []
+            self.stats["errors"] += 1
+            logger.warning(f"Shared cache sync failed: {e}")
+            return []
+
+        generations = dict(rows)
+        changed = [scope for scope, generation in generations.items()
+                   if self._generations.get(scope, 0) != generation]
+        self._generations = generations
+        return changed
+
+    def get(self, key: str, rule_name: str) -> Optional[Tuple[Any, float, FrozenSet[str]]]:
+
+
+        """
+        Get a cached value.
+
+        Returns:
+            The value, its remaining TTL in seconds and its tags, or None on a miss
+        """
+        try:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT generation, expires_at, tags, value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            if self._record_busy(e):
+                self.stats["misses"] += 1
+                return None
+            self.stats["errors"] += 1
+            logger.warning(f"Shared cache read failed: {e}")
+            return None
+
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+
+        generation, expires_at, tags, value = row
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+        if generation != self._entry_generation(rule_name):
+            self.stats["stale"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        try:
+            result = pickle.loads(value)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Shared cache entry for rule {rule_name} could not be loaded: {e}")
+            return None
+
+        self.stats["hits"] += 1
+        return result, remaining, frozenset(tags.split(',')) if tags else frozenset()
+
+    def set(self, key: str, value: Any, rule_name: str, context_type: str = "",
+            tags: Iterable[str] = (), ttl: Optional[timedelta] = None) -> bool:
+
+
+        """Store a value; returns False if it could not be stored."""
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.debug(f"Result for rule {rule_name} is not shareable: {e}")
+            return False
+
+        expires_at = time.time() + (ttl or self.default_ttl).total_seconds()
+        try:
+            with self._lock:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(key, rule_name, context_type, tags, generation, expires_at, value) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, rule_name, context_type or "", ",".join(sorted(tags)),
+                     self._entry_generation(rule_name), expires_at, payload)
+                )
+        except sqlite3.Error as e:
+            if self._record_busy(e):
+                return False
+            self.stats["errors"] += 1
+            logger.warning(f"Shared cache write failed: {e}")
+            return False
+
+        self.stats["sets"] += 1
+        self._sets_since_purge += 1
+        if self._sets_since_purge >= self.purge_interval:
+            self.purge()
+        return True
+
+    def invalidate(self, rule_name: Optional[str] = None,
+                   context_type: Optional[str] = None,
+                   tag: Optional[str] = None) -> int:
+
+
+        """
+        Invalidate entries for a rule, context type or tag in every worker.
+
+        Matching rows are deleted and the scope's generation is bumped so
+        other workers drop their in-process copies on their next sync.
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        scopes: List[str] = []
+        if rule_name:
+            clauses.append("rule_name = ?")
+            params.append(rule_name)
+            scopes.append(rule_scope(rule_name))
+        if context_type:
+            clauses.append("context_type = ?")
+            params.append(context_type)
+            scopes.append(context_type_scope(context_type))
+        if tag:
+            # Tags are stored comma-joined; match whole tags only
+            clauses.append("(',' || tags || ',') LIKE ?")
+            params.append(f"%,{tag},%")
+            scopes.append(tag_scope(tag))
+        if not clauses:
+            return 0
+
+        removed = self._bump_and_delete(scopes, " OR ".join(clauses), params)
+        self.stats["invalidations"] += 1
+        return removed
+
+    def clear(self) -> int:
+
+
+        """Remove every entry in every worker."""
+        return self._bump_and_delete([GLOBAL_SCOPE], "1", [])
+
+    def purge(self) -> int:
+
+
+        """Drop expired entries and trim the table to ``max_entries``."""
+        self._sets_since_purge = 0
+        try:
+            with self._lock:
+                removed = self._connection.execute(
+                    "DELETE FROM entries WHERE expires_at <= ?", (time.time(),)
+                ).rowcount
+                count = self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                if count > self.max_entries:
+                    # Entries expiring soonest are the oldest writes
+                    removed += self._connection.execute(
+                        "DELETE FROM entries WHERE key IN "
+                        "(SELECT key FROM entries ORDER BY expires_at LIMIT ?)",
+                        (count - self.max_entries,)
+                    ).rowcount
+        except sqlite3.Error as e:
+            if self._record_busy(e):
+                # Purged again after the next purge_interval writes
+                return 0
+            self.stats["errors"] += 1
+            logger.warning(f"Shared cache purge failed: {e}")
+            return 0
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+
+
+        """Get shared tier statistics."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        try:
+            with self._lock:
+                entries = self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {
+            "path": self.path,
+            "cache_size": entries,
+            "max_size": self.max_entries,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0,
+            **self.stats
+        }
+
+    def close(self) -> None:
+
+
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def _set_busy_timeout(self, seconds: float) -> None:
+
+
+        """Set how long statements on this connection wait for another worker's lock."""
+        self._connection.execute(f"PRAGMA busy_timeout = {int(seconds * 1000)}")
+
+    def _record_busy(self, error: sqlite3.Error) -> bool:
+
+
+        """Count an error caused by another worker holding the lock; returns whether it was one."""
+        if not isinstance(error, sqlite3.OperationalError):
+            return False
+        message = str(error)
+        if "locked" not in message and "busy" not in message:
+            return False
+        self.stats["busy"] += 1
+        return True
+
+    def _entry_generation(self, rule_name: str) -> int:
+
+
+        """Generation an entry for a rule must carry to be current."""
+        return self._generations.get(GLOBAL_SCOPE, 0) + self._generations.get(rule_scope(rule_name), 0)
+
+    def _bump_and_delete(self, scopes: List[str], where: str, params: List[Any]) -> int:
+
+
+        """Bump scope generations and delete matching rows in one transaction."""
+        try:
+            with self._lock:
+                self._set_busy_timeout(self.invalidation_timeout)
+                try:
+                    self._connection.execute("BEGIN IMMEDIATE")
+                    try:
+                        for scope in scopes:
+                            self._connection.execute(
+                                "INSERT INTO generations (scope, generation) VALUES (?, 1) "
+                                "ON CONFLICT(scope) DO UPDATE SET generation = generation + 1",
+                                (scope,)
+                            )
+                        removed = self._connection.execute(
+                            f"DELETE FROM entries WHERE {where}", params
+                        ).rowcount
+                        self._connection.execute("COMMIT")
+                    except Exception:
+                        self._connection.execute("ROLLBACK")
+                        raise
+                finally:
+                    self._set_busy_timeout(self.busy_timeout)
+        except sqlite3.Error as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Shared cache invalidation failed: {e}")
+            return 0
+
+        # Our own writes do not change data_version, so refresh directly
+        self.sync(force=True)
+        return removed
@@ -0,0 +1,622 @@
+"""
+Vectorized Evaluation
+
+Evaluates rule conditions over a pandas DataFrame, one row per context's
+data, using whole-column NumPy operations for a supported subset of
+expressions and the row-wise ConditionEvaluator for everything else.
+"""
+
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Callable
+from dataclasses import dataclass
+import ast
+import logging
+import operator
+
+import numpy as np
+import pandas as pd
+
+from .evaluator import ConditionEnvironment, ConditionEvaluator, LazyAttrDict, SafeValue
+from ..types import Condition, ContextType, ExecutionContext, Rule
+
+logger = logging.getLogger(__name__)
+
+# Names resolving to the whole context data, with the SafeValue semantics
+# of LazyAttrDict for missing keys
+DATA_ROOTS = {'data', 'grant', 'report'}
+
+COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge
+}
+
+ARITHMETIC = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv
+}
+
+# Marks rows where resolving a field chain raised
+_RAISED = object()
+
+# Column kinds whose values compare with each other as Python numbers
+NUMERIC_KINDS = {'numeric', 'bool'}
+
+
+def _is_data_key(attribute: bool, key: Any) -> bool:
+
+
+    """Check whether a single access step on the data reads the field named ``key``."""
+    if not isinstance(key, str):
+        return False
+    # Mapping methods and pseudo attributes shadow fields of the same name
+    return not attribute or not (hasattr(LazyAttrDict, key) or key in ('length', 'count'))
+
+
+class UnsupportedExpression(Exception):
+    """Raised when an expression cannot be evaluated column-wise."""
+
+
+@dataclass
+class _Operand:
+    """
+    An expression's value across the frame's rows.
+
+    ``values`` is an array aligned with the rows, or a scalar for constants.
+    ``missing`` marks rows where the value is SafeValue (a missing field
+    read through a data alias) and ``error`` rows where evaluating it raises,
+    which makes the whole condition False.
+    """
+    values: Any
+    kind: str
+    missing: np.ndarray
+    error: np.ndarray
+    constant: bool = False
+
+
+class _FrameInterpreter:
+    """Interprets a validated expression tree over one DataFrame."""
+
+    def __init__(self, evaluator: 'VectorizedEvaluator', frame: pd.DataFrame,
+                 parameters: Dict[str, Any], context_type: ContextType,
+                 columns: Dict[Any, '_Operand'], contexts: Callable[[], List[ExecutionContext]]):
+
+
+        self.evaluator = evaluator
+        self.frame = frame
+        self.columns = columns
+        self.contexts = contexts
+        self.parameters = parameters
+        self.context_type = context_type
+        self.rows = len(frame)
+        self.none = np.zeros(self.rows, dtype=bool)
+
+    def truth(self, node: ast.AST) -> Tuple[np.ndarray, np.ndarray]:
+
+
+        """Rows where the node is truthy, and rows where evaluating it raises."""
+        if isinstance(node, ast.BoolOp):
+            truth, error = self.truth(node.values[0])
+            for value in node.values[1:]:
+                next_truth, next_error = self.truth(value)
+                if isinstance(node.op, ast.And):
+                    # Later operands are only evaluated while earlier ones are truthy
+                    error = error | (truth & next_error)
+                    truth = truth & next_truth
+                else:
+                    error = error | (~truth & next_error)
+                    truth = truth | next_truth
+                truth = truth & ~error
+            return truth, error
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            truth, error = self.truth(node.operand)
+            return ~truth & ~error, error
+
+        if isinstance(node, ast.Compare):
+            return self.compare(node)
+
+        operand = self.value(node)
+        truth = self._truthy(operand) & ~operand.missing & ~operand.error
+        return truth, operand.error
+
+    def compare(self, node: ast.Compare) -> Tuple[np.ndarray, np.ndarray]:
+
+
+        """Evaluate a (possibly chained) comparison, with and semantics between links."""
+        left = self.value(node.left)
+        truth = ~self.none
+        error = self.none
+        for op, comparator in zip(node.ops, node.comparators):
+            right = self.value(comparator)
+            link_truth, link_error = self._compare_pair(left, type(op), right)
+            error = error | (truth & link_error)
+            truth = truth & link_truth & ~error
+            left = right
+        return truth, error
+
+    def value(self, node: ast.AST) -> _Operand:
+
+
+        """Evaluate a node to its value across rows."""
+        if isinstance(node, ast.Constant):
+            return self._constant(node.value)
+
+        if isinstance(node, (ast.List, ast.Tuple)):
+            items = [self.value(element) for element in node.elts]
+            if not all(item.constant for item in items):
+                raise UnsupportedExpression("Only constant sequences are supported")
+            return self._constant(tuple(item.values for item in items))
+
+        if isinstance(node, ast.Name):
+            return self._name(node.id)
+
+        if isinstance(node, (ast.Attribute, ast.Subscript)):
+            return self._field_access(node)
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = self.value(node.operand)
+            if operand.constant and isinstance(operand.values, (int, float)):
+                return self._constant(-operand.values if isinstance(node.op, ast.USub) else +operand.values)
+            if operand.kind not in NUMERIC_KINDS:
+                raise UnsupportedExpression("Unary operators need numeric operands")
+            values = operand.values.astype(np.int64) if operand.kind == 'bool' else operand.values
+            return _Operand(-values if isinstance(node.op, ast.USub) else values, 'numeric',
+                            self.none, operand.error | operand.missing)
+
+        if isinstance(node, ast.BinOp) and type(node.op) in ARITHMETIC:
+            return self._arithmetic(node)
+
+        raise UnsupportedExpression(f"Unsupported node: {type(node).__name__}")
+
+    def _constant(self, value: Any) -> _Operand:
+
+
+        if value is None:
+            kind = 'none'
+        elif isinstance(value, bool):
+            kind = 'bool'
+        elif isinstance(value, (int, float)):
+            kind = 'numeric'
+        elif isinstance(value, str):
+            kind = 'string'
+        elif isinstance(value, (list, tuple)):
+            kind = 'sequence'
+        else:
+            raise UnsupportedExpression(f"Unsupported constant: {type(value).__name__}")
+        return _Operand(value, kind, self.none, self.none, constant=True)
+
+    def _name(self, name: str) -> _Operand:
+
+
+        """Resolve a bare name in the evaluator's precedence order."""
+        if name in self.evaluator.condition_evaluator.functions:
+            raise UnsupportedExpression(f"Function '{name}' used as a value")
+        if name in self.parameters:
+            value = self.parameters[name]
+            return self._constant(tuple(value) if isinstance(value, list) else value)
+        if name == 'context_type':
+            return self._constant(self.context_type.value)
+        if name in ConditionEnvironment._RESOLVERS:
+            raise UnsupportedExpression(f"Name '{name}' is not a data field")
+
+        # A missing bare name raises NameError rather than reading as SafeValue
+        operand = self._column(name)
+        return _Operand(operand.values, operand.kind, self.none, operand.missing)
+
+    def _field_access(self, node: ast.AST) -> _Operand:
+
+
+        """Resolve attribute and constant subscript chains such as ``grant.budget``."""
+        steps = []
+        while isinstance(node, (ast.Attribute, ast.Subscript)):
+            if isinstance(node, ast.Attribute):
+                steps.append((True, node.attr))
+            else:
+                index = node.slice
+                if isinstance(index, ast.Index):  # Python < 3.9
+                    index = index.value
+                if not (isinstance(index, ast.Constant) and isinstance(index.value, (str, int))):
+                    raise UnsupportedExpression("Only constant subscripts are supported")
+                steps.append((False, index.value))
+            node = node.value
+        steps.reverse()
+
+        if not isinstance(node, ast.Name) or node.id in self.parameters \
+                or node.id in self.evaluator.condition_evaluator.functions:
+            raise UnsupportedExpression("Field chains must start from a context name")
+        root = node.id
+
+        if root in DATA_ROOTS and len(steps) == 1 and _is_data_key(*steps[0]):
+            # Top-level fields read straight from their column
+            operand = self._column(steps[0][1])
+            missing = operand.missing | ~self._alias_resolves(root)
+            return _Operand(operand.values, operand.kind, missing, self.none)
+        return self._resolve_path(root, tuple(steps))
+
+    def _column(self, name: str) -> _Operand:
+
+
+        """Read a column; null cells are treated as absent fields."""
+        cached = self.columns.get(name)
+        if cached is not None:
+            return cached
+
+        if name not in self.frame.columns:
+            operand = _Operand(None, 'none', ~self.none, self.none)
+        else:
+            series = self.frame[name]
+            operand = self._typed(series, series.isna().to_numpy(dtype=bool), self.none, name)
+
+        self.columns[name] = operand
+        return operand
+
+    def _resolve_path(self, root: str, steps: Tuple[Tuple[bool, Any], ...]) -> _Operand:
+
+
+        """
+        Resolve a nested field chain once per row through the condition environment.
+
+        This keeps the exact semantics of aliases, pseudo attributes and
+        SafeValue; only the comparisons built on it are vectorized.
+        """
+        key = (root,) + steps
+        cached = self.columns.get(key)
+        if cached is not None:
+            return cached
+
+        values = np.full(self.rows, None, dtype=object)
+        missing = self.none.copy()
+        error = self.none.copy()
+        for position, value in enumerate(self._path_values(key)):
+            if value is _RAISED:
+                error[position] = True
+            elif isinstance(value, SafeValue):
+                missing[position] = True
+            elif value is None or not pd.api.types.is_scalar(value):
+                raise UnsupportedExpression(f"Field chain on '{root}' yields {type(value).__name__} values")
+            else:
+                values[position] = value
+
+        operand = self._typed(pd.Series(values, dtype=object), missing | error, error, root)
+        operand.missing = missing
+        self.columns[key] = operand
+        return operand
+
+    def _path_values(self, path: Tuple[Any, ...]) -> List[Any]:
+
+
+        """Per-row values of a chain, memoised per prefix so shared prefixes resolve once."""
+        key = ('values',) + path
+        cached = self.columns.get(key)
+        if cached is not None:
+            return cached
+
+        values = []
+        if len(path) == 1:
+            environment_for = self.evaluator.condition_evaluator.get_environment
+            for context in self.contexts():
+                try:
+                    values.append(environment_for(context)[path[0]])
+                except Exception:
+                    values.append(_RAISED)
+        else:
+            attribute, step = path[-1]
+            for value in self._path_values(path[:-1]):
+                if value is not _RAISED:
+                    try:
+                        value = getattr(value, step) if attribute else value[step]
+                    except Exception:
+                        value = _RAISED
+                values.append(value)
+
+        self.columns[key] = values
+        return values
+
+    def _typed(self, series: pd.Series, missing: np.ndarray, error: np.ndarray, name: str) -> _Operand:
+
+
+        """Build an operand from values of one kind; cells flagged missing are ignored."""
+        inferred = pd.api.types.infer_dtype(series[~missing], skipna=True)
+        if inferred == 'boolean':
+            values = series.where(~missing, False).astype(bool).to_numpy()
+            return _Operand(values, 'bool', missing, error)
+        if inferred in ('integer', 'floating', 'mixed-integer-float'):
+            values = pd.to_numeric(series.where(~missing, 0)).to_numpy()
+            return _Operand(values, 'numeric', missing, error)
+        if inferred == 'string':
+            values = series.where(~missing, '').to_numpy(dtype=object)
+            return _Operand(values, 'string', missing, error)
+        if inferred == 'empty':
+            return _Operand(None, 'none', missing, error)
+        raise UnsupportedExpression(f"'{name}' holds {inferred} values")
+
+    def _alias_resolves(self, root: str) -> np.ndarray:
+
+
+        """Rows where a data alias resolves to the data rather than an empty mapping."""
+        if root == 'grant':
+            return self._present('grant_id') | self._present('impact_metrics')
+        if root == 'report':
+            if 'type' in self.frame.columns:
+                is_impact = (self.frame['type'] == 'impact').to_numpy(dtype=bool)
+            else:
+                is_impact = self.none
+            return is_impact | (self._present('outputs') & self._present('outcomes'))
+        return ~self.none
+
+    def _present(self, name: str) -> np.ndarray:
+
+
+        if name not in self.frame.columns:
+            return self.none
+        return self.frame[name].notna().to_numpy(dtype=bool)
+
+    def _arithmetic(self, node: ast.BinOp) -> _Operand:
+
+
+        left, right = self.value(node.left), self.value(node.right)
+        for operand in (left, right):
+            if operand.kind not in NUMERIC_KINDS:
+                raise UnsupportedExpression("Arithmetic needs numeric operands")
+
+        # SafeValue supports no arithmetic, so missing operands raise
+        error = left.error | right.error | left.missing | right.missing
+        left_values, right_values = self._as_number(left), self._as_number(right)
+        if isinstance(node.op, ast.Div):
+            error = error | (np.asarray(right_values) == 0)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            values = ARITHMETIC[type(node.op)](left_values, right_values)
+
+        if left.constant and right.constant:
+            return self._constant(values) if not error.any() else _Operand(0, 'numeric', self.none, error)
+        return _Operand(values, 'numeric', self.none, error)
+
+    @staticmethod
+    def _as_number(operand: _Operand) -> Any:
+
+
+        """Numeric values of an operand; booleans count as 0 and 1 as in Python."""
+        if operand.kind == 'bool':
+            return np.asarray(operand.values, dtype=np.int64) if not operand.constant else int(operand.values)
+        return operand.values
+
+    def _compare_pair(self, left: _Operand, op: type, right: _Operand) -> Tuple[np.ndarray, np.ndarray]:
+
+
+        """Compare two operands; SafeValue compares False to everything and contains nothing."""
+        safe = left.missing | right.missing
+        error = left.error | right.error
+
+        if op in (ast.In, ast.NotIn):
+            if right.kind != 'sequence' or not right.constant:
+                raise UnsupportedExpression("Membership is only supported against constant sequences")
+            if left.kind == 'sequence':
+                raise UnsupportedExpression("Sequence membership is not supported")
+            contained = self.none.copy()
+            for item in right.values:
+                contained |= self._equal(left, self._constant(item))
+            if op is ast.In:
+                return contained & ~safe & ~error, error
+            # SafeValue is never in a sequence, so 'not in' holds for it
+            return (~contained | safe) & ~error, error
+
+        if op not in COMPARISONS:
+            raise UnsupportedExpression(f"Unsupported comparison: {op.__name__}")
+        if left.kind == 'sequence' or right.kind == 'sequence':
+            raise UnsupportedExpression("Sequence comparisons are not supported")
+
+        if op is ast.Eq:
+            result = self._equal(left, right)
+        elif op is ast.NotEq:
+            result = ~self._equal(left, right)
+        elif self._comparable(left, right):
+            result = self._broadcast(COMPARISONS[op](left.values, right.values))
+        else:
+            # Ordering unrelated types raises TypeError on present rows
+            return self.none, error | ~safe
+        return result & ~safe & ~error, error
+
+    def _equal(self, left: _Operand, right: _Operand) -> np.ndarray:
+
+
+        """Elementwise Python equality; values of unrelated kinds are never equal."""
+        if left.kind == 'none' or right.kind == 'none' or not self._comparable(left, right):
+            return self.none.copy()
+        return self._broadcast(left.values == right.values)
+
+    @staticmethod
+    def _comparable(left: _Operand, right: _Operand) -> bool:
+
+
+        if left.kind in NUMERIC_KINDS and right.kind in NUMERIC_KINDS:
+            return True
+        return left.kind == right.kind == 'string'
+
+    def _broadcast(self, result: Any) -> np.ndarray:
+
+
+        """Normalise a comparison result to a boolean row mask."""
+        result = np.asarray(result, dtype=bool)
+        if result.ndim == 0:
+            return np.full(self.rows, bool(result))
+        return result
+
+    def _truthy(self, operand: _Operand) -> np.ndarray:
+
+
+        if operand.constant:
+            return np.full(self.rows, bool(operand.values))
+        if operand.kind == 'bool':
+            return operand.values.astype(bool)
+        if operand.kind == 'numeric':
+            return operand.values != 0
+        if operand.kind == 'string':
+            return self._broadcast([len(value) > 0 for value in operand.values])
+        return self.none.copy()
+
+
+class VectorizedEvaluator:
+    """
+    Evaluates conditions over a DataFrame of contexts in column operations.
+
+    Each row holds one context's top-level data fields; null cells count as
+    absent fields. Comparisons, membership tests against constant lists,
+    arithmetic and boolean logic over fields, parameters and constants are
+    vectorized with the same SafeValue semantics as row-wise evaluation.
+    Top-level fields are read straight from their columns; nested chains
+    such as ``operation.budget`` are resolved once per row and compared
+    column-wise. Any other condition, or a field holding values of mixed or
+    unsupported types, is evaluated row by row with the ConditionEvaluator,
+    only for rows still satisfying the rule's earlier conditions.
+    """
+
+    def __init__(self, condition_evaluator: Optional[ConditionEvaluator] = None):
+
+
+        self.condition_evaluator = condition_evaluator or ConditionEvaluator()
+        self._trees: Dict[str, Any] = {}
+        self._column_cache: Dict[Any, _Operand] = {}
+        self._frame: Optional[pd.DataFrame] = None
+        self._context_type: Optional[ContextType] = None
+        self._row_contexts: Optional[List[ExecutionContext]] = None
+        self.stats = {"vectorized": 0, "fallback": 0}
+
+    def evaluate_rules(self, rules: Iterable[Rule], frame: pd.DataFrame,
+                       context_type: ContextType = ContextType.GRANT_EVALUATION) -> pd.DataFrame:
+
+
+        """Evaluate enabled rules applicable to a context type; one boolean column per rule."""
+        masks = {
+            rule.name: self.evaluate_rule(rule, frame, context_type).to_numpy()
+            for rule in rules
+            if rule.enabled and (not rule.context_types or context_type in rule.context_types)
+        }
+        return pd.DataFrame(masks, index=frame.index)
+
+    def evaluate_rule(self, rule: Rule, frame: pd.DataFrame,
+                      context_type: ContextType = ContextType.GRANT_EVALUATION) -> pd.Series:
+
+
+        """Evaluate a rule's conditions for every row; True where all conditions are met."""
+        mask = self.evaluate_conditions(rule.conditions, frame, context_type)
+        if rule.applicability_check is not None:
+            mask &= self._row_wise(mask, rule.applicability_check)
+        return pd.Series(mask, index=frame.index, name=rule.name)
+
+    def evaluate_conditions(self, conditions: List[Condition], frame: pd.DataFrame,
+                            context_type: ContextType = ContextType.GRANT_EVALUATION) -> np.ndarray:
+
+
+        """Evaluate conditions combined with AND; returns a boolean row mask."""
+        self._bind(frame, context_type)
+        mask = np.ones(len(frame), dtype=bool)
+        for condition in conditions:
+            if not mask.any():
+                break
+            mask &= self.evaluate_condition(condition, frame, context_type, mask)
+        return mask
+
+    def evaluate_condition(self, condition: Condition, frame: pd.DataFrame,
+                           context_type: ContextType = ContextType.GRANT_EVALUATION,
+                           rows: Optional[np.ndarray] = None) -> np.ndarray:
+
+
+        """
+        Evaluate one condition; returns a boolean row mask.
+
+        Args:
+            rows: If given, rows that need evaluating; others may be False
+                when the condition falls back to row-wise evaluation
+        """
+        self._bind(frame, context_type)
+        if rows is None:
+            rows = np.ones(len(frame), dtype=bool)
+
+        if condition.custom_evaluator is None:
+            tree = self._tree(condition.expression)
+            if tree is False:
+                # Rejected expressions evaluate to False row-wise too
+                return np.zeros(len(frame), dtype=bool)
+            try:
+                interpreter = _FrameInterpreter(self, frame, condition.parameters, context_type,
+                                                self._column_cache, self._contexts)
+                truth, _ = interpreter.truth(tree.body)
+                self.stats["vectorized"] += 1
+                return truth
+            except UnsupportedExpression as e:
+                logger.debug(f"Falling back to row-wise evaluation of '{condition.expression}': {e}")
+
+        self.stats["fallback"] += 1
+        return self._row_wise(rows, lambda context: self.condition_evaluator.evaluate(condition, context))
+
+    def supports(self, condition: Condition) -> bool:
+
+
+        """Check whether a condition's expression can be vectorized, ignoring column types."""
+        if condition.custom_evaluator is not None:
+            return False
+        tree = self._tree(condition.expression)
+        if not tree:
+            return False
+        try:
+            interpreter = _FrameInterpreter(self, pd.DataFrame(), condition.parameters,
+                                            ContextType.GRANT_EVALUATION, {}, list)
+            interpreter.truth(tree.body)
+        except UnsupportedExpression:
+            return False
+        return True
+
+    def _tree(self, expression: str) -> Any:
+
+
+        """Parsed tree of a validated expression, or False if the evaluator rejects it."""
+        if expression not in self._trees:
+            evaluator = self.condition_evaluator
+            try:
+                evaluator.compile_cache.get_or_compile(expression, evaluator._compile_expression)
+                self._trees[expression] = ast.parse(expression, mode='eval')
+            except Exception:
+                self._trees[expression] = False
+        return self._trees[expression]
+
+    def _bind(self, frame: pd.DataFrame, context_type: ContextType) -> None:
+
+
+        """Reset per-frame caches when evaluating a different frame or context type."""
+        if frame is not self._frame or context_type is not self._context_type:
+            self._frame = frame
+            self._context_type = context_type
+            self._column_cache = {}
+            self._row_contexts = None
+
+    def _contexts(self) -> List[ExecutionContext]:
+
+
+        """One context per row of the bound frame, without its null cells."""
+        if self._row_contexts is None:
+            frame = self._frame
+            self._row_contexts = [
+                ExecutionContext(
+                    context_type=self._context_type,
+                    context_id=str(index),
+                    data={key: value for key, value in record.items()
+                          if not (pd.api.types.is_scalar(value) and pd.isna(value))}
+                )
+                for index, record in zip(frame.index, frame.to_dict('records'))
+            ]
+        return self._row_contexts
+
+    def _row_wise(self, rows: np.ndarray, predicate: Callable[[ExecutionContext], Any]) -> np.ndarray:
+
+
+        """Evaluate a predicate on the contexts of the selected rows."""
+        contexts = self._contexts()
+        result = np.zeros(len(contexts), dtype=bool)
+        for position in np.flatnonzero(rows):
+            result[position] = bool(predicate(contexts[position]))
+        return result
@@ -4,12 +4,21 @@ Movember AI Rules System - Main Integration Module
 Provides unified access to all Movember AI rules and systems.
 """
 
+import asyncio
+import functools
+import hashlib
+import importlib
+import importlib.util
 import logging
-from typing import Dict, List, Optional, Any
+import os
+import threading
+from typing import Dict, List, Optional, Any, Iterable, AsyncIterable, AsyncIterator, Tuple, Union
 from datetime import datetime
 
 from rules.core import RuleEngine, RuleEngineConfig
-from rules.types import ExecutionContext, ContextType, RulePriority
+from rules.core.bundle import BundleError, read_bundle
+from rules.core.engine import BatchItemResult
+from rules.types import ExecutionContext, ContextType, Rule, RulePriority
 from rules.domains.movember_ai.behaviours import get_ai_behaviour_rules
 from rules.domains.movember_ai.reporting import get_impact_report_rules
 from rules.domains.movember_ai.grant_rules import get_grant_rules
@@ -25,6 +34,39 @@ from rules.domains.movember_ai.refactor import get_refactor_rules, run_weekly_re
 
 logger = logging.getLogger(__name__)
 
+# Rule category tags applied when rules are loaded into the engine
+PROJECT_CATEGORY = "project"
+AI_BEHAVIOUR_CATEGORY = "ai_behaviour"
+GRANT_CATEGORY = "grant"
+IMPACT_REPORT_CATEGORY = "impact_report"
+REFACTOR_CATEGORY = "refactor"
+
+# Modules defining each category's rules, re-imported on hot reload
+RULE_MODULES = {
+    PROJECT_CATEGORY: ("rules.domains.movember_ai.context", "PROJECT_RULES"),
+    AI_BEHAVIOUR_CATEGORY: ("rules.domains.movember_ai.behaviours", "AI_RULES"),
+    GRANT_CATEGORY: ("rules.domains.movember_ai.grant_rules", "GRANT_RULES"),
+    IMPACT_REPORT_CATEGORY: ("rules.domains.movember_ai.reporting", "IMPACT_REPORT_RULES"),
+    REFACTOR_CATEGORY: ("rules.domains.movember_ai.refactor", "REFACTOR_RULES")
+}
+
+# Precompiled rule bundle loaded at startup instead of the rule modules, if set
+RULES_BUNDLE_ENV = "MOVEMBER_RULES_BUNDLE"
+
+# Rule categories evaluated in each mode. Project (context) rules guard every
+# mode; modes not listed here evaluate the full rule catalogue.
+MODE_CATEGORIES = {
+    "reporting": [PROJECT_CATEGORY, IMPACT_REPORT_CATEGORY],
+    "report_validation": [PROJECT_CATEGORY, IMPACT_REPORT_CATEGORY],
+    "impact_planning": [PROJECT_CATEGORY, IMPACT_REPORT_CATEGORY],
+    "data_validation": [PROJECT_CATEGORY, AI_BEHAVIOUR_CATEGORY, IMPACT_REPORT_CATEGORY],
+    "grant_submission": [PROJECT_CATEGORY, GRANT_CATEGORY],
+    "grant_approval": [PROJECT_CATEGORY, GRANT_CATEGORY],
+    "ai_behaviour": [PROJECT_CATEGORY, AI_BEHAVIOUR_CATEGORY],
+    "context_validation": [PROJECT_CATEGORY],
+    "weekly_maintenance": [PROJECT_CATEGORY, REFACTOR_CATEGORY]
+}
+
 
 class MovemberAIRulesEngine:
     """
@@ -32,43 +74,150 @@ class MovemberAIRulesEngine:
     Provides unified access to all rule categories and systems.
     """
 
-    def __init__(self, config: Optional[RuleEngineConfig] = None):
+    def __init__(self, config: Optional[RuleEngineConfig] = None, bundle_path: Optional[str] = None):
 
 
         self.engine = RuleEngine(config or RuleEngineConfig())
         self.integrator = None  # Will be initialized when needed
-        self._load_all_rules()
+        if bundle_path is None:
+            bundle_path = os.getenv(RULES_BUNDLE_ENV)
+        if not (bundle_path and self._load_bundle(bundle_path)):
+            self._load_all_rules()
 
-    def _load_all_rules(self):
+    def _load_all_rules(self, reload_modules: bool = False) -> int:
 
 
-        """Load all rule categories into the engine."""
-        from rules.domains.movember_ai.behaviours import AI_RULES
-        from rules.domains.movember_ai.reporting import IMPACT_REPORT_RULES
-        from rules.domains.movember_ai.grant_rules import GRANT_RULES
-        from rules.domains.movember_ai.context import PROJECT_RULES
-        from rules.domains.movember_ai.refactor import REFACTOR_RULES
+        """Load all rule categories into the engine as one snapshot; returns its version."""
+        return self._install_rules(*self._import_rules(reload_modules))
 
-        all_rules = (
-            PROJECT_RULES + AI_RULES + GRANT_RULES + IMPACT_REPORT_RULES + REFACTOR_RULES
-        )
+    @staticmethod
+    def _import_rules(reload_modules: bool = False) -> Tuple[List[Rule], Dict[str, List[str]]]:
+
+
+        """Import every category's rules and their category tags; touches no engine state."""
+        rules = []
+        tags: Dict[str, List[str]] = {}
+        for category, (module_name, attribute) in RULE_MODULES.items():
+            module = importlib.import_module(module_name)
+            if reload_modules:
+                module = importlib.reload(module)
+            for rule in getattr(module, attribute):
+                rules.append(rule)
+                tags.setdefault(rule.name, []).append(category)
+        return rules, tags
+
+    def _install_rules(self, rules: List[Rule], tags: Dict[str, List[str]]) -> int:
 
-        for rule in all_rules:
-            self.engine.add_rule(rule)
 
-        logger.info(f"Loaded {len(all_rules)} rules across all categories")
+        """Swap imported rules into the engine as one snapshot; returns its version."""
+        # Each mode selects its rule subset from the engine's precomputed index
+        snapshot = self.engine.replace_rules(rules, tags=tags, modes=MODE_CATEGORIES)
+
+        logger.info(f"Loaded {len(rules)} rules across all categories")
+        return snapshot.version
+
+    def _load_bundle(self, path: str) -> bool:
+
+
+        """Load the rule catalogue from a precompiled bundle; False if it is unusable or stale."""
+        try:
+            bundle = read_bundle(path)
+            if bundle.metadata.get('catalogue') != catalogue_digest():
+                raise BundleError("rule modules changed since the bundle was built")
+            self.engine.load_bundle(bundle)
+        except (OSError, BundleError) as e:
+            logger.warning(f"Ignoring rule bundle {path}, loading rule modules instead: {e}")
+            return False
+        logger.info(f"Loaded {len(self.engine.rules)} rules from bundle {path}")
+        return True
+
+    def save_bundle(self, path: str) -> None:
+
+
+        """Write the loaded rule catalogue to a precompiled bundle for new workers to start from."""
+        self.engine.save_bundle(path, metadata={'catalogue': catalogue_digest()})
+
+    def reload_rules(self) -> int:
+
 
-    async def evaluate_context(self, context: ExecutionContext, mode: str = "default") -> List[Any]:
+        """
+        Re-import the rule modules and hot-swap the engine's rule snapshot.
+
+        Evaluations in flight finish on the previous rules. Returns the new
+        rule snapshot version.
+        """
+        return self._load_all_rules(reload_modules=True)
+
+    async def reload_rules_async(self) -> int:
+
+
+        """
+        Hot-swap the rule snapshot from a running event loop.
+
+        Only re-importing the rule modules runs in a worker thread; the
+        snapshot swap and result cache invalidation run on the loop, between
+        the steps of in-flight evaluations. Returns the new rule snapshot
+        version.
+        """
+        rules, tags = await asyncio.to_thread(self._import_rules, True)
+        return self._install_rules(rules, tags)
+
+    async def evaluate_context(self, context: ExecutionContext, mode: str = "default",
+                               incremental: bool = False) -> List[Any]:
         """
         Evaluate rules for a given context with specified mode.
 
         Args:
             context: Execution context containing data and metadata
             mode: Evaluation mode (default, reporting, grant_submission, etc.)
+            incremental: Re-evaluate only the rules affected by changes since
+                this context ID was last evaluated incrementally, e.g. while
+                a grant draft is edited
 
         Returns:
             List of rule evaluation results
         """
+        self._validate_context(context)
+
+        # Evaluate only the rule subset registered for this mode
+        if incremental:
+            results = await self.engine.evaluate_incremental_async(context, mode=mode)
+        else:
+            results = await self.engine.evaluate_async(context, mode=mode)
+        serialized_results = self._serialize_results(results)
+
+        logger.info(f"Evaluated {len(serialized_results)} rules in {mode} mode")
+        return serialized_results
+
+    async def evaluate_batch(
+        self,
+        contexts: Union[Iterable[ExecutionContext], AsyncIterable[ExecutionContext]],
+        mode: str = "default",
+        concurrency: Optional[int] = None
+    ) -> AsyncIterator[BatchItemResult]:
+        """
+        Evaluate many contexts with bounded concurrency, yielding each as it completes.
+
+        Each item carries the context's index in the input and its results
+        serialised as by ``evaluate_context``; contexts that fail validation
+        are yielded with the error rather than stopping the batch.
+        """
+        async def evaluate(context: ExecutionContext) -> List[Dict[str, Any]]:
+            self._validate_context(context)
+            return self._serialize_results(await self.engine.evaluate_async(context, mode=mode))
+
+        batch = self.engine.evaluate_batch(contexts, concurrency=concurrency, evaluate=evaluate)
+        try:
+            async for item in batch:
+                yield item
+        finally:
+            await batch.aclose()
+
+    @staticmethod
+    def _validate_context(context: ExecutionContext) -> None:
+
+
+        """Reject project validation contexts that are not Movember-related."""
         # Validate Movember context only for project validation contexts and when project_id is provided
         project_id = context.data.get('project_id')
         if context.context_type == ContextType.PROJECT_VALIDATION and project_id is not None:
@@ -77,18 +226,13 @@ class MovemberAIRulesEngine:
             if not validate_movember_context(project_id, operation_type):
                 raise ValueError("Context must be Movember-related")
 
-        # Apply mode-specific filtering
-        filtered_rules = self._filter_rules_by_mode(mode)
+    @staticmethod
+    def _serialize_results(results: List[Any]) -> List[Dict[str, Any]]:
 
-        # Evaluate rules
-        results = await self.engine.evaluate_async(context)
 
-        # Filter results by mode
-        mode_results = [r for r in results if self._is_rule_applicable_for_mode(r, mode)]
-
-        # Serialize results to dicts and expose priority at top-level for tests
+        """Serialize results to dicts and expose priority at top-level for tests."""
         serialized_results: List[Dict[str, Any]] = []
-        for r in mode_results:
+        for r in results:
             rd = r.to_dict() if hasattr(r, 'to_dict') else dict(r)
             # Promote priority enum to top-level
             priority_value = None
@@ -99,30 +243,15 @@ class MovemberAIRulesEngine:
             if priority_value is not None:
                 rd['priority'] = priority_value
             serialized_results.append(rd)
-
-        logger.info(f"Evaluated {len(serialized_results)} rules in {mode} mode")
         return serialized_results
 
-    def _filter_rules_by_mode(self, mode: str) -> List:
-
-
-        """Filter rules based on evaluation mode."""
-        mode_mappings = {
-            "reporting": ["impact_reporting"],
-            "grant_submission": ["grant_evaluation"],
-            "ai_behaviour": ["ai_behaviour"],
-            "context_validation": ["project_validation"],
-            "weekly_maintenance": ["refactoring"]
-        }
+    def enable_process_pool(self, max_workers: Optional[int] = None) -> None:
 
-        return mode_mappings.get(mode, [])
 
-    def _is_rule_applicable_for_mode(self, result: Any, mode: str) -> bool:
-
-
-        """Check if a rule result is applicable for the given mode."""
-        # This is a simplified check - in practice, you'd have more sophisticated logic
-        return True
+        """Evaluate large batches across worker processes, each loading the full rule catalogue."""
+        self.engine.enable_process_pool(
+            functools.partial(create_rule_engine, self.engine.config), max_workers
+        )
 
     def get_metrics(self) -> Dict[str, Any]:
 
@@ -139,6 +268,7 @@ class MovemberAIRulesEngine:
             return {
                 "system_metrics": system_alias,
                 "rule_metrics": raw.get("rules", {}),
+                "cache_metrics": raw.get("caches", {}),
                 "alerts": raw.get("alerts", []),
                 "performance_thresholds": raw.get("performance_thresholds", {})
             }
@@ -148,7 +278,7 @@ class MovemberAIRulesEngine:
 
 
         """Get execution history and audit trail."""
-        return self.engine.execution_history
+        return self.engine.get_execution_history(limit=self.engine.execution_history.capacity)
 
     async def run_weekly_maintenance(self) -> Any:
         """Run weekly maintenance and refactoring."""
@@ -201,6 +331,43 @@ class MovemberAIRulesEngine:
         return await integrator._validate_cross_system_consistency(data)
 
 
+def catalogue_digest() -> str:
+
+
+    """Digest of the rule module sources, identifying the catalogue a bundle was built from."""
+    digest = hashlib.sha256()
+    for module_name, attribute in RULE_MODULES.values():
+        spec = importlib.util.find_spec(module_name)
+        digest.update(f"{module_name}:{attribute}\n".encode())
+        with open(spec.origin, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def build_rules_bundle(path: str, config: Optional[RuleEngineConfig] = None) -> None:
+
+
+    """Build the precompiled rule bundle from the rule modules; set ``MOVEMBER_RULES_BUNDLE`` to load it."""
+    MovemberAIRulesEngine(config, bundle_path="").save_bundle(path)
+
+
+# Process-wide engine shared by request handlers
+_movember_engine: Optional[MovemberAIRulesEngine] = None
+_movember_engine_lock = threading.Lock()
+
+
+def get_movember_engine() -> MovemberAIRulesEngine:
+
+
+    """Get the process-wide Movember AI rules engine, creating it on first use."""
+    global _movember_engine
+    if _movember_engine is None:
+        with _movember_engine_lock:
+            if _movember_engine is None:
+                _movember_engine = MovemberAIRulesEngine()
+    return _movember_engine
+
+
 # Convenience functions for easy access
 def create_movember_engine(config: Optional[RuleEngineConfig] = None) -> MovemberAIRulesEngine:
 
@@ -209,6 +376,13 @@ def create_movember_engine(config: Optional[RuleEngineConfig] = None) -> Movembe
     return MovemberAIRulesEngine(config)
 
 
+def create_rule_engine(config: Optional[RuleEngineConfig] = None) -> RuleEngine:
+
+
+    """Create a core rule engine with the Movember AI rules loaded; picklable for worker processes."""
+    return MovemberAIRulesEngine(config).engine
+
+
 def validate_movember_operation(operation: str, project_id: str) -> bool:
     """
     Validate if an operation is appropriate for the Movember project.
@@ -233,7 +407,7 @@ async def run_movember_impact_analysis(data: Dict) -> Dict:
     Returns:
         Impact analysis results
     """
-    engine = create_movember_engine()
+    engine = get_movember_engine()
     context = ExecutionContext(
         context_type=ContextType.IMPACT_REPORTING,
         context_id=f"impact-analysis-{data.get('project_id', 'unknown')}",
@@ -261,16 +435,67 @@ async def evaluate_grant_application(grant_data: Dict) -> Dict:
     Returns:
         Grant evaluation results
     """
-    engine = create_movember_engine()
-    context = ExecutionContext(
+    engine = get_movember_engine()
+    results = await engine.evaluate_context(_grant_context(grant_data), mode="grant_submission")
+    return _grant_evaluation(results)
+
+
+async def evaluate_grant_applications(
+    grants: Union[Iterable[Dict], AsyncIterable[Dict]],
+    concurrency: Optional[int] = None,
+    engine: Optional[MovemberAIRulesEngine] = None
+) -> AsyncIterator[Dict]:
+    """
+    Evaluate many grant applications with one engine, yielding each evaluation as it completes.
+
+    Args:
+        grants: Grant application data, as an iterable or async iterator
+        concurrency: Applications evaluated at once
+        engine: Engine to evaluate with; the process-wide engine if omitted
+
+    Yields:
+        Grant evaluation results as returned by ``evaluate_grant_application``,
+        plus the application's ``index`` in the input and any ``error``
+    """
+    engine = engine or get_movember_engine()
+
+    async def contexts() -> AsyncIterator[ExecutionContext]:
+        if hasattr(grants, '__aiter__'):
+            async for grant_data in grants:
+                yield _grant_context(grant_data)
+        else:
+            for grant_data in grants:
+                yield _grant_context(grant_data)
+
+    batch = engine.evaluate_batch(contexts(), mode="grant_submission", concurrency=concurrency)
+    try:
+        async for item in batch:
+            evaluation = _grant_evaluation(item.results)
+            evaluation["index"] = item.index
+            evaluation["grant_id"] = item.context.data.get('grant_id')
+            if item.error is not None:
+                evaluation["error"] = str(item.error)
+            yield evaluation
+    finally:
+        await batch.aclose()
+
+
+def _grant_context(grant_data: Dict) -> ExecutionContext:
+
+
+    """Build the execution context for a grant application."""
+    return ExecutionContext(
         context_type=ContextType.GRANT_EVALUATION,
         context_id=f"grant-eval-{grant_data.get('grant_id', 'unknown')}",
         data=grant_data,
         timestamp=datetime.now()
     )
 
-    results = await engine.evaluate_context(context, mode="grant_submission")
 
+def _grant_evaluation(results: List[Dict]) -> Dict:
+
+
+    """Summarise serialized grant rule results as a grant evaluation."""
     return {
         "evaluation": "comprehensive_grant_evaluation",
         "results": results,
@@ -313,9 +538,13 @@ async def validate_system_integration(data: Dict, config: Optional[Dict] = None)
 __all__ = [
     'MovemberAIRulesEngine',
     'create_movember_engine',
+    'get_movember_engine',
+    'create_rule_engine',
+    'build_rules_bundle',
     'validate_movember_operation',
     'run_movember_impact_analysis',
     'evaluate_grant_application',
+    'evaluate_grant_applications',
     'run_weekly_refactor',
     'process_grant_with_integration',
     'process_impact_with_integration',
@@ -21,6 +21,7 @@ GRANT_RULES = [
             Action("ensure_aud_currency_format")
         ],
         priority=RulePriority.CRITICAL,
+        deterministic=True,
         description="Validate grant application completeness with UK spelling and AUD currency"
     ),
 
@@ -33,6 +34,7 @@ GRANT_RULES = [
             Action("suggest_impact_frameworks")
         ],
         priority=RulePriority.HIGH,
+        deterministic=True,
         description="Ensure grants include measurable impact metrics"
     ),
 
@@ -49,6 +51,7 @@ GRANT_RULES = [
             Action("suggest_timeline_adjustment")
         ],
         priority=RulePriority.MEDIUM,
+        deterministic=True,
         description="Validate budget realism with AUD currency"
     ),
 
@@ -61,6 +64,7 @@ GRANT_RULES = [
             Action("explain_sdg_importance")
         ],
         priority=RulePriority.MEDIUM,
+        deterministic=True,
         description="Require SDG alignment for all grants"
     ),
 
@@ -76,6 +80,7 @@ GRANT_RULES = [
             Action("explain_sustainability_importance")
         ],
         priority=RulePriority.MEDIUM,
+        deterministic=True,
         description="Require sustainability plan for large grants"
     ),
 
@@ -91,6 +96,7 @@ GRANT_RULES = [
             Action("request_risk_assessment")
         ],
         priority=RulePriority.MEDIUM,
+        deterministic=True,
         description="Require risk mitigation for complex grants"
     ),
 
@@ -106,6 +112,7 @@ GRANT_RULES = [
             Action("provide_partnership_examples")
         ],
         priority=RulePriority.LOW,
+        deterministic=True,
         description="Suggest partnerships for regional grants"
     ),
 
@@ -121,6 +128,7 @@ GRANT_RULES = [
             Action("request_innovation_justification")
         ],
         priority=RulePriority.MEDIUM,
+        deterministic=True,
         description="Evaluate innovation score for research grants"
     ),
 
@@ -137,6 +145,7 @@ GRANT_RULES = [
             Action("validate_exchange_rates")
         ],
         priority=RulePriority.HIGH,
+        deterministic=True,
         description="Ensure all grant amounts are in AUD"
     ),
 
@@ -153,6 +162,7 @@ GRANT_RULES = [
             Action("maintain_uk_terminology")
         ],
         priority=RulePriority.MEDIUM,
+        deterministic=True,
         description="Ensure all grant documentation uses UK spelling"
     ),
 
@@ -168,6 +178,7 @@ GRANT_RULES = [
             Action("provide_evaluation_templates")
         ],
         priority=RulePriority.MEDIUM,
+        deterministic=True,
         description="Require comprehensive evaluation criteria for large grants"
     ),
 
@@ -184,6 +195,7 @@ GRANT_RULES = [
             Action("provide_timeline_guidance")
         ],
         priority=RulePriority.MEDIUM,
+        deterministic=True,
         description="Validate timeline realism for complex grants"
     ),
 
@@ -199,6 +211,7 @@ GRANT_RULES = [
             Action("provide_engagement_examples")
         ],
         priority=RulePriority.LOW,
+        deterministic=True,
         description="Require stakeholder engagement for high-impact grants"
     ),
 
@@ -214,6 +227,7 @@ GRANT_RULES = [
             Action("explain_dmp_importance")
         ],
         priority=RulePriority.MEDIUM,
+        deterministic=True,
         description="Require data management plan for data-intensive grants"
     ),
 
@@ -229,6 +243,7 @@ GRANT_RULES = [
             Action("provide_approval_process")
         ],
         priority=RulePriority.HIGH,
+        deterministic=True,
         description="Require ethical approval for human subjects research"
     ),
 
@@ -244,6 +259,7 @@ GRANT_RULES = [
             Action("suggest_budget_categories")
         ],
         priority=RulePriority.MEDIUM,
+        deterministic=True,
         description="Require detailed budget breakdown for significant grants"
     ),
 
@@ -259,6 +275,7 @@ GRANT_RULES = [
             Action("provide_framework_examples")
         ],
         priority=RulePriority.MEDIUM,
+        deterministic=True,
         description="Require impact measurement framework for high-impact grants"
     )
 ]
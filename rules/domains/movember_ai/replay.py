@@ -0,0 +1,136 @@
+"""
+Movember AI Rules System - Grant Evaluation Replay
+Streams stored grant evaluations from the ``grant_evaluations`` table and
+replays them through the current and an edited rule catalogue.
+"""
+
+from typing import Dict, List, Any, Optional, Iterator, Callable
+from datetime import datetime
+import json
+import logging
+import sys
+
+from ...core.replay import ReplayEngineFactory, ReplayReport, RuleReplay
+from ...types import ExecutionContext, ContextType
+
+logger = logging.getLogger(__name__)
+
+# Placeholder for a query parameter under each DB-API paramstyle
+_PLACEHOLDERS = {'qmark': '?', 'format': '%s', 'pyformat': '%s', 'numeric': ':1', 'named': ':after_id'}
+
+
+def grant_evaluation_data(grant_data: Dict[str, Any], evaluation_timestamp: str) -> Dict[str, Any]:
+
+
+    """Build the context data the grant evaluation endpoint evaluates a submitted grant with."""
+    return {
+        "grant_id": grant_data.get("grant_id", f"grant_{int(datetime.now().timestamp())}"),
+        "title": grant_data.get("title", ""),
+        "description": grant_data.get("description", ""),
+        "budget": grant_data.get("budget", 0),
+        "timeline_months": grant_data.get("timeline_months", 12),
+        "organisation": grant_data.get("organisation", ""),
+        "contact_person": grant_data.get("contact_person", ""),
+        "email": grant_data.get("email", ""),
+        "evaluation_timestamp": evaluation_timestamp,
+        "context_type": "GRANT_EVALUATION"
+    }
+
+
+def _placeholder(connection: Any) -> str:
+
+
+    """Query parameter placeholder for the DB-API driver a connection belongs to."""
+    driver = sys.modules.get(type(connection).__module__.split('.')[0])
+    return _PLACEHOLDERS.get(getattr(driver, 'paramstyle', 'qmark'), '?')
+
+
+def _json_column(value: Any) -> Any:
+
+
+    """Decode a JSON column; drivers with a native JSON type have decoded it already."""
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode('utf-8')
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def stored_grant_contexts(connection: Any, chunk_size: int = 1000, after_id: int = 0,
+                          limit: Optional[int] = None) -> Iterator[List[ExecutionContext]]:
+
+
+    """
+    Stream stored grant evaluations as execution contexts, one chunk per query.
+
+    Rows are paged by primary key rather than offset, so each page costs the
+    same however deep into the table it is, and only one page is held at a
+    time. Each context carries the data the evaluation endpoint built for
+    the stored grant.
+
+    Args:
+        connection: DB-API connection, e.g. sqlite3 or psycopg2
+        chunk_size: Rows read per query
+        after_id: Only replay rows with a greater id
+        limit: Stop after this many rows
+    """
+    query = (
+        "SELECT id, grant_id, evaluation_timestamp, grant_data FROM grant_evaluations "
+        f"WHERE id > {_placeholder(connection)} ORDER BY id LIMIT {int(chunk_size)}"
+    )
+    remaining = limit
+    while remaining is None or remaining > 0:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, {'after_id': after_id} if query.endswith(':after_id') else (after_id,))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        if not rows:
+            return
+        if remaining is not None:
+            rows = rows[:remaining]
+            remaining -= len(rows)
+
+        chunk = []
+        for row_id, grant_id, evaluation_timestamp, grant_data in rows:
+            if isinstance(evaluation_timestamp, datetime):
+                evaluation_timestamp = evaluation_timestamp.isoformat()
+            data = grant_evaluation_data(_json_column(grant_data) or {}, evaluation_timestamp)
+            data["grant_id"] = grant_id
+            chunk.append(ExecutionContext(
+                context_type=ContextType.GRANT_EVALUATION,
+                context_id=f"grant-eval-{grant_id}-{row_id}",
+                data=data
+            ))
+        after_id = rows[-1][0]
+        yield chunk
+
+
+def replay_grant_evaluations(connection: Any, candidate_factory: ReplayEngineFactory,
+                             baseline_factory: Optional[ReplayEngineFactory] = None,
+                             mode: str = "grant_submission", max_workers: Optional[int] = None,
+                             chunk_size: int = 1000, limit: Optional[int] = None,
+                             max_examples: int = 100,
+                             progress: Optional[Callable[[ReplayReport], None]] = None) -> ReplayReport:
+
+
+    """
+    Replay every stored grant evaluation through the current rules and a candidate rule set.
+
+    Args:
+        connection: DB-API connection to the database holding ``grant_evaluations``
+        candidate_factory: Picklable factory for the edited rules, e.g.
+            ``bundle_engine_factory(path)`` for a bundle built from them
+        baseline_factory: Factory for the rules compared against; defaults
+            to the rule modules as currently loaded
+        mode: Evaluation mode replayed
+        max_workers: Worker processes; every core if omitted
+        chunk_size: Stored rows read and sent to a worker at a time
+        limit: Replay at most this many rows
+        max_examples: Differing rule outcomes kept as examples
+        progress: Called with the report so far after each chunk
+    """
+    from . import create_rule_engine
+
+    with RuleReplay(baseline_factory or create_rule_engine, candidate_factory,
+                    max_workers=max_workers, max_examples=max_examples) as replay:
+        return replay.replay(stored_grant_contexts(connection, chunk_size, limit=limit), mode, progress=progress)
@@ -54,6 +54,9 @@ class Condition:
     description: Optional[str] = None
     parameters: Dict[str, Any] = field(default_factory=dict)
     custom_evaluator: Optional[Callable] = None
+    # Expensive synchronous conditions are offloaded to a worker thread
+    # instead of being evaluated inline on the event loop
+    expensive: bool = False
 
     def __post_init__(self):
 
@@ -73,6 +76,8 @@ class Action:
     custom_executor: Optional[Callable] = None
     retry_on_failure: bool = False
     max_retries: int = 3
+    # Deadline for a single attempt; None uses the executor's default
+    timeout_seconds: Optional[float] = None
 
     def __post_init__(self):
 
@@ -178,6 +183,15 @@ class Rule:
     applicability_check: Optional[Callable[[ExecutionContext], bool]] = None
     tags: List[str] = field(default_factory=list)
     version: str = "1.0.0"
+    # Deterministic rules depend only on the context type and data, and their
+    # actions have no side effects, so their results may be cached
+    deterministic: bool = False
+    # Deadline for evaluating the rule and running its actions; None uses
+    # the engine's configured timeout
+    timeout_seconds: Optional[float] = None
+    # Names of rules that must succeed with their conditions met, in the
+    # same evaluation, before this rule is evaluated
+    depends_on: List[str] = field(default_factory=list)
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
 
@@ -197,7 +211,8 @@ class Rule:
                 {
                     'expression': c.expression,
                     'description': c.description,
-                    'parameters': c.parameters
+                    'parameters': c.parameters,
+                    'expensive': c.expensive
                 }
                 for c in self.conditions
             ],
@@ -207,7 +222,8 @@ class Rule:
                     'parameters': a.parameters,
                     'description': a.description,
                     'retry_on_failure': a.retry_on_failure,
-                    'max_retries': a.max_retries
+                    'max_retries': a.max_retries,
+                    'timeout_seconds': a.timeout_seconds
                 }
                 for a in self.actions
             ],
@@ -217,6 +233,9 @@ class Rule:
             'context_types': [ct.value for ct in (self.context_types or [])],
             'tags': self.tags,
             'version': self.version,
+            'deterministic': self.deterministic,
+            'timeout_seconds': self.timeout_seconds,
+            'depends_on': self.depends_on,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -232,7 +251,8 @@ class Rule:
                 Condition(
                     expression=c['expression'],
                     description=c.get('description'),
-                    parameters=c.get('parameters', {})
+                    parameters=c.get('parameters', {}),
+                    expensive=c.get('expensive', False)
                 )
                 for c in data.get('conditions', [])
             ],
@@ -242,7 +262,8 @@ class Rule:
                     parameters=a.get('parameters', {}),
                     description=a.get('description'),
                     retry_on_failure=a.get('retry_on_failure', False),
-                    max_retries=a.get('max_retries', 3)
+                    max_retries=a.get('max_retries', 3),
+                    timeout_seconds=a.get('timeout_seconds')
                 )
                 for a in data.get('actions', [])
             ],
@@ -253,5 +274,8 @@ class Rule:
                 ContextType(ct) for ct in data.get('context_types', [])
             ] if data.get('context_types') else None,
             tags=data.get('tags', []),
-            version=data.get('version', '1.0.0')
+            version=data.get('version', '1.0.0'),
+            deterministic=data.get('deterministic', False),
+            timeout_seconds=data.get('timeout_seconds'),
+            depends_on=data.get('depends_on', [])
         )
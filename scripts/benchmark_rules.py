@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""
+Movember AI Rules System - Rule Engine Benchmarks
+Micro and end-to-end benchmarks for rule evaluation performance.
+
+Usage:
+    python scripts/benchmark_rules.py modes [--iterations N]
+    python scripts/benchmark_rules.py cache-key [--iterations N] [--fields N]
+    python scripts/benchmark_rules.py missing-fields [--iterations N]
+    python scripts/benchmark_rules.py process-pool [--contexts N] [--workers N]
+    python scripts/benchmark_rules.py batch [--grants N] [--concurrency N]
+    python scripts/benchmark_rules.py vectorized [--grants N]
+    python scripts/benchmark_rules.py startup [--iterations N]
+    python scripts/benchmark_rules.py codegen [--grants N]
+    python scripts/benchmark_rules.py incremental [--edits N]
+    python scripts/benchmark_rules.py profiler [--iterations N] [--collapsed PATH]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rules.core.dependencies import analyse_rule
+from rules.core.hashing import structural_hash
+from rules.core import RuleEngineConfig
+from rules.core.evaluator import SubexpressionMemo, get_compiled_expression_cache
+from rules.domains.movember_ai import (
+    MODE_CATEGORIES, MovemberAIRulesEngine, build_rules_bundle, create_movember_engine,
+    create_rule_engine, evaluate_grant_application, evaluate_grant_applications, get_movember_engine
+)
+from rules.domains.movember_ai.grant_rules import GRANT_RULES
+from rules.types import ContextType, ExecutionContext
+
+# Sample payloads representative of production contexts
+SAMPLE_GRANT = {
+    "grant_id": "GRANT-BENCH-001",
+    "title": "Men's Health Research Initiative",
+    "status": "submitted",
+    "budget": 750000,
+    "timeline_months": 24,
+    "impact_metrics": [
+        {"name": "Health Screenings", "target": 5000},
+        {"name": "Research Publications", "target": 15}
+    ],
+    "sdg_alignment": ["SDG3", "SDG10"],
+    "sustainability_plan": "detailed",
+    "risk_mitigation": "comprehensive",
+    "partnerships": ["universities", "hospitals"],
+    "innovation_score": 8.5,
+    "application_fields": {"missing": []},
+    "project_id": "movember"
+}
+
+SAMPLE_REPORT = {
+    "report_id": "IMPACT-BENCH-001",
+    "type": "impact",
+    "frameworks": ["ToC", "CEMP", "SDG"],
+    "outputs": [{"name": "Health Screenings", "count": 5200}],
+    "outcomes": [{"name": "Improved Health Awareness", "metric": "85% improvement"}],
+    "stakeholders": ["executive", "funder"],
+    "visualizations": ["charts"],
+    "attribution": "clear",
+    "data_gaps": [],
+    "project_id": "movember"
+}
+
+MODE_CONTEXTS = {
+    "grant_submission": (ContextType.GRANT_EVALUATION, SAMPLE_GRANT),
+    "reporting": (ContextType.IMPACT_REPORTING, SAMPLE_REPORT),
+    "ai_behaviour": (ContextType.AI_BEHAVIOUR, {"agent_data": {"role": "impact_intelligence", "confidence": 0.7}}),
+    "context_validation": (ContextType.PROJECT_VALIDATION, {"project_id": "movember"}),
+    "weekly_maintenance": (ContextType.BUSINESS_PROCESS, {"project_id": "movember"})
+}
+
+
+def make_context(context_type: ContextType, data: Dict) -> ExecutionContext:
+
+
+    """Build a fresh execution context for one benchmark iteration."""
+    return ExecutionContext(
+        context_type=context_type,
+        context_id="benchmark",
+        data=dict(data),
+        timestamp=datetime.now()
+    )
+
+
+def time_async(func: Callable, iterations: int) -> Dict[str, float]:
+
+
+    """Time an async callable over a number of iterations, in milliseconds."""
+    async def run() -> List[float]:
+        # Warm up caches before measuring
+        await func()
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await func()
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+    samples = asyncio.run(run())
+    return {
+        "mean_ms": statistics.mean(samples),
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples)
+    }
+
+
+def benchmark_modes(args: argparse.Namespace) -> None:
+
+
+    """Compare per-mode latency of evaluating the full catalogue against the mode's subset."""
+    engine = create_movember_engine()
+
+    print(f"{'mode':<22}{'rules (all)':>12}{'rules (mode)':>14}{'all ms':>10}{'mode ms':>10}{'speedup':>9}")
+    for mode in MODE_CATEGORIES:
+        if mode not in MODE_CONTEXTS:
+            continue
+        context_type, data = MODE_CONTEXTS[mode]
+
+        all_rules = len(engine.engine._find_applicable_rules(make_context(context_type, data)))
+        mode_rules = len(engine.engine._find_applicable_rules(make_context(context_type, data), mode=mode))
+
+        # Before: every mode evaluated the whole catalogue
+        before = time_async(
+            lambda: engine.engine.evaluate_async(make_context(context_type, data)), args.iterations
+        )
+        after = time_async(
+            lambda: engine.evaluate_context(make_context(context_type, data), mode=mode), args.iterations
+        )
+
+        print(
+            f"{mode:<22}{all_rules:>12}{mode_rules:>14}"
+            f"{before['median_ms']:>10.2f}{after['median_ms']:>10.2f}"
+            f"{before['median_ms'] / after['median_ms']:>8.1f}x"
+        )
+
+
+def time_sync(func: Callable, iterations: int) -> Dict[str, float]:
+
+
+    """Time a callable over a number of iterations, in microseconds."""
+    func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return {
+        "mean_us": statistics.mean(samples),
+        "median_us": statistics.median(samples)
+    }
+
+
+def make_large_grant(extra_fields: int) -> Dict[str, Any]:
+
+
+    """Build a grant payload padded with fields no rule reads, as full application forms are."""
+    data = dict(SAMPLE_GRANT)
+    for n in range(extra_fields):
+        data[f"application_section_{n}"] = {
+            "answer": "Community-led screening programme " * 4,
+            "reviewers": ["panel_a", "panel_b"],
+            "score": n % 10
+        }
+    return data
+
+
+def benchmark_cache_key(args: argparse.Namespace) -> None:
+
+
+    """Compare RuleCache key generation: JSON + MD5 against structural hashing."""
+    data = make_large_grant(args.fields)
+    payload = {"rule": "fingerprint", "context_type": "grant_evaluation", "data": data}
+
+    def json_md5() -> str:
+        return hashlib.md5(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def structural() -> str:
+        return structural_hash(payload)
+
+    fields = frozenset()
+    for rule in GRANT_RULES:
+        fields |= analyse_rule(rule).top_level_fields or frozenset(data)
+
+    def structural_referenced() -> str:
+        subset = {name: data[name] for name in fields if name in data}
+        return structural_hash({"rule": "fingerprint", "context_type": "grant_evaluation", "data": subset})
+
+    print(f"payload: {len(data)} fields; grant rules reference {len(fields)} field names")
+    print(f"{'method':<34}{'median us':>12}{'speedup':>9}")
+    baseline = None
+    for name, func in (
+        ("json.dumps + md5 (full data)", json_md5),
+        ("structural hash (full data)", structural),
+        ("structural hash (referenced)", structural_referenced)
+    ):
+        timing = time_sync(func, args.iterations)
+        baseline = baseline or timing['median_us']
+        print(f"{name:<34}{timing['median_us']:>12.1f}{baseline / timing['median_us']:>8.1f}x")
+
+
+def benchmark_missing_fields(args: argparse.Namespace) -> None:
+
+
+    """Compare full-catalogue evaluation with and without skipping rules whose fields are absent."""
+    engine = create_movember_engine().engine
+    engine.result_cache = None
+
+    print(f"{'context':<22}{'rules':>7}{'skipped':>9}{'eval ms':>10}{'skip ms':>10}{'speedup':>9}")
+    for mode, (context_type, data) in MODE_CONTEXTS.items():
+        results = engine.evaluate(make_context(context_type, data))
+        skipped = sum(1 for result in results if result.metadata.get('skipped') == 'missing_fields')
+
+        engine.config.skip_missing_fields = False
+        before = time_async(lambda: engine.evaluate_async(make_context(context_type, data)), args.iterations)
+        engine.config.skip_missing_fields = True
+        after = time_async(lambda: engine.evaluate_async(make_context(context_type, data)), args.iterations)
+
+        print(
+            f"{mode:<22}{len(results):>7}{skipped:>9}"
+            f"{before['median_ms']:>10.2f}{after['median_ms']:>10.2f}"
+            f"{before['median_ms'] / after['median_ms']:>8.1f}x"
+        )
+
+
+# Contexts per worker evaluated before timing the pool
+SHARD_WARMUP = 4
+
+# Portfolio re-scoring needs neither cached results nor an audit tail
+POOL_CONFIG = RuleEngineConfig(enable_result_cache=False, enable_audit_trail=False, process_pool_min_batch=1)
+
+
+def quiet_rule_engine():
+
+
+    """Worker engine factory; workers do not inherit the benchmark's logging settings."""
+    logging.disable(logging.CRITICAL)
+    return create_rule_engine(POOL_CONFIG)
+
+
+def benchmark_process_pool(args: argparse.Namespace) -> None:
+
+
+    """Compare re-scoring a grant portfolio in-process against sharding it across worker processes."""
+    engine = create_rule_engine(POOL_CONFIG)
+    portfolio = [
+        make_context(ContextType.GRANT_EVALUATION,
+                     {**SAMPLE_GRANT, "grant_id": f"GRANT-{n:05d}", "budget": 50000 * (n % 40)})
+        for n in range(args.contexts)
+    ]
+
+    start = time.perf_counter()
+    engine.evaluate_many(portfolio)
+    in_process = time.perf_counter() - start
+
+    engine.enable_process_pool(quiet_rule_engine, max_workers=args.workers)
+    try:
+        # Start the workers and load their rules before timing
+        engine.evaluate_many(portfolio[:engine.process_pool.max_workers * SHARD_WARMUP])
+        start = time.perf_counter()
+        engine.evaluate_many(portfolio)
+        pooled = time.perf_counter() - start
+    finally:
+        engine.shutdown()
+
+    workers = args.workers or os.cpu_count()
+    print(f"{args.contexts} grant contexts, {workers} workers ({os.cpu_count()} cores)")
+    print(f"{'mode':<14}{'seconds':>10}{'contexts/s':>12}{'speedup':>9}")
+    for name, elapsed in (("in-process", in_process), ("process pool", pooled)):
+        print(f"{name:<14}{elapsed:>10.2f}{args.contexts / elapsed:>12.0f}{in_process / elapsed:>8.1f}x")
+
+
+def benchmark_batch(args: argparse.Namespace) -> None:
+
+
+    """Compare looping over evaluate_grant_application with one evaluate_grant_applications call."""
+    grants = [{**SAMPLE_GRANT, "grant_id": f"GRANT-{n:05d}", "budget": 50000 * (n % 40)}
+              for n in range(args.grants)]
+    # Both methods use the process-wide engine; build it before timing either
+    engine = get_movember_engine()
+
+    async def reset() -> None:
+        # Neither run may be served results cached by the other
+        if engine.engine.result_cache is not None:
+            await engine.engine.result_cache.clear()
+        if engine.engine.metrics is not None:
+            engine.engine.metrics.reset()
+
+    async def one_at_a_time() -> None:
+        for grant in grants:
+            await evaluate_grant_application(grant)
+
+    async def batched() -> Dict[str, Any]:
+        async for _ in evaluate_grant_applications(grants, concurrency=args.concurrency):
+            pass
+        return engine.get_metrics()
+
+    asyncio.run(reset())
+    start = time.perf_counter()
+    asyncio.run(one_at_a_time())
+    looped = time.perf_counter() - start
+
+    asyncio.run(reset())
+    start = time.perf_counter()
+    metrics = asyncio.run(batched())
+    batch = time.perf_counter() - start
+
+    throughput = metrics["system_metrics"]["context_throughput"]
+    print(f"{args.grants} grant applications, concurrency {args.concurrency}")
+    print(f"{'method':<34}{'seconds':>10}{'grants/s':>10}{'speedup':>9}")
+    for name, elapsed in (("evaluate_grant_application loop", looped),
+                          ("evaluate_grant_applications", batch)):
+        print(f"{name:<34}{elapsed:>10.2f}{args.grants / elapsed:>10.0f}{looped / elapsed:>8.1f}x")
+    print(f"MetricsCollector contexts/s: {throughput['contexts_per_second']:.0f}")
+
+
+def benchmark_vectorized(args: argparse.Namespace) -> None:
+
+
+    """Compare conditions evaluated over a grant DataFrame with a per-grant loop."""
+    import pandas as pd
+
+    grants = [
+        {**SAMPLE_GRANT, "grant_id": f"GRANT-{n:05d}", "budget": 50000 * (n % 40),
+         "innovation_score": n % 10, "operation_data": {"mission_alignment_score": (n % 10) / 10}}
+        for n in range(args.grants)
+    ]
+    frame = pd.DataFrame(grants)
+    engine = create_rule_engine(POOL_CONFIG)
+    rules = engine._get_index().select(ContextType.GRANT_EVALUATION)
+
+    def row_wise() -> int:
+
+
+        contexts = [make_context(ContextType.GRANT_EVALUATION, grant) for grant in grants]
+        return sum(
+            engine.evaluator.evaluate_conditions(rule.conditions, context)
+            for context in contexts for rule in rules
+        )
+
+    start = time.perf_counter()
+    matched = row_wise()
+    looped = time.perf_counter() - start
+
+    start = time.perf_counter()
+    masks = engine.evaluate_frame(frame)
+    vectorized = time.perf_counter() - start
+
+    assert int(masks.to_numpy().sum()) == matched
+    stats = engine._vectorized.stats
+    print(f"{args.grants} grants x {len(rules)} rules, "
+          f"{stats['vectorized']} conditions vectorized, {stats['fallback']} row-wise")
+    print(f"{'method':<22}{'seconds':>10}{'grants/s':>12}{'speedup':>9}")
+    for name, elapsed in (("per-grant loop", looped), ("evaluate_frame", vectorized)):
+        print(f"{name:<22}{elapsed:>10.3f}{args.grants / elapsed:>12.0f}{looped / elapsed:>8.1f}x")
+
+
+def benchmark_startup(args: argparse.Namespace) -> None:
+
+
+    """Compare a worker loading the rule catalogue from the rule modules with loading a precompiled bundle."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rules.bundle")
+        build_rules_bundle(path, POOL_CONFIG)
+
+        def start(bundle_path: str) -> Callable[[], None]:
+            def run() -> None:
+                # A new worker starts with nothing compiled
+                get_compiled_expression_cache().clear()
+                MovemberAIRulesEngine(POOL_CONFIG, bundle_path=bundle_path).engine.compile_rules()
+            return run
+
+        results = {
+            "rule modules": time_sync(start(""), args.iterations),
+            "bundle": time_sync(start(path), args.iterations)
+        }
+        print(f"bundle of {os.path.getsize(path)} bytes; time until every rule is analysed and compiled")
+
+    baseline = results["rule modules"]["median_us"]
+    print(f"{'source':<16}{'mean ms':>10}{'median ms':>12}{'speedup':>9}")
+    for name, timing in results.items():
+        print(f"{name:<16}{timing['mean_us'] / 1000:>10.2f}{timing['median_us'] / 1000:>12.2f}"
+              f"{baseline / timing['median_us']:>8.1f}x")
+
+
+def benchmark_codegen(args: argparse.Namespace) -> None:
+
+
+    """Compare interpreted condition expressions with generated rule functions."""
+    interpreted = create_rule_engine(POOL_CONFIG)
+    generated = create_rule_engine(replace(POOL_CONFIG, enable_codegen=True))
+    rules = generated._get_index().select(ContextType.GRANT_EVALUATION)
+    programs = [generated.snapshot.programs[rule.name] for rule in rules]
+    contexts = [
+        make_context(ContextType.GRANT_EVALUATION,
+                     {**SAMPLE_GRANT, "grant_id": f"GRANT-{n:05d}", "budget": 50000 * (n % 40),
+                      "operation_data": {"mission_alignment_score": (n % 10) / 10, "focus": "men_health"}})
+        for n in range(args.grants)
+    ]
+
+    def interpret() -> int:
+
+
+        evaluator = interpreted.evaluator
+        return sum(evaluator.evaluate_conditions(rule.conditions, context)
+                   for context in contexts for rule in rules)
+
+    def run_generated(programs: List[Callable]) -> Callable[[], int]:
+        def run() -> int:
+            get_environment = generated.evaluator.condition_evaluator.get_environment
+            matched = 0
+            for context in contexts:
+                environment = get_environment(context)
+                environment.memo = SubexpressionMemo()
+                matched += sum(program(environment) for program in programs)
+            return matched
+        return run
+
+    async def evaluate(engine) -> None:
+        for context in contexts:
+            await engine.evaluate_async(context, mode="grant_submission")
+
+    timings, matched = {}, set()
+    # Compiling rules one at a time shares no sub-expressions between them
+    unshared = [generated.rule_compiler.compile_rule(rule) for rule in rules]
+    for name, run in (("conditions, eval", interpret), ("conditions, codegen", run_generated(programs)),
+                      ("conditions, codegen w/o CSE", run_generated(unshared))):
+        samples = []
+        for _ in range(3):
+            start = time.perf_counter()
+            matched.add(run())
+            samples.append(time.perf_counter() - start)
+        timings[name] = min(samples)
+    assert len(matched) == 1
+    for name, engine in (("evaluate_async, eval", interpreted), ("evaluate_async, codegen", generated)):
+        start = time.perf_counter()
+        asyncio.run(evaluate(engine))
+        timings[name] = time.perf_counter() - start
+
+    print(f"{args.grants} grants x {len(rules)} rules, {len(programs)} generated")
+    print(f"{'method':<30}{'seconds':>10}{'grants/s':>10}{'speedup':>9}")
+    for name, elapsed in timings.items():
+        baseline = timings[name.split(",")[0] + ", eval"]
+        print(f"{name:<30}{elapsed:>10.3f}{args.grants / elapsed:>10.0f}{baseline / elapsed:>8.1f}x")
+    print(f"shared sub-expressions: {generated.get_subexpression_stats()}")
+
+
+# Single-field edits made to a grant draft between re-evaluations
+DRAFT_EDITS = [
+    ("budget", [5000, 250000, 750000, 2000000]),
+    ("title", ["Men's Health Research Initiative", "Untitled draft"]),
+    ("timeline_months", [6, 24, 48]),
+    ("sustainability_plan", ["detailed", "outline"]),
+    ("partnerships", [["universities"], ["universities", "hospitals"]])
+]
+
+
+def benchmark_incremental(args: argparse.Namespace) -> None:
+
+
+    """Compare re-evaluating the whole catalogue after each draft edit against incremental re-evaluation."""
+    engine = create_movember_engine(RuleEngineConfig(enable_result_cache=False, enable_audit_trail=False)).engine
+    drafts = []
+    draft = dict(SAMPLE_GRANT)
+    for n in range(args.edits):
+        name, values = DRAFT_EDITS[n % len(DRAFT_EDITS)]
+        draft = {**draft, name: values[n % len(values)]}
+        drafts.append(draft)
+
+    async def edit(evaluate: Callable) -> int:
+        reused = 0
+        for data in drafts:
+            results = await evaluate(make_context(ContextType.GRANT_EVALUATION, data), mode="grant_submission")
+            reused += sum(1 for result in results if result.metadata.get("reused"))
+        return reused
+
+    full = time_async(lambda: edit(engine.evaluate_async), 5)
+    incremental = time_async(lambda: edit(engine.evaluate_incremental_async), 5)
+    reused = asyncio.run(edit(engine.evaluate_incremental_async))
+    rules = len(engine._find_applicable_rules(make_context(ContextType.GRANT_EVALUATION, SAMPLE_GRANT),
+                                              mode="grant_submission"))
+
+    print(f"{args.edits} edits, {rules} rules per evaluation, {reused / args.edits:.1f} results reused per edit")
+    print(f"{'method':<18}{'ms/edit':>10}{'speedup':>9}")
+    for name, timing in (("full", full), ("incremental", incremental)):
+        print(f"{name:<18}{timing['median_ms'] / args.edits:>10.3f}{full['median_ms'] / timing['median_ms']:>8.1f}x")
+
+
+def benchmark_profiler(args: argparse.Namespace) -> None:
+
+
+    """Measure the sampling profiler's overhead at several sample rates and show what it finds."""
+    engine = None
+    baseline = None
+    print(f"{'sample rate':<14}{'median ms':>10}{'overhead':>10}")
+    for rate in (0.0, 0.01, 0.1, 1.0):
+        engine = create_rule_engine(RuleEngineConfig(
+            enable_result_cache=False, enable_audit_trail=False, profile_sample_rate=rate
+        ))
+        timing = time_async(
+            lambda: engine.evaluate_async(make_context(ContextType.GRANT_EVALUATION, SAMPLE_GRANT),
+                                          mode="grant_submission"),
+            args.iterations
+        )
+        baseline = baseline or timing["median_ms"]
+        print(f"{rate:<14}{timing['median_ms']:>10.3f}{timing['median_ms'] / baseline - 1:>+10.1%}")
+
+    report = engine.get_profile_report(limit=5)
+    print(f"\nHot conditions over {report['sampled_evaluations']} sampled evaluations:")
+    for entry in report["conditions"]:
+        print(f"  {entry['mean_wall_time'] * 1e6:>8.1f} us  {entry['rule_name']}: {entry['label']}")
+    if args.collapsed:
+        engine.profiler.export_collapsed_stacks(args.collapsed)
+        print(f"Collapsed stacks written to {args.collapsed}")
+
+
+def main() -> None:
+
+
+    parser = argparse.ArgumentParser(description="Rule engine benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    modes_parser = subparsers.add_parser("modes", help="Per-mode evaluation latency")
+    modes_parser.add_argument("--iterations", type=int, default=200)
+    modes_parser.set_defaults(func=benchmark_modes)
+
+    cache_key_parser = subparsers.add_parser("cache-key", help="Result cache key generation")
+    cache_key_parser.add_argument("--iterations", type=int, default=2000)
+    cache_key_parser.add_argument("--fields", type=int, default=200,
+                                  help="Unreferenced fields to pad the grant payload with")
+    cache_key_parser.set_defaults(func=benchmark_cache_key)
+
+    missing_fields_parser = subparsers.add_parser("missing-fields", help="Skipping rules whose inputs are absent")
+    missing_fields_parser.add_argument("--iterations", type=int, default=200)
+    missing_fields_parser.set_defaults(func=benchmark_missing_fields)
+
+    pool_parser = subparsers.add_parser("process-pool", help="Portfolio re-scoring across worker processes")
+    pool_parser.add_argument("--contexts", type=int, default=5000)
+    pool_parser.add_argument("--workers", type=int, default=None)
+    pool_parser.set_defaults(func=benchmark_process_pool)
+
+    batch_parser = subparsers.add_parser("batch", help="Batch grant evaluation against a per-grant loop")
+    batch_parser.add_argument("--grants", type=int, default=500)
+    batch_parser.add_argument("--concurrency", type=int, default=32)
+    batch_parser.set_defaults(func=benchmark_batch)
+
+    vectorized_parser = subparsers.add_parser("vectorized", help="Rule conditions over a grant DataFrame")
+    vectorized_parser.add_argument("--grants", type=int, default=10000)
+    vectorized_parser.set_defaults(func=benchmark_vectorized)
+
+    startup_parser = subparsers.add_parser("startup", help="Loading the rule catalogue from a precompiled bundle")
+    startup_parser.add_argument("--iterations", type=int, default=50)
+    startup_parser.set_defaults(func=benchmark_startup)
+
+    codegen_parser = subparsers.add_parser("codegen", help="Generated rule functions against eval")
+    codegen_parser.add_argument("--grants", type=int, default=2000)
+    codegen_parser.set_defaults(func=benchmark_codegen)
+
+    incremental_parser = subparsers.add_parser("incremental", help="Re-evaluating a grant draft after each edit")
+    incremental_parser.add_argument("--edits", type=int, default=200)
+    incremental_parser.set_defaults(func=benchmark_incremental)
+
+    profiler_parser = subparsers.add_parser("profiler", help="Sampling profiler overhead and hot conditions")
+    profiler_parser.add_argument("--iterations", type=int, default=2000)
+    profiler_parser.add_argument("--collapsed", help="Write the profile as collapsed stacks to this file")
+    profiler_parser.set_defaults(func=benchmark_profiler)
+
+    args = parser.parse_args()
+
+    # Rule actions and evaluation errors log heavily; keep them out of the timings
+    logging.disable(logging.CRITICAL)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
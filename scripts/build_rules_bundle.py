@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Movember AI Rules System - Rule Bundle Build Step
+Precompiles the Movember rule catalogue into a bundle that workers load at
+startup when MOVEMBER_RULES_BUNDLE points at it.
+
+Usage:
+    python scripts/build_rules_bundle.py [OUTPUT]
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rules.core.bundle import read_bundle
+from rules.domains.movember_ai import RULES_BUNDLE_ENV, build_rules_bundle
+
+
+def main() -> None:
+
+
+    parser = argparse.ArgumentParser(description="Build the precompiled Movember rule bundle")
+    parser.add_argument("output", nargs="?", default="movember_rules.bundle")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    build_rules_bundle(args.output)
+    header = read_bundle(args.output).header
+    print(f"Wrote {header['rules']} rules to {args.output} ({header['sha256'][:12]})")
+    print(f"Set {RULES_BUNDLE_ENV}={os.path.abspath(args.output)} to load it at startup")
+
+
+if __name__ == "__main__":
+    main()
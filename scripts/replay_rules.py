@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Movember AI Rules System - Rule Change Replay
+Replays every stored grant evaluation through the current rule catalogue
+and an edited one, and reports the rules whose outcomes change.
+
+Build the edited catalogue into a bundle first, from the checkout with the
+rule edits:
+
+    python scripts/build_rules_bundle.py candidate.bundle
+
+Usage:
+    python scripts/replay_rules.py candidate.bundle [--database URL] [--baseline BUNDLE]
+        [--workers N] [--chunk-size N] [--limit N] [--mode MODE] [--json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rules.core.replay import ReplayReport, bundle_engine_factory
+from rules.domains.movember_ai.replay import replay_grant_evaluations
+
+
+def connect(database: str):
+
+
+    """Open a DB-API connection from a DATABASE_URL style URL or a SQLite path."""
+    url = urlparse(database)
+    if url.scheme.startswith("postgres"):
+        import psycopg2
+        return psycopg2.connect(database)
+    if url.scheme == "sqlite":
+        return sqlite3.connect(database[len("sqlite:///"):])
+    return sqlite3.connect(database)
+
+
+def print_progress(report: ReplayReport) -> None:
+
+
+    print(f"\r{report.contexts} contexts, {report.changed_contexts} changed, "
+          f"{report.throughput:.0f}/s", end="", file=sys.stderr, flush=True)
+
+
+def main() -> None:
+
+
+    parser = argparse.ArgumentParser(description="Replay stored grant evaluations through edited rules")
+    parser.add_argument("candidate", help="Rule bundle built from the edited rule modules")
+    parser.add_argument("--database", default=os.getenv("DATABASE_URL", "sqlite:///movember_ai.db"))
+    parser.add_argument("--baseline", help="Rule bundle to compare against; the current rule modules by default")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--mode", default="grant_submission")
+    parser.add_argument("--examples", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    connection = connect(args.database)
+    try:
+        report = replay_grant_evaluations(
+            connection,
+            bundle_engine_factory(args.candidate),
+            bundle_engine_factory(args.baseline) if args.baseline else None,
+            mode=args.mode,
+            max_workers=args.workers,
+            chunk_size=args.chunk_size,
+            limit=args.limit,
+            max_examples=args.examples,
+            progress=None if args.json else print_progress
+        )
+    finally:
+        connection.close()
+
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+        return
+
+    print(file=sys.stderr)
+    print(f"Replayed {report.contexts} contexts in {report.elapsed_seconds:.1f}s "
+          f"({report.throughput:.0f} contexts/s), {report.errors} errors")
+    print(f"{report.changed_contexts} contexts changed outcome")
+    for rule, count in report.changed_rules.items():
+        moves = ", ".join(
+            f"{baseline} -> {candidate}: {moved}"
+            for (baseline, candidate), moved in report.transitions[rule].items()
+        )
+        print(f"  {rule:<48}{count:>8}  ({moves})")
+    if report.examples:
+        print("Examples:")
+        for diff in report.examples:
+            print(f"  {diff.context_id}: {diff.rule_name} {diff.baseline} -> {diff.candidate}")
+
+
+if __name__ == "__main__":
+    main()
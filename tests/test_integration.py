@@ -6,16 +6,21 @@ Comprehensive testing of the complete rule evaluation workflow.
 
 import asyncio
 import pytest
+import threading
 import time
 from datetime import datetime
 from typing import Dict, List, Any
 
 from rules.domains.movember_ai import (
     MovemberAIRulesEngine,
+    RULES_BUNDLE_ENV,
+    build_rules_bundle,
     create_movember_engine,
     validate_movember_operation,
     run_movember_impact_analysis,
     evaluate_grant_application,
+    evaluate_grant_applications,
+    get_movember_engine,
     run_weekly_refactor
 )
 from rules.types import ExecutionContext, ContextType, RulePriority
@@ -369,6 +374,46 @@ class TestMovemberAIRulesIntegration:
 
         print(f"Async execution test completed: {execution_time:.2f}s for 5 concurrent evaluations")
 
+    @pytest.mark.asyncio
+    async def test_mode_evaluates_only_its_rule_subset(self, engine, sample_grant_application):
+        """Test that a mode only evaluates the rule categories registered for it."""
+        from rules.domains.movember_ai.grant_rules import GRANT_RULES
+        from rules.domains.movember_ai.context import PROJECT_RULES
+
+        context = ExecutionContext(
+            context_type=ContextType.GRANT_EVALUATION,
+            context_id="mode-subset-test",
+            data=sample_grant_application,
+            user_id="test-user",
+            timestamp=datetime.now()
+        )
+
+        grant_results = await engine.evaluate_context(context, mode="grant_submission")
+        all_results = await engine.evaluate_context(context, mode="default")
+
+        expected_names = {rule.name for rule in GRANT_RULES + PROJECT_RULES}
+        assert {r["rule_name"] for r in grant_results} == expected_names
+        assert len(all_results) > len(grant_results)
+
+
+    @pytest.mark.asyncio
+    async def test_incremental_evaluation_of_grant_draft(self, engine, sample_grant_application):
+        """Test that re-evaluating an edited draft reuses unaffected results and matches a full run."""
+        def outcome(results):
+            return [(r["rule_name"], r["success"], r["conditions_met"]) for r in results]
+
+        def context(data):
+            return ExecutionContext(
+                context_type=ContextType.GRANT_EVALUATION, context_id="draft-edit-test", data=dict(data)
+            )
+
+        await engine.evaluate_context(context(sample_grant_application), "grant_submission", incremental=True)
+        edited = {**sample_grant_application, "budget": 5000}
+        results = await engine.evaluate_context(context(edited), "grant_submission", incremental=True)
+
+        assert outcome(results) == outcome(await engine.evaluate_context(context(edited), "grant_submission"))
+        reused = [r for r in results if r["metadata"].get("reused")]
+        assert 0 < len(reused) < len(results)
 
 class TestMovemberOperations:
     """Test Movember-specific operations."""
@@ -409,6 +454,184 @@ class TestMovemberOperations:
         assert results is not None
         assert "evaluation" in results
 
+    @pytest.mark.asyncio
+    async def test_evaluate_grant_applications(self):
+        """Test batch grant evaluation with one engine."""
+        grants = [
+            {"grant_id": f"TEST-{n:03d}", "budget": 100000 * n, "timeline_months": 6,
+             "impact_metrics": [{"name": "test", "target": 10}], "sdg_alignment": ["SDG3"]}
+            for n in range(1, 6)
+        ]
+
+        evaluations = [e async for e in evaluate_grant_applications(grants, concurrency=2)]
+
+        assert sorted(e["index"] for e in evaluations) == list(range(5))
+        for evaluation in evaluations:
+            single = await evaluate_grant_application(grants[evaluation["index"]])
+            assert evaluation["grant_id"] == grants[evaluation["index"]]["grant_id"]
+            assert evaluation["recommendation"] == single["recommendation"]
+            assert [r["conditions_met"] for r in evaluation["results"]] == \
+                [r["conditions_met"] for r in single["results"]]
+
+
+    @pytest.mark.asyncio
+    async def test_grant_helpers_use_shared_engine(self, monkeypatch):
+        """The grant evaluation helpers reuse the process-wide engine instead of building one per call."""
+        get_movember_engine()
+
+        def fail():
+            raise AssertionError("built a new engine")
+
+        monkeypatch.setattr(MovemberAIRulesEngine, "_load_all_rules", lambda self, *args: fail())
+        grant = {"grant_id": "TEST-SHARED", "budget": 100000, "sdg_alignment": ["SDG3"]}
+
+        assert "evaluation" in await evaluate_grant_application(grant)
+        assert [e["grant_id"] async for e in evaluate_grant_applications([grant])] == ["TEST-SHARED"]
+
+    def test_shared_engine_hot_reloads_rules(self):
+
+
+        """The process-wide engine is created once and reloads rules as a new snapshot."""
+        engine = get_movember_engine()
+        assert get_movember_engine() is engine
+
+        rules = dict(engine.engine.rules)
+        version = engine.engine.rules_version
+        assert engine.reload_rules() == version + 1
+        assert sorted(engine.engine.rules) == sorted(rules)
+        assert engine.engine.modes["grant_submission"] == frozenset({"project", "grant"})
+
+    @pytest.mark.asyncio
+    async def test_async_reload_swaps_rules_on_the_loop(self, monkeypatch):
+        """Only the rule module import leaves the event loop; evaluations in flight keep running."""
+        engine = create_movember_engine()
+        loop_thread = threading.get_ident()
+        install_threads = []
+        install_rules = engine._install_rules
+
+        def record_install(rules, tags):
+            install_threads.append(threading.get_ident())
+            return install_rules(rules, tags)
+
+        monkeypatch.setattr(engine, "_install_rules", record_install)
+        version = engine.engine.rules_version
+        grant = {"grant_id": "TEST-RELOAD", "budget": 100000, "sdg_alignment": ["SDG3"]}
+        context = ExecutionContext(context_type=ContextType.GRANT_EVALUATION, context_id="reload", data=grant)
+
+        evaluations = [asyncio.ensure_future(engine.evaluate_context(context, mode="grant_submission"))
+                       for _ in range(5)]
+        assert await engine.reload_rules_async() == version + 1
+        assert all(await asyncio.gather(*evaluations))
+        assert install_threads == [loop_thread]
+
+    def test_engine_starts_from_rule_bundle(self, tmp_path, monkeypatch):
+
+
+        """Workers load a current bundle and fall back to the rule modules if it is stale."""
+        path = str(tmp_path / "movember.bundle")
+        build_rules_bundle(path)
+        expected = create_movember_engine().engine.snapshot
+
+        monkeypatch.setenv(RULES_BUNDLE_ENV, path)
+        monkeypatch.setattr(MovemberAIRulesEngine, "_load_all_rules", lambda self: pytest.fail("bundle not used"))
+        snapshot = create_movember_engine().engine.snapshot
+        assert dict(snapshot.fingerprints) == dict(expected.fingerprints)
+        assert dict(snapshot.modes) == dict(expected.modes)
+        monkeypatch.undo()
+
+        monkeypatch.setattr("rules.domains.movember_ai.catalogue_digest", lambda: "edited")
+        stale = MovemberAIRulesEngine(bundle_path=path)
+        assert dict(stale.engine.snapshot.fingerprints) == dict(expected.fingerprints)
+
+
+
+class TestGrantEvaluationReplay:
+    """Test replaying stored grant evaluations through edited rules."""
+
+    @pytest.fixture
+    def database(self, tmp_path):
+
+
+        """SQLite database holding stored grant evaluations."""
+        import json
+        import sqlite3
+
+        connection = sqlite3.connect(str(tmp_path / "evaluations.db"))
+        connection.execute("""
+            CREATE TABLE grant_evaluations (
+                id INTEGER PRIMARY KEY, grant_id TEXT NOT NULL, evaluation_timestamp TIMESTAMP NOT NULL,
+                overall_score DECIMAL(3,3) NOT NULL, recommendation TEXT NOT NULL,
+                ml_predictions JSON, rules_evaluation JSON, grant_data JSON
+            )
+        """)
+        connection.executemany(
+            "INSERT INTO grant_evaluations (grant_id, evaluation_timestamp, overall_score, recommendation, grant_data) "
+            "VALUES (?, ?, 0.5, 'APPROVE', ?)",
+            [(f"G-{n}", "2026-01-01T00:00:00",
+              json.dumps({"title": "Research", "budget": 300000 * n, "timeline_months": 6 + n}))
+             for n in range(10)]
+        )
+        yield connection
+        connection.close()
+
+    def test_stored_contexts_streamed_in_chunks(self, database):
+        """Test that stored rows are paged by id into contexts carrying the evaluated data."""
+        from rules.domains.movember_ai.replay import stored_grant_contexts
+
+        chunks = list(stored_grant_contexts(database, chunk_size=4))
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        first = chunks[0][0]
+        assert first.context_id == "grant-eval-G-0-1"
+        assert first.data["grant_id"] == "G-0" and first.data["budget"] == 0
+        assert first.data["organisation"] == "" and first.data["evaluation_timestamp"] == "2026-01-01T00:00:00"
+
+        assert [len(chunk) for chunk in stored_grant_contexts(database, chunk_size=4, limit=5)] == [4, 1]
+        assert [c.data["grant_id"] for c in next(stored_grant_contexts(database, after_id=8))] == ["G-8", "G-9"]
+
+    def test_replay_reports_outcome_changes(self, database, tmp_path):
+        """Test that replaying through an edited rule reports exactly the contexts it changes."""
+        from dataclasses import replace
+        from rules.core.replay import REPLAY_CONFIG, bundle_engine_factory
+        from rules.domains.movember_ai import create_rule_engine
+        from rules.domains.movember_ai.replay import replay_grant_evaluations
+        from rules.types import Condition
+
+        engine = create_rule_engine(REPLAY_CONFIG)
+        results = engine.evaluate(_stored_context({"budget": 2000000, "timeline_months": 6}), mode="grant_submission")
+        # Replays never run actions
+        assert any(r.conditions_met for r in results) and not any(r.action_results for r in results)
+
+        baseline = str(tmp_path / "baseline.bundle")
+        engine.save_bundle(baseline)
+        rule = engine.rules["budget_realism_validation"]
+        engine.add_rule(replace(rule, conditions=[Condition("grant.budget > 500000"), rule.conditions[1]]),
+                        tags=engine.snapshot.rule_tags[rule.name])
+        candidate = str(tmp_path / "candidate.bundle")
+        engine.save_bundle(candidate)
+
+        report = replay_grant_evaluations(
+            database, bundle_engine_factory(candidate), bundle_engine_factory(baseline),
+            max_workers=1, chunk_size=3
+        )
+        # Budgets of 600k to 900k with timelines under 12 months now pass
+        assert report.contexts == 10 and report.errors == 0
+        assert report.changed_rules == {"budget_realism_validation": 2}
+        assert report.transitions["budget_realism_validation"] == {("not_met", "met"): 2}
+        assert [diff.context_id for diff in report.examples] == ["grant-eval-G-2-3", "grant-eval-G-3-4"]
+        assert report.to_dict()["throughput"] > 0
+
+
+def _stored_context(data: Dict[str, Any]) -> ExecutionContext:
+
+
+    """Build a grant context as the evaluation endpoint does."""
+    from rules.domains.movember_ai.replay import grant_evaluation_data
+
+    return ExecutionContext(
+        context_type=ContextType.GRANT_EVALUATION,
+        context_id="replay-test",
+        data=grant_evaluation_data(data, datetime.now().isoformat())
+    )
 
 if __name__ == "__main__":
     # Run integration tests
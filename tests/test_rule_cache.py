@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the Rule Cache
+Covers LRU eviction, memory budgets and engine integration of RuleCache.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from enum import Enum, IntEnum
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+from rules.core import RuleEngine, RuleEngineConfig
+from rules.core.cache import CacheStrategy, RuleCache, estimate_size
+from rules.core.dependencies import analyse_expression, analyse_rule
+from rules.core.hashing import structural_hash
+from rules.core.shared_cache import SharedCacheTier
+from rules.types import Action, Condition, ContextType, ExecutionContext, Rule
+
+
+def make_context(data, context_id="test-cache"):
+
+
+    """Build an execution context for cache tests."""
+    return ExecutionContext(
+        context_type=ContextType.GRANT_EVALUATION,
+        context_id=context_id,
+        data=data
+    )
+
+
+class TestRuleCache:
+    """Tests for RuleCache storage and eviction."""
+
+    @pytest.mark.asyncio
+    async def test_hit_and_miss_statistics(self):
+        """Hits and misses are counted and reported as a hit rate."""
+        cache = RuleCache()
+        await cache.set("rule", {"budget": 1}, "result")
+
+        assert await cache.get("rule", {"budget": 1}) == "result"
+        assert await cache.get("rule", {"budget": 2}) is None
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_entry_evicted(self):
+        """Only the least recently used entry is evicted when full."""
+        cache = RuleCache(max_size=2)
+        await cache.set("rule", {"n": 1}, "one")
+        await cache.set("rule", {"n": 2}, "two")
+        await cache.get("rule", {"n": 1})
+        await cache.set("rule", {"n": 3}, "three")
+
+        assert await cache.get("rule", {"n": 1}) == "one"
+        assert await cache.get("rule", {"n": 2}) is None
+        assert await cache.get("rule", {"n": 3}) == "three"
+        assert cache.get_stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_memory_budget_enforced(self):
+        """Entries are evicted to stay within the byte budget."""
+        payload = "x" * 10000
+        entry_size = estimate_size(payload)
+        cache = RuleCache(max_bytes=entry_size * 3)
+
+        for n in range(10):
+            await cache.set("rule", {"n": n}, payload)
+
+        stats = cache.get_stats()
+        assert stats["memory_usage_bytes"] <= stats["max_bytes"]
+        assert stats["cache_size"] < 10
+        assert stats["evictions"] == 10 - stats["cache_size"]
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_not_returned(self):
+        """Expired entries are dropped on access."""
+        cache = RuleCache()
+        await cache.set("rule", {"n": 1}, "result", ttl=timedelta(seconds=-1))
+
+        assert await cache.get("rule", {"n": 1}) is None
+        assert cache.get_stats()["expirations"] == 1
+        assert cache.get_stats()["memory_usage_bytes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_disabled_strategy_never_caches(self):
+        """The NONE strategy stores nothing."""
+        cache = RuleCache(strategy=CacheStrategy.NONE)
+        await cache.set("rule", {"n": 1}, "result")
+
+        assert await cache.get("rule", {"n": 1}) is None
+        assert cache.get_stats()["cache_size"] == 0
+
+
+class TestEngineResultCache:
+    """Tests for result caching of deterministic rules in RuleEngine."""
+
+    def make_engine(self, calls, deterministic=True):
+
+
+        """Build an engine with one rule whose condition counts evaluations."""
+        def counting_evaluator(context):
+
+
+            calls.append(context.context_id)
+            return context.data.get("budget", 0) > 100
+
+        engine = RuleEngine(result_cache=RuleCache())
+        engine.add_rule(Rule(
+            name="budget_rule",
+            conditions=[Condition("budget > 100", custom_evaluator=counting_evaluator)],
+            actions=[Action("log_message", parameters={"message": "budget"})],
+            deterministic=deterministic
+        ))
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_repeated_evaluation_served_from_cache(self):
+        """Unchanged payloads skip condition and action work."""
+        calls = []
+        engine = self.make_engine(calls)
+
+        first = await engine.evaluate_async(make_context({"budget": 500}, "first"))
+        second = await engine.evaluate_async(make_context({"budget": 500}, "second"))
+
+        assert calls == ["first"]
+        assert second[0].conditions_met == first[0].conditions_met
+        assert second[0].metadata.get("cached") is True
+        assert engine.get_metrics()["caches"]["rule_results"]["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_changed_payload_reevaluated(self):
+        """A different payload misses the cache."""
+        calls = []
+        engine = self.make_engine(calls)
+
+        await engine.evaluate_async(make_context({"budget": 500}, "first"))
+        await engine.evaluate_async(make_context({"budget": 50}, "second"))
+
+        assert calls == ["first", "second"]
+
+    @pytest.mark.asyncio
+    async def test_non_deterministic_rules_not_cached(self):
+        """Rules not marked deterministic are always evaluated."""
+        calls = []
+        engine = self.make_engine(calls, deterministic=False)
+
+        await engine.evaluate_async(make_context({"budget": 500}, "first"))
+        await engine.evaluate_async(make_context({"budget": 500}, "second"))
+
+        assert calls == ["first", "second"]
+
+    @pytest.mark.asyncio
+    async def test_edited_rule_does_not_reuse_results(self):
+        """Replacing a rule definition changes its cache key."""
+        calls = []
+        engine = self.make_engine(calls)
+        await engine.evaluate_async(make_context({"budget": 500}, "first"))
+
+        edited = engine.get_rule("budget_rule")
+        engine.add_rule(Rule(
+            name=edited.name,
+            conditions=edited.conditions,
+            actions=[Action("log_message", parameters={"message": "edited"})],
+            deterministic=True
+        ))
+        await engine.evaluate_async(make_context({"budget": 500}, "second"))
+
+        assert calls == ["first", "second"]
+
+    def test_cache_disabled_by_config(self):
+
+
+        """The result cache can be switched off."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        assert engine.result_cache is None
+        assert 'rule_results' not in engine.get_metrics()["caches"]
+
+
+class TestRuleCacheInvalidation:
+    """Tests for index-based cache invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_invalidate_by_rule_only_removes_that_rule(self):
+        """Invalidating a rule leaves other rules' entries in place."""
+        cache = RuleCache()
+        for n in range(5):
+            await cache.set("budget_rule", {"n": n}, "budget")
+            await cache.set("budget_rule_extended", {"n": n}, "extended")
+
+        assert await cache.invalidate(rule_name="budget_rule") == 5
+        assert await cache.get("budget_rule", {"n": 1}) is None
+        assert await cache.get("budget_rule_extended", {"n": 1}) == "extended"
+        assert cache.get_stats()["cache_size"] == 5
+
+    @pytest.mark.asyncio
+    async def test_invalidate_by_tag_and_context_type(self):
+        """Entries can be invalidated by tag or by context type."""
+        cache = RuleCache()
+        await cache.set("a", {"context_type": "grant_evaluation", "n": 1}, "a", tags=["grant"])
+        await cache.set("b", {"context_type": "impact_reporting", "n": 1}, "b", tags=["report"])
+        await cache.set("c", {"context_type": "grant_evaluation", "n": 1}, "c", tags=["report"])
+
+        assert await cache.invalidate(tag="report") == 2
+        assert await cache.get("a", {"context_type": "grant_evaluation", "n": 1}) == "a"
+
+        assert await cache.invalidate(context_type="grant_evaluation") == 1
+        assert cache.get_stats()["cache_size"] == 0
+
+    @pytest.mark.asyncio
+    async def test_index_kept_in_step_with_evictions(self):
+        """Evicted entries are dropped from the secondary indexes."""
+        cache = RuleCache(max_size=2)
+        await cache.set("a", {"n": 1}, "a", tags=["grant"])
+        await cache.set("b", {"n": 1}, "b", tags=["grant"])
+        await cache.set("c", {"n": 1}, "c", tags=["grant"])
+
+        assert "a" not in cache._keys_by_rule
+        assert len(cache._keys_by_tag["grant"]) == 2
+        assert await cache.invalidate(tag="grant") == 2
+        assert cache._keys_by_tag == {}
+
+    @pytest.mark.asyncio
+    async def test_engine_invalidates_removed_rules(self):
+        """Removing a rule from the engine drops its cached results."""
+        cache = RuleCache()
+        engine = RuleEngine(result_cache=cache)
+        engine.add_rule(Rule(name="cached_rule", conditions=[Condition("budget > 1")], deterministic=True))
+
+        await engine.evaluate_async(make_context({"budget": 5}))
+        assert cache.get_stats()["cache_size"] == 1
+
+        engine.remove_rule("cached_rule")
+        assert cache.get_stats()["cache_size"] == 0
+
+
+class TestStructuralHash:
+    """Tests for structural hashing of cache key data."""
+
+    def test_equal_values_hash_equally(self):
+
+
+        """Key order, set order and Decimal scale do not affect the hash."""
+        first = {"budget": Decimal("1.50"), "sdgs": {"SDG3", "SDG10"}, "due": datetime(2025, 1, 1)}
+        second = {"due": datetime(2025, 1, 1), "sdgs": {"SDG10", "SDG3"}, "budget": Decimal("1.5")}
+
+        assert structural_hash(first) == structural_hash(second)
+
+    def test_types_are_distinguished(self):
+
+
+        """Values that serialise alike but differ in type hash differently."""
+        assert structural_hash(1) != structural_hash("1")
+        assert structural_hash(1) != structural_hash(True)
+        assert structural_hash(1.0) != structural_hash(1)
+        assert structural_hash(ContextType.GRANT_EVALUATION) != structural_hash("grant_evaluation")
+        assert structural_hash(datetime(2025, 1, 1)) != structural_hash("2025-01-01T00:00:00")
+
+    def test_key_and_enum_types_are_distinguished(self):
+
+
+        """Dict keys and int or str enum members keep their type."""
+        class Level(IntEnum):
+            LOW = 1
+
+        class Tier(str, Enum):
+            GOLD = "gold"
+
+        assert structural_hash({1: "x"}) != structural_hash({"1": "x"})
+        assert structural_hash({True: "x"}) != structural_hash({"true": "x"})
+        assert structural_hash({1: "x", "a": "y"}) == structural_hash({"a": "y", 1: "x"})
+        assert structural_hash(Level.LOW) != structural_hash(1)
+        assert structural_hash({"level": Level.LOW}) != structural_hash({"level": 1})
+        assert structural_hash(Tier.GOLD) != structural_hash("gold")
+        assert structural_hash({Tier.GOLD: 1}) != structural_hash({"gold": 1})
+
+    def test_circular_data_rejected(self):
+
+
+        """Circular data raises ValueError, which callers treat as unhashable."""
+        data = {"a": []}
+        data["a"].append(data)
+        with pytest.raises(ValueError):
+            structural_hash(data)
+        with pytest.raises(ValueError):
+            structural_hash({1: data})
+
+        nested = []
+        for _ in range(5000):
+            nested = [nested]
+        with pytest.raises(ValueError):
+            structural_hash(nested)
+
+    def test_field_subset(self):
+
+
+        """Only the named fields contribute, and absent differs from None."""
+        assert structural_hash({"a": 1, "b": 2}, ["a"]) == structural_hash({"a": 1, "b": 3}, ["a"])
+        assert structural_hash({"a": 1}, ["a", "b"]) != structural_hash({"a": 1, "b": None}, ["a", "b"])
+
+    def test_unhashable_type_rejected(self):
+
+
+        """Arbitrary objects are rejected rather than hashed by repr."""
+        with pytest.raises(TypeError):
+            structural_hash({"value": object()})
+
+
+class TestFieldDependencies:
+    """Tests for keying cached results on the fields a rule reads."""
+
+    def test_expression_dependencies(self):
+
+
+        """Aliases, accessors and context attributes are resolved to data fields."""
+        assert analyse_expression("grant.budget > 5").top_level_fields == {"budget", "grant_id", "impact_metrics"}
+        assert analyse_expression("'@' in data.get('email', '')").top_level_fields == {"email"}
+        assert analyse_expression("agent.confidence < limit", parameters={"limit": 1}).paths == {("agent_data", "confidence")}
+        assert analyse_expression("data.keys()").top_level_fields is None
+        assert analyse_expression("timestamp.hour > 9").top_level_fields is None
+
+    def test_custom_evaluators_read_everything(self):
+
+
+        """Rules with opaque conditions or actions depend on all data."""
+        rule = Rule(name="opaque", conditions=[Condition("x", custom_evaluator=lambda context: True)])
+        assert analyse_rule(rule).top_level_fields is None
+
+        rule = Rule(
+            name="validating",
+            conditions=[Condition("budget > 1")],
+            actions=[Action("validate_data", parameters={"validations": {"title": {}}})]
+        )
+        assert analyse_rule(rule).top_level_fields == {"budget", "title"}
+
+    @pytest.mark.asyncio
+    async def test_unreferenced_fields_do_not_affect_cache_key(self):
+        """Changing a field no condition reads still hits the cache."""
+        engine = RuleEngine(result_cache=RuleCache())
+        engine.add_rule(Rule(name="budget_rule", conditions=[Condition("budget > 1")], deterministic=True))
+
+        await engine.evaluate_async(make_context({"budget": 5, "notes": "first"}))
+        results = await engine.evaluate_async(make_context({"budget": 5, "notes": "second"}))
+        assert results[0].metadata.get("cached") is True
+
+        results = await engine.evaluate_async(make_context({"budget": 6, "notes": "second"}))
+        assert results[0].metadata.get("cached") is not True
+
+
+    @pytest.mark.asyncio
+    async def test_circular_data_bypasses_cache(self):
+        """Context data that cannot be hashed is evaluated without caching instead of failing."""
+        engine = RuleEngine(result_cache=RuleCache())
+        engine.add_rule(Rule(name="budget_rule", conditions=[Condition("parent.budget > 1")], deterministic=True))
+        data = {"budget": 5}
+        data["parent"] = data
+
+        for evaluate in (engine.evaluate_async, engine.evaluate_incremental_async):
+            results = await evaluate(make_context(data))
+            assert results[0].success and results[0].conditions_met
+
+class TestSharedCacheTier:
+    """Tests for the cross-worker shared cache tier."""
+
+    def make_worker_cache(self, path):
+
+
+        """Build a cache as one worker process would, sharing the tier at path."""
+        return RuleCache(shared_tier=SharedCacheTier(str(path), sync_interval=0))
+
+    @pytest.mark.asyncio
+    async def test_results_shared_between_workers(self, tmp_path):
+        """A result cached by one worker is served to another from the shared tier."""
+        path = tmp_path / "rules.db"
+        first, second = self.make_worker_cache(path), self.make_worker_cache(path)
+
+        await first.set("rule", {"n": 1}, {"result": "shared"})
+        assert await second.get("rule", {"n": 1}) == {"result": "shared"}
+        assert await second.get("rule", {"n": 1}) == {"result": "shared"}
+
+        tiers = second.get_stats()["tiers"]
+        assert tiers["shared"]["hits"] == 1
+        assert tiers["local"]["hits"] == 1
+        assert tiers["shared"]["cache_size"] == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidation_reaches_other_workers(self, tmp_path):
+        """Invalidating a rule in one worker drops its results in every worker."""
+        path = tmp_path / "rules.db"
+        first, second = self.make_worker_cache(path), self.make_worker_cache(path)
+
+        await first.set("rule", {"n": 1}, "result", tags=["grant"])
+        assert await second.get("rule", {"n": 1}) == "result"
+
+        first.invalidate_sync(rule_name="rule")
+        assert await second.get("rule", {"n": 1}) is None
+
+        await first.set("rule", {"n": 2}, "result", tags=["grant"])
+        assert await second.get("rule", {"n": 2}) == "result"
+        await first.invalidate(tag="grant")
+        assert await second.get("rule", {"n": 2}) is None
+
+    @pytest.mark.asyncio
+    async def test_shared_entries_expire(self, tmp_path):
+        """Entries past their TTL are not served from the shared tier."""
+        path = tmp_path / "rules.db"
+        first, second = self.make_worker_cache(path), self.make_worker_cache(path)
+
+        await first.set("rule", {"n": 1}, "result", ttl=timedelta(seconds=-1))
+        assert await second.get("rule", {"n": 1}) is None
+        assert second.get_stats()["tiers"]["shared"]["expirations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_busy_database_does_not_stall_writes(self, tmp_path):
+        """A write lock held by another worker skips the shared write instead of waiting on it."""
+        path = tmp_path / "rules.db"
+        cache = self.make_worker_cache(path)
+        other = sqlite3.connect(str(path), isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        try:
+            start = time.monotonic()
+            await cache.set("rule", {"n": 1}, "result")
+            elapsed = time.monotonic() - start
+        finally:
+            other.execute("ROLLBACK")
+            other.close()
+
+        assert elapsed < 1.0
+        assert await cache.get("rule", {"n": 1}) == "result"
+        shared = cache.get_stats()["tiers"]["shared"]
+        assert shared["busy"] == 1 and shared["errors"] == 0 and shared["sets"] == 0
+
+    @pytest.mark.asyncio
+    async def test_shared_across_processes(self, tmp_path):
+        """A separate process sees results written by this one."""
+        path = tmp_path / "rules.db"
+        cache = self.make_worker_cache(path)
+        await cache.set("rule", {"n": 1}, "from parent")
+
+        script = (
+            "import asyncio, sys\n"
+            "from rules.core.cache import RuleCache\n"
+            "from rules.core.shared_cache import SharedCacheTier\n"
+            "cache = RuleCache(shared_tier=SharedCacheTier(sys.argv[1]))\n"
+            "print(asyncio.run(cache.get('rule', {'n': 1})))\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run(
+            [sys.executable, "-c", script, str(path)],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout
+        assert output.strip().splitlines()[-1] == "from parent"
@@ -0,0 +1,977 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the Rule Engine
+Covers rule selection, scheduling and result handling in RuleEngine.
+"""
+
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+
+import pytest
+
+from rules.core import RuleEngine, RuleEngineConfig
+from rules.core.audit import JsonLinesAuditSink, SQLiteAuditSink
+from rules.core.cache import RuleCache
+from rules.core.bundle import BundleError, load_bundle, read_bundle
+from rules.core.dependencies import missing_fields, required_fields
+from rules.core.evaluator import CompiledExpressionCache, ConditionEvaluator, RuleEvaluator
+from rules.types import Action, Condition, ContextType, ExecutionContext, Rule, RulePriority
+
+
+def make_rule(name, expression="True", priority=RulePriority.MEDIUM, **kwargs):
+
+
+    """Build a simple rule for engine tests."""
+    return Rule(
+        name=name,
+        conditions=[Condition(expression)],
+        actions=[Action("log_message", parameters={"message": name})],
+        priority=priority,
+        **kwargs
+    )
+
+
+def make_context(data=None, context_type=ContextType.GRANT_EVALUATION, context_id="test-engine"):
+
+
+    """Build an execution context for engine tests."""
+    return ExecutionContext(
+        context_type=context_type,
+        context_id=context_id,
+        data=data if data is not None else {}
+    )
+
+
+class TestRuleIndex:
+    """Tests for indexed rule selection."""
+
+    def test_rules_selected_by_context_type_in_priority_order(self):
+
+
+        """Only matching context types are selected, highest priority first."""
+        engine = RuleEngine()
+        engine.add_rule(make_rule("low", priority=RulePriority.LOW))
+        engine.add_rule(make_rule("critical", priority=RulePriority.CRITICAL))
+        engine.add_rule(make_rule("reporting_only", context_types=[ContextType.IMPACT_REPORTING]))
+
+        selected = engine._find_applicable_rules(make_context())
+        assert [r.name for r in selected] == ["critical", "low"]
+
+        selected = engine._find_applicable_rules(make_context(context_type=ContextType.IMPACT_REPORTING))
+        assert [r.name for r in selected] == ["critical", "reporting_only", "low"]
+
+    def test_index_rebuilt_when_rules_change(self):
+
+
+        """Adding and removing rules is reflected in the next selection."""
+        engine = RuleEngine()
+        engine.add_rule(make_rule("first"))
+        assert [r.name for r in engine._find_applicable_rules(make_context())] == ["first"]
+
+        engine.add_rule(make_rule("second", priority=RulePriority.HIGH))
+        assert [r.name for r in engine._find_applicable_rules(make_context())] == ["second", "first"]
+
+        engine.remove_rule("second")
+        assert [r.name for r in engine._find_applicable_rules(make_context())] == ["first"]
+
+    def test_index_reused_while_rules_unchanged(self):
+
+
+        """The index is only built once for an unchanged rule set."""
+        engine = RuleEngine()
+        engine.add_rules([make_rule("a"), make_rule("b")])
+
+        engine._find_applicable_rules(make_context())
+        index = engine.snapshot.index
+        engine._find_applicable_rules(make_context())
+        assert engine.snapshot.index is index
+
+    def test_selection_memo_is_bounded(self):
+
+
+        """Arbitrary tag filters do not grow the selection memo past its limit."""
+        engine = RuleEngine()
+        engine.add_rule(make_rule("tagged", tags=["budget"]))
+        index = engine.snapshot.index
+
+        for n in range(index.max_selections + 50):
+            engine._find_applicable_rules(make_context(), tags=[f"tag-{n}"])
+        assert len(index._selections) == index.max_selections
+
+        # The most recently used selections are kept
+        selection = engine._find_applicable_rules(make_context(), tags=["budget"])
+        assert [r.name for r in selection] == ["tagged"]
+        assert (ContextType.GRANT_EVALUATION, frozenset({"budget"})) in index._selections
+
+    def test_disabled_and_inapplicable_rules_skipped(self):
+
+
+        """Enabled flags and applicability checks still apply to indexed rules."""
+        engine = RuleEngine()
+        engine.add_rule(make_rule("disabled", enabled=False))
+        engine.add_rule(make_rule("checked", applicability_check=lambda ctx: ctx.data.get("ok", False)))
+
+        assert engine._find_applicable_rules(make_context()) == []
+        assert [r.name for r in engine._find_applicable_rules(make_context({"ok": True}))] == ["checked"]
+
+    def test_tag_and_mode_filtering(self):
+
+
+        """Rules can be selected by tag directly or through a registered mode."""
+        engine = RuleEngine()
+        engine.add_rule(make_rule("tagged", tags=["budget"]))
+        engine.add_rule(make_rule("extra_tag"), tags=["eligibility"])
+        engine.add_rule(make_rule("untagged"))
+        engine.register_mode("screening", ["eligibility", "budget"])
+
+        assert [r.name for r in engine._find_applicable_rules(make_context(), tags=["budget"])] == ["tagged"]
+        assert {r.name for r in engine._find_applicable_rules(make_context(), mode="screening")} == {
+            "tagged", "extra_tag"
+        }
+        assert len(engine._find_applicable_rules(make_context(), mode="unregistered")) == 3
+
+    @pytest.mark.asyncio
+    async def test_evaluate_async_with_mode(self):
+        """Evaluation only runs the rules selected by the mode."""
+        engine = RuleEngine()
+        engine.add_rule(make_rule("tagged"), tags=["screening"])
+        engine.add_rule(make_rule("other"))
+        engine.register_mode("screening", ["screening"])
+
+        results = await engine.evaluate_async(make_context(), mode="screening")
+        assert [r.rule_name for r in results] == ["tagged"]
+        assert results[0].conditions_met
+
+
+class TestMissingFieldSkip:
+    """Tests for skipping rules whose required fields are absent."""
+
+    def required(self, *expressions):
+
+
+        return required_fields(
+            [Condition(expression) for expression in expressions], ConditionEvaluator().functions
+        )
+
+    def test_strict_reads_are_required(self):
+
+
+        """Comparisons, bare names and arithmetic on a missing field cannot pass."""
+        assert self.required("grant.budget > 1000") == {("budget",)}
+        assert self.required("data['status'] != 'draft'") == {("status",)}
+        assert self.required("agent.role in ['analyst']") == {("agent_data", "role")}
+        assert self.required("len(sdg_alignment) > 1") == {("sdg_alignment",)}
+        assert self.required("grant.budget * 2 > limit") == {("budget",), ("limit",)}
+        assert self.required("grant.budget > 5 and grant.active") == {("budget",), ("active",)}
+        assert self.required("grant.a == 1", "grant.b.c == 2") == {("a",), ("b", "c")}
+
+    def test_lenient_reads_are_not_required(self):
+
+
+        """Reads that can pass when the field is missing require nothing."""
+        assert self.required("grant.status not in ['rejected']") == frozenset()
+        assert self.required("not grant.flagged") == frozenset()
+        assert self.required("grant.tags.length == 0") == frozenset()
+        assert self.required("grant.get('budget', 0) >= 0") == frozenset()
+        assert self.required("project.id == 'movember'") == frozenset()
+        assert self.required("context_type == 'grant_evaluation'") == frozenset()
+        # Either operand of an or may pass on its own
+        assert self.required("grant.a > 1 or grant.b > 1") == frozenset()
+        assert self.required("grant.a > 1 or (grant.a > 2 and grant.b)") == {("a",)}
+
+    def test_missing_fields_walks_nested_paths(self):
+
+
+        """Nested paths are missing if any key on the way is absent."""
+        data = {"budget": {"amount": 5}, "items": [1]}
+        paths = [("budget", "amount"), ("budget", "currency"), ("items", 0), ("items", 3), ("other",)]
+        assert missing_fields(paths, data) == [("budget", "currency"), ("items", 3), ("other",)]
+
+    def test_engine_skips_rules_with_missing_fields(self):
+
+
+        """Skipped rules report the missing fields and match unskipped results."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rules([
+            make_rule("needs_budget", "grant.budget > 1000"),
+            make_rule("lenient", "grant.status not in ['rejected']"),
+            make_rule("has_budget", "budget > 0", priority=RulePriority.LOW)
+        ])
+        context = make_context({"grant_id": "G-1", "status": "submitted"})
+
+        results = {result.rule_name: result for result in engine.evaluate(context)}
+
+        assert results["needs_budget"].metadata["skipped"] == "missing_fields"
+        assert results["needs_budget"].metadata["missing_fields"] == ["budget"]
+        assert results["needs_budget"].success and not results["needs_budget"].conditions_met
+        assert "skipped" not in results["lenient"].metadata
+        assert results["lenient"].conditions_met
+
+        engine.config.skip_missing_fields = False
+        unskipped = {result.rule_name: result for result in engine.evaluate(context)}
+        assert {name: r.conditions_met for name, r in results.items()} == \
+            {name: r.conditions_met for name, r in unskipped.items()}
+        assert "skipped" not in unskipped["needs_budget"].metadata
+
+
+class TestRuleDependencies:
+    """Tests for rules that depend on the outcome of other rules."""
+
+    def make_engine(self, *rules):
+
+
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rules(list(rules))
+        return engine
+
+    def test_dependents_run_after_prerequisites_pass(self):
+
+
+        """A dependent rule runs once its prerequisite has passed, even at higher priority."""
+        order = []
+
+        def track(name):
+            def evaluate(context):
+                order.append(name)
+                return True
+            return [Condition("", custom_evaluator=evaluate)]
+
+        engine = self.make_engine(
+            Rule("budget_check", conditions=track("budget_check"), depends_on=["eligibility"],
+                 priority=RulePriority.HIGH),
+            Rule("eligibility", conditions=track("eligibility"), priority=RulePriority.LOW)
+        )
+
+        results = engine.evaluate(make_context())
+
+        assert [r.rule_name for r in results] == ["budget_check", "eligibility"]
+        assert all(r.conditions_met for r in results)
+        assert order == ["eligibility", "budget_check"]
+
+    def test_failed_prerequisite_prunes_subtree(self):
+
+
+        """Rules downstream of a prerequisite whose conditions fail are not evaluated."""
+        evaluated = []
+
+        def tracked(context):
+            evaluated.append("independent")
+            return True
+
+        engine = self.make_engine(
+            make_rule("eligibility", "False"),
+            make_rule("budget_check", depends_on=["eligibility"]),
+            make_rule("risk_review", depends_on=["budget_check"]),
+            Rule("independent", conditions=[Condition("", custom_evaluator=tracked)])
+        )
+
+        results = {r.rule_name: r for r in engine.evaluate(make_context())}
+
+        assert results["budget_check"].metadata["skipped"] == "prerequisite_failed"
+        assert results["budget_check"].metadata["failed_prerequisites"] == ["eligibility"]
+        assert results["risk_review"].metadata["failed_prerequisites"] == ["budget_check"]
+        assert not results["risk_review"].conditions_met
+        assert results["independent"].conditions_met and evaluated == ["independent"]
+
+    def test_prerequisite_outside_selection_is_unmet(self):
+
+
+        """A prerequisite not evaluated in this evaluation does not count as passed."""
+        engine = self.make_engine(
+            make_rule("eligibility", tags=["intake"]),
+            make_rule("budget_check", depends_on=["eligibility"], tags=["finance"])
+        )
+
+        results = asyncio.run(
+            engine.evaluate_async(make_context(), tags=["finance"])
+        )
+
+        assert results[0].metadata["skipped"] == "prerequisite_failed"
+
+    def test_unknown_dependency_rejected_at_load(self):
+
+
+        """Adding a rule with a dangling dependency fails and leaves the rule set unchanged."""
+        engine = self.make_engine(make_rule("eligibility"))
+        version = engine.rules_version
+
+        with pytest.raises(ValueError, match="unknown rules: missing"):
+            engine.add_rule(make_rule("budget_check", depends_on=["missing"]))
+
+        assert "budget_check" not in engine.rules
+        assert engine.rules_version == version
+        assert [r.rule_name for r in engine.evaluate(make_context())] == ["eligibility"]
+
+    def test_dependency_cycle_rejected_at_load(self):
+
+
+        """Loading rules whose dependencies form a cycle fails and keeps the previous rules."""
+        engine = self.make_engine(make_rule("eligibility"))
+
+        with pytest.raises(ValueError, match="cycle"):
+            engine.replace_rules([
+                make_rule("a", depends_on=["b"]),
+                make_rule("b", depends_on=["c"]),
+                make_rule("c", depends_on=["a"])
+            ])
+
+        assert list(engine.rules) == ["eligibility"]
+        assert [r.rule_name for r in engine.evaluate(make_context())] == ["eligibility"]
+
+    def test_removing_a_prerequisite_is_rejected(self):
+
+
+        """A prerequisite cannot be removed while other rules depend on it."""
+        engine = self.make_engine(
+            make_rule("eligibility"),
+            make_rule("budget_check", depends_on=["eligibility"])
+        )
+
+        with pytest.raises(ValueError, match="unknown rules: eligibility"):
+            engine.remove_rule("eligibility")
+
+        assert set(engine.rules) == {"eligibility", "budget_check"}
+
+    def test_depends_on_round_trips(self):
+
+
+        """Dependencies survive serialisation."""
+        rule = make_rule("budget_check", depends_on=["eligibility"])
+        assert Rule.from_dict(rule.to_dict()).depends_on == ["eligibility"]
+
+
+class TestBatchEvaluation:
+    """Tests for streaming evaluation of many contexts."""
+
+    def collect(self, engine, contexts, **kwargs):
+
+
+        async def run():
+            return [item async for item in engine.evaluate_batch(contexts, **kwargs)]
+        return asyncio.run(run())
+
+    def test_concurrency_is_bounded_and_results_stream(self):
+
+
+        """At most `concurrency` contexts run at once and fast contexts are yielded first."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        state = {"in_flight": 0, "peak": 0}
+
+        async def evaluate(context):
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            await asyncio.sleep(context.data["delay"])
+            state["in_flight"] -= 1
+            return [context.context_id]
+
+        delays = [0.05, 0.01, 0.01, 0.01, 0.01, 0.01]
+        contexts = [make_context({"delay": d}, context_id=f"c{n}") for n, d in enumerate(delays)]
+        items = self.collect(engine, contexts, concurrency=2, evaluate=evaluate)
+
+        assert state["peak"] == 2
+        assert sorted(item.index for item in items) == list(range(6))
+        # The slow first context does not hold back the ones behind it
+        assert items[0].index == 1
+        assert all(item.results == [item.context.context_id] for item in items)
+
+    def test_async_source_and_errors(self):
+
+
+        """Async iterators are accepted and a failing context does not stop the batch."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rule(make_rule("has_budget", "budget > 0"))
+
+        async def contexts():
+            for budget in (10, 0, 5):
+                yield make_context({"budget": budget}, context_id=f"grant-{budget}")
+
+        async def evaluate(context):
+            if context.data["budget"] == 0:
+                raise ValueError("empty budget")
+            return await engine.evaluate_async(context)
+
+        items = sorted(self.collect(engine, contexts(), evaluate=evaluate), key=lambda item: item.index)
+
+        assert [item.success for item in items] == [True, False, True]
+        assert str(items[1].error) == "empty budget"
+        assert items[0].results[0].conditions_met
+
+        throughput = engine.get_metrics()["system"]["context_throughput"]
+        assert throughput["contexts"] == 3 and throughput["failures"] == 1
+        assert throughput["contexts_per_second"] > 0
+
+    def test_leaving_early_cancels_in_flight_contexts(self):
+
+
+        """Breaking out of the stream cancels evaluations still running and waits for their cleanup."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        cleaned_up = []
+
+        async def evaluate(context):
+            try:
+                await asyncio.sleep(0 if context.context_id == "c0" else 10)
+            except asyncio.CancelledError:
+                # Cleanup that itself awaits only finishes if the batch waits for it
+                await asyncio.sleep(0.01)
+                cleaned_up.append(context.context_id)
+                raise
+            return []
+
+        async def run():
+            batch = engine.evaluate_batch(
+                [make_context(context_id=f"c{n}") for n in range(100)], concurrency=3, evaluate=evaluate
+            )
+            async for item in batch:
+                break
+            await batch.aclose()
+            return sorted(cleaned_up), len(asyncio.all_tasks())
+
+        cleaned, tasks = asyncio.run(run())
+        assert cleaned == ["c1", "c2"]
+        assert tasks == 1
+        assert engine.get_metrics()["system"]["context_throughput"]["contexts"] == 1
+
+    def test_evaluate_many_keeps_input_order(self):
+
+
+        """evaluate_many returns per-context results in input order."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rule(make_rule("has_budget", "budget > 0"))
+        contexts = [make_context({"budget": budget}) for budget in (5, 0, 7)]
+
+        batch_results = engine.evaluate_many(contexts)
+
+        assert [results[0].conditions_met for results in batch_results] == [True, False, True]
+
+
+class TestProcessPool:
+    """Tests for sharding batches across worker processes."""
+
+    def test_pool_results_match_in_process_results(self):
+
+
+        """Sharded evaluation returns the same results, in input order."""
+        from rules.domains.movember_ai import create_rule_engine
+
+        config = RuleEngineConfig(enable_result_cache=False, process_pool_min_batch=2)
+        engine = create_rule_engine(config)
+        contexts = [
+            make_context({"grant_id": f"G-{n}", "budget": n * 400000, "timeline_months": 6 + n,
+                          "status": "submitted"}, context_id=f"grant-{n}")
+            for n in range(6)
+        ]
+        expected = engine.evaluate_many(contexts, mode="grant_submission")
+
+        engine.enable_process_pool(create_rule_engine, max_workers=2, chunk_size=2)
+        try:
+            results = engine.evaluate_many(contexts, mode="grant_submission")
+        finally:
+            engine.shutdown()
+
+        def outcome(batch):
+            return [[(r.rule_name, r.success, r.conditions_met) for r in context_results]
+                    for context_results in batch]
+
+        assert outcome(results) == outcome(expected)
+        assert any(r.conditions_met for context_results in results for r in context_results)
+        assert engine.process_pool is None
+        assert [entry["context_id"] for entry in engine.get_execution_history(6)] == \
+            [f"grant-{n}" for n in range(6)]
+
+    def test_compile_rules_precompiles_conditions(self):
+
+
+        """compile_rules compiles every expression condition up front."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rules([make_rule("a", "budget > 5"), make_rule("b", "status == 'open'")])
+        assert engine.compile_rules() == 2
+
+
+class TestIncrementalEvaluation:
+    """Tests for re-evaluating only the rules affected by context edits."""
+
+    def make_engine(self):
+
+
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rules([
+            make_rule("large_budget", "grant.budget > 1000", deterministic=True),
+            make_rule("has_title", "len(title) > 0", deterministic=True),
+            make_rule("titled_budget", "grant.budget > 10", depends_on=["has_title"], deterministic=True),
+            make_rule("notify", "status == 'submitted'"),
+            make_rule("lenient", "grant.region not in ['excluded']", deterministic=True),
+            make_rule("dated", "now() != None", deterministic=True)
+        ])
+        return engine
+
+    @staticmethod
+    def outcome(results):
+
+
+        return [
+            (r.rule_name, r.success, r.conditions_met,
+             {k: v for k, v in r.metadata.items() if k != "reused"},
+             [(ar.action_name, ar.success) for ar in r.action_results or []])
+            for r in results
+        ]
+
+    @pytest.mark.asyncio
+    async def test_only_rules_reading_changed_fields_rerun(self):
+        """Unchanged rules keep their results; edited fields, prerequisites and side effects rerun."""
+        engine = self.make_engine()
+        draft = {"grant_id": "G", "budget": 5000, "title": "Draft", "status": "submitted"}
+
+        results = await engine.evaluate_incremental_async(make_context(dict(draft), context_id="draft"))
+        assert not any(r.metadata.get("reused") for r in results)
+
+        draft["budget"] = 50
+        results = await engine.evaluate_incremental_async(make_context(dict(draft), context_id="draft"))
+        reused = {r.rule_name for r in results if r.metadata.get("reused")}
+        # Budget readers rerun; notify passed and is not deterministic; dated reads the clock
+        assert reused == {"has_title", "lenient"}
+        assert not {r.rule_name: r for r in results}["large_budget"].conditions_met
+
+        draft["title"] = ""
+        results = await engine.evaluate_incremental_async(make_context(dict(draft), context_id="draft"))
+        reused = {r.rule_name for r in results if r.metadata.get("reused")}
+        # titled_budget depends on the rerun has_title, so it reruns too
+        assert reused == {"large_budget", "lenient"}
+        assert {r.rule_name: r for r in results}["titled_budget"].metadata["skipped"] == "prerequisite_failed"
+
+        # Other contexts, modes and rule set versions start from a full evaluation
+        results = await engine.evaluate_incremental_async(make_context(dict(draft), context_id="other"))
+        assert not any(r.metadata.get("reused") for r in results)
+        results = await engine.evaluate_incremental_async(make_context(dict(draft), context_id="draft"),
+                                                          tags=["none"])
+        assert results == []
+        engine.add_rule(make_rule("added"))
+        results = await engine.evaluate_incremental_async(make_context(dict(draft), context_id="draft"))
+        assert not any(r.metadata.get("reused") for r in results)
+
+        engine.forget_incremental_state("draft")
+        results = await engine.evaluate_incremental_async(make_context(dict(draft), context_id="draft"))
+        assert not any(r.metadata.get("reused") for r in results)
+
+    @pytest.mark.asyncio
+    async def test_matches_full_evaluation_over_random_edits(self):
+        """A sequence of random edits gives the same results as evaluating every rule each time."""
+        rng = random.Random(7)
+        incremental, full = self.make_engine(), self.make_engine()
+        edits = {
+            "budget": [5, 50, 5000, None, "n/a"],
+            "title": ["", "Draft", None],
+            "status": ["draft", "submitted"],
+            "region": ["excluded", "uk", {"nested": 1}],
+            "grant_id": ["G", None]
+        }
+        draft = {}
+        for _ in range(200):
+            name = rng.choice(sorted(edits))
+            value = rng.choice(edits[name])
+            if value is None:
+                draft.pop(name, None)
+            else:
+                draft[name] = value
+            expected = await full.evaluate_async(make_context(dict(draft), context_id="draft"))
+            actual = await incremental.evaluate_incremental_async(make_context(dict(draft), context_id="draft"))
+            assert self.outcome(actual) == self.outcome(expected), draft
+
+    @pytest.mark.asyncio
+    async def test_state_is_bounded(self):
+        """Only the most recently evaluated contexts are kept."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False, incremental_state_size=2))
+        engine.add_rule(make_rule("large_budget", "budget > 1000", deterministic=True))
+        for context_id in ("a", "b", "c"):
+            await engine.evaluate_incremental_async(make_context({"budget": 1}, context_id=context_id))
+
+        results = await engine.evaluate_incremental_async(make_context({"budget": 1}, context_id="a"))
+        assert not results[0].metadata.get("reused")
+        results = await engine.evaluate_incremental_async(make_context({"budget": 1}, context_id="c"))
+        assert results[0].metadata["reused"]
+
+
+class TestRuleSnapshots:
+    """Tests for copy-on-write rule snapshots and hot reload."""
+
+    def test_rule_changes_publish_new_versions(self):
+
+
+        """Each rule change publishes a new read-only snapshot; add_rules is one change."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        initial = engine.snapshot
+        engine.add_rules([make_rule("a"), make_rule("b")])
+        engine.register_mode("screening", ["budget"])
+        assert engine.rules_version == initial.version + 2
+        assert list(initial.rules) == []
+
+        with pytest.raises(TypeError):
+            engine.rules["c"] = make_rule("c")
+        assert engine.remove_rule("missing") is False
+        assert engine.rules_version == initial.version + 2
+
+    @pytest.mark.asyncio
+    async def test_in_flight_evaluation_finishes_on_its_snapshot(self):
+
+
+        """Replacing the rules does not affect an evaluation that has already started."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rule(make_rule("old"))
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def gate(context):
+            started.set()
+            await release.wait()
+            return True
+
+        engine.add_rule(Rule(name="gated", conditions=[Condition("gate", custom_evaluator=gate)]))
+        in_flight = asyncio.ensure_future(engine.evaluate_async(make_context()))
+        await started.wait()
+
+        snapshot = engine.replace_rules([make_rule("new")])
+        release.set()
+
+        assert sorted(r.rule_name for r in await in_flight) == ["gated", "old"]
+        assert [r.rule_name for r in await engine.evaluate_async(make_context())] == ["new"]
+        assert engine.snapshot is snapshot
+
+    def test_replace_rules_keeps_modes_and_invalidates_changed_rules(self, monkeypatch):
+
+
+        """Reloading reuses unchanged rules' analysis and only invalidates changed rules."""
+        engine = RuleEngine()
+        engine.add_rule(make_rule("same", "budget > 5"), tags=["budget"])
+        engine.add_rule(make_rule("edited", "budget > 5"))
+        engine.register_mode("screening", ["budget"])
+        before = engine.snapshot
+        invalidated = []
+        monkeypatch.setattr(engine.result_cache, "invalidate_sync",
+                            lambda rule_name=None, **kwargs: invalidated.append(rule_name))
+
+        engine.replace_rules([make_rule("same", "budget > 5"), make_rule("edited", "budget > 50")],
+                             tags={"same": ["budget"]})
+
+        after = engine.snapshot
+        assert invalidated == ["edited"]
+        assert after.dependencies["same"] is before.dependencies["same"]
+        assert after.modes == before.modes
+        assert [r.name for r in engine._find_applicable_rules(make_context(), mode="screening")] == ["same"]
+
+
+    @pytest.mark.asyncio
+    async def test_reload_from_thread_during_evaluations(self):
+        """Rules reloaded from another thread while evaluations run leave every evaluation intact."""
+        engine = RuleEngine(result_cache=RuleCache())
+        variants = [
+            [make_rule(f"rule_{n}", f"budget > {n + offset}", deterministic=True) for n in range(20)]
+            for offset in (0, 1)
+        ]
+        engine.replace_rules(variants[0])
+        stop = threading.Event()
+
+        def reload():
+            reloads = 0
+            while not stop.is_set():
+                engine.replace_rules(variants[reloads % 2])
+                reloads += 1
+            return reloads
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        reloading = asyncio.get_running_loop().run_in_executor(None, reload)
+        try:
+            for n in range(200):
+                results = await engine.evaluate_async(make_context({"budget": n % 30}))
+                assert len(results) == 20
+                assert all(result.success for result in results), [r.error for r in results if not r.success]
+        finally:
+            stop.set()
+            sys.setswitchinterval(switch_interval)
+        assert await reloading > 0
+
+class TestRuleCodegen:
+    """Tests for evaluating rules through generated functions."""
+
+    @pytest.mark.asyncio
+    async def test_generated_rules_match_interpreted_rules(self):
+
+
+        """Engines with codegen enabled return the same results and regenerate only edited rules."""
+        rules = [
+            make_rule("large", "grant.budget > 1000"),
+            make_rule("named", "data.name == 'impact'", depends_on=["large"]),
+            Rule(name="custom", conditions=[Condition("custom", custom_evaluator=lambda context: True)])
+        ]
+        interpreted = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        generated = RuleEngine(RuleEngineConfig(enable_result_cache=False, enable_codegen=True))
+        interpreted.add_rules(rules)
+        generated.add_rules(rules)
+        assert sorted(generated.snapshot.programs) == ["large", "named"]
+
+        outcome = lambda results: sorted((r.rule_name, r.conditions_met) for r in results)
+        for data in ({"grant_id": "G", "budget": 5000, "name": "impact"}, {"budget": 5000}, {}):
+            context = make_context(data)
+            assert outcome(await generated.evaluate_async(context)) == \
+                outcome(await interpreted.evaluate_async(context))
+
+        generated.replace_rules([rules[0], make_rule("named", "data.name == 'other'")])
+        assert "'other'" in generated.snapshot.programs["named"].generated_source
+
+    @pytest.mark.asyncio
+    async def test_shared_subexpressions_computed_once_per_evaluation(self):
+
+
+        """Sub-expressions shared between rules are memoised per evaluation and reported in the audit trail."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False, enable_codegen=True))
+        engine.add_rules([
+            make_rule("many_metrics", "len(grant.impact_metrics) > 1"),
+            make_rule("few_metrics", "len(grant.impact_metrics) <= 3"),
+            make_rule("first_metric", "len(grant.impact_metrics) > 1", priority=RulePriority.LOW),
+            Rule(name="limit", conditions=[Condition("len(grant.impact_metrics) > limit", parameters={"limit": 0})],
+                 actions=[])
+        ])
+        sources = {name: program.generated_source for name, program in engine.snapshot.programs.items()}
+        assert all("memo" in sources[name] for name in ("many_metrics", "few_metrics", "first_metric"))
+        # Parameters may differ between conditions, so only the len(...) inside is shared
+        assert sources["limit"].count("memo.setdefault") == 1
+
+        context = make_context({"grant_id": "G", "impact_metrics": [1, 2]})
+        for _ in range(2):
+            results = await engine.evaluate_async(context)
+            assert all(r.conditions_met for r in results)
+            # len(...) and the repeated comparison are each computed once
+            assert engine.get_execution_history(1)[0]["subexpressions"] == {"computed": 2, "reused": 3}
+        assert engine.get_subexpression_stats()["reused"] == 6
+
+        # Updating the data in place drops memoised values
+        context.data["impact_metrics"] = []
+        assert not any(r.conditions_met for r in await engine.evaluate_async(context)
+                       if r.rule_name != "few_metrics")
+
+
+class TestRuleBundles:
+    """Tests for precompiled rule bundles."""
+
+    def make_engine(self):
+
+
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rule(make_rule("screen", "data.team.size >= 2",
+                                  priority=RulePriority.HIGH), tags=["budget"])
+        engine.add_rule(make_rule("review", "status == 'open'", depends_on=["screen"]))
+        engine.add_rule(make_rule("rejected", "1 + 1 == 2"))
+        engine.register_mode("screening", ["budget"])
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_bundle_round_trips_rules_and_analysis(self, tmp_path):
+
+
+        """A loaded bundle reproduces the rules, their analysis and results without recompiling."""
+        source = self.make_engine()
+        path = str(tmp_path / "rules.bundle")
+        source.save_bundle(path, metadata={"revision": "abc"})
+
+        cache = CompiledExpressionCache()
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.evaluator = RuleEvaluator(cache)
+        snapshot = engine.load_bundle(path)
+
+        before = source.snapshot
+        assert list(snapshot.rules) == list(before.rules)
+        for mapping in ("rule_tags", "fingerprints", "dependencies", "requirements", "modes"):
+            assert dict(getattr(snapshot, mapping)) == dict(getattr(before, mapping))
+        assert all(engine._fingerprint_rule(rule) == snapshot.fingerprints[name]
+                   for name, rule in snapshot.rules.items())
+        assert read_bundle(path).metadata == {"revision": "abc"}
+
+        context = make_context({"budget": 10, "team": {"size": 3}, "status": "open"})
+        outcome = lambda results: sorted((r.rule_name, r.conditions_met) for r in results)
+        assert outcome(await engine.evaluate_async(context)) == outcome(await source.evaluate_async(context))
+        # Only the invalid expression had to be compiled after loading
+        assert cache.get_stats()["misses"] == 1
+
+    def test_corrupt_or_incompatible_bundles_are_rejected(self, tmp_path):
+
+
+        """Tampered payloads, other interpreters and other analysis environments fail to load."""
+        data = self.make_engine().build_bundle()
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+
+        with pytest.raises(BundleError, match="digest"):
+            load_bundle(data[:-1] + bytes([data[-1] ^ 1]))
+        with pytest.raises(BundleError):
+            load_bundle(b"not a bundle")
+        header = json.loads(data.split(b"\n")[1])
+        header["interpreter"] = "other-interpreter"
+        with pytest.raises(BundleError, match="other-interpreter"):
+            load_bundle(data.replace(data.split(b"\n")[1], json.dumps(header, sort_keys=True).encode(), 1))
+
+        engine.executor.register_custom_action("notify", lambda action, context: None)
+        with pytest.raises(BundleError, match="analysed"):
+            engine.load_bundle(load_bundle(data))
+        assert list(engine.rules) == []
+
+    def test_rules_with_callables_cannot_be_bundled(self):
+
+
+        """Bundles carry no Python code besides compiled expressions."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rule(make_rule("checked", applicability_check=lambda context: True))
+        with pytest.raises(BundleError, match="checked"):
+            engine.build_bundle()
+
+
+class TestRuleTimeouts:
+    """Tests for per-rule and per-action deadlines."""
+
+    def make_slow_action(self, events, delay=5.0, **kwargs):
+
+
+        """Build an action that sleeps, recording whether it was cancelled."""
+        async def sleep(action, context):
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                events.append("cancelled")
+                raise
+            return "done"
+
+        return Action("slow", custom_executor=sleep, **kwargs)
+
+    @pytest.mark.asyncio
+    async def test_rule_deadline_cancels_rule(self):
+        """A rule past its deadline is cancelled and reported as timed out."""
+        events = []
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rule(Rule(name="slow_rule", conditions=[Condition("True")],
+                             actions=[self.make_slow_action(events)], timeout_seconds=0.05))
+        engine.add_rule(make_rule("fast_rule"))
+
+        start = time.perf_counter()
+        results = {r.rule_name: r for r in await engine.evaluate_async(make_context())}
+
+        assert time.perf_counter() - start < 1
+        assert events == ["cancelled"]
+        assert results["slow_rule"].success is False
+        assert results["slow_rule"].metadata["timeout_reason"] == "rule_deadline"
+        assert results["fast_rule"].success is True
+        assert engine.get_metrics()["rules"]["slow_rule"]["timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_timed_out_rule_reports_its_own_latency(self):
+        """A timed-out rule's execution time runs from its own start to its deadline, not the batch's."""
+        events = []
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rule(Rule(name="slow_prerequisite", conditions=[Condition("True")],
+                             actions=[self.make_slow_action(events, delay=0.2)]))
+        engine.add_rule(Rule(name="slow_rule", conditions=[Condition("True")], depends_on=["slow_prerequisite"],
+                             actions=[self.make_slow_action(events)], timeout_seconds=0.05))
+        engine.add_rule(Rule(name="slow_sibling", conditions=[Condition("True")],
+                             actions=[self.make_slow_action(events, delay=0.4)]))
+
+        results = {r.rule_name: r for r in await engine.evaluate_async(make_context())}
+
+        assert results["slow_rule"].metadata["timeout_reason"] == "rule_deadline"
+        assert 0.05 <= results["slow_rule"].execution_time < 0.15
+        assert engine.get_metrics()["rules"]["slow_rule"]["timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_action_deadline_fails_rule(self):
+        """A timed-out action fails its rule without waiting for the rule deadline."""
+        events = []
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rule(Rule(name="slow_action_rule", conditions=[Condition("True")],
+                             actions=[self.make_slow_action(events, timeout_seconds=0.05)]))
+
+        result = (await engine.evaluate_async(make_context()))[0]
+
+        assert events == ["cancelled"]
+        assert result.success is False
+        assert result.metadata["timeout_reason"] == "action_deadline"
+        assert result.action_results[0].metadata["timed_out"] is True
+        assert engine.get_metrics()["rules"]["slow_action_rule"]["action_timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_configured_action_timeout_applies_by_default(self):
+        """Actions without their own deadline use the engine's action timeout."""
+        events = []
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False, action_timeout_seconds=0.05))
+        engine.add_rule(Rule(name="default_deadline", conditions=[Condition("True")],
+                             actions=[self.make_slow_action(events)]))
+
+        result = (await engine.evaluate_async(make_context()))[0]
+        assert result.metadata["timeout_reason"] == "action_deadline"
+
+    def test_timeouts_round_trip(self):
+
+
+        """Rule and action deadlines survive serialisation."""
+        rule = Rule(name="r", actions=[Action("a", timeout_seconds=2.5)], timeout_seconds=10)
+        restored = Rule.from_dict(rule.to_dict())
+
+        assert restored.timeout_seconds == 10
+        assert restored.actions[0].timeout_seconds == 2.5
+
+
+class TestAuditTrail:
+    """Tests for the in-memory audit tail and background audit sinks."""
+
+    @pytest.mark.asyncio
+    async def test_history_bounded_to_capacity(self):
+        """Only the most recent evaluations are kept in memory."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False, audit_history_size=3))
+        engine.add_rule(make_rule("audited"))
+
+        for n in range(5):
+            await engine.evaluate_async(make_context(context_id=f"ctx-{n}"))
+
+        history = engine.get_execution_history(limit=10)
+        assert [entry["context_id"] for entry in history] == ["ctx-2", "ctx-3", "ctx-4"]
+        assert history[-1]["successful_rules"] == 1
+        assert engine.get_execution_history(limit=1)[0]["context_id"] == "ctx-4"
+
+    @pytest.mark.asyncio
+    async def test_results_not_serialised_during_evaluation(self):
+        """Audit records hold results and serialise them only when read."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rule(make_rule("audited"))
+        await engine.evaluate_async(make_context())
+
+        record = engine.execution_history._records[-1]
+        assert record._dict is None
+        assert engine.get_execution_history(1)[0]["results"][0]["rule_name"] == "audited"
+
+    @pytest.mark.asyncio
+    async def test_sqlite_sink_keeps_full_queryable_history(self, tmp_path):
+        """Every evaluation reaches the sink, beyond the in-memory capacity."""
+        sink = SQLiteAuditSink(str(tmp_path / "audit.db"))
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False, audit_history_size=2), audit_sink=sink)
+        engine.add_rule(make_rule("audited"))
+
+        for n in range(5):
+            await engine.evaluate_async(make_context(context_id=f"ctx-{n}"))
+        engine.audit_writer.flush()
+
+        assert len(sink.query(limit=100)) == 5
+        entry = sink.query(context_id="ctx-1")[0]
+        assert entry["context_type"] == "grant_evaluation"
+        assert entry["results"][0]["rule_name"] == "audited"
+        engine.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_json_lines_sink(self, tmp_path):
+        """The JSON lines sink appends one line per evaluation."""
+        path = tmp_path / "audit.jsonl"
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False), audit_sink=JsonLinesAuditSink(str(path)))
+        engine.add_rule(make_rule("audited"))
+
+        await engine.evaluate_async(make_context(context_id="first"))
+        await engine.evaluate_async(make_context(context_id="second"))
+        engine.shutdown()
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["context_id"] for line in lines] == ["first", "second"]
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the Rule Evaluator
+Covers condition evaluation, expression compilation, caching and
+vectorized evaluation over DataFrames.
+"""
+
+import random
+
+import pytest
+
+from rules.core import RuleEngine
+from rules.core.evaluator import CompiledExpressionCache, ConditionEvaluator, RuleEvaluator
+from rules.types import Condition, ContextType, ExecutionContext
+
+
+def make_context(data=None, context_type=ContextType.GRANT_EVALUATION):
+
+
+    """Build an execution context for evaluator tests."""
+    return ExecutionContext(
+        context_type=context_type,
+        context_id="test-evaluator",
+        data=data if data is not None else {}
+    )
+
+
+class TestCompiledExpressionCache:
+    """Tests for the compiled expression cache."""
+
+    def test_expression_compiled_once(self):
+
+
+        """Repeated evaluations reuse the compiled code object."""
+        cache = CompiledExpressionCache()
+        evaluator = ConditionEvaluator(cache)
+        context = make_context({"grant_id": "G-1", "budget": 750000})
+        condition = Condition("grant.budget > 500000")
+
+        for _ in range(5):
+            assert evaluator.evaluate(condition, context) is True
+
+        stats = cache.get_stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 4
+        assert stats['size'] == 1
+
+    def test_invalid_expression_cached_and_rejected(self):
+
+
+        """Unsafe expressions are rejected once and stay rejected."""
+        cache = CompiledExpressionCache()
+        evaluator = ConditionEvaluator(cache)
+        condition = Condition("__import__('os').getcwd()")
+
+        assert evaluator.evaluate(condition, make_context()) is False
+        assert evaluator.evaluate(condition, make_context()) is False
+
+        stats = cache.get_stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 1
+
+    def test_cached_error_traceback_does_not_grow(self):
+
+
+        """Each lookup of a rejected expression raises a fresh exception."""
+        cache = CompiledExpressionCache()
+        evaluator = ConditionEvaluator(cache)
+
+        def traceback_depth():
+            try:
+                cache.get_or_compile("rule.last_used > 30 days ago", evaluator._compile_expression)
+            except SyntaxError as e:
+                depth, tb = 0, e.__traceback__
+                while tb is not None:
+                    depth, tb = depth + 1, tb.tb_next
+                return depth
+            raise AssertionError("expected SyntaxError")
+
+        first = traceback_depth()
+        for _ in range(50):
+            assert evaluator.evaluate(Condition("rule.last_used > 30 days ago"), make_context()) is False
+        assert traceback_depth() == first
+
+    def test_cache_is_bounded(self):
+
+
+        """The least recently used expression is evicted first."""
+        cache = CompiledExpressionCache(max_size=2)
+        evaluator = ConditionEvaluator(cache)
+        context = make_context({"value": 3})
+
+        evaluator.evaluate(Condition("value > 1"), context)
+        evaluator.evaluate(Condition("value > 2"), context)
+        evaluator.evaluate(Condition("value > 1"), context)
+        evaluator.evaluate(Condition("value > 3"), context)
+
+        stats = cache.get_stats()
+        assert stats['size'] == 2
+        assert stats['evictions'] == 1
+
+        # "value > 2" was least recently used and has been evicted
+        evaluator.evaluate(Condition("value > 1"), context)
+        assert cache.get_stats()['hits'] == 2
+
+    def test_cache_stats_exposed_through_metrics(self):
+
+
+        """The engine reports compiled expression cache statistics."""
+        engine = RuleEngine()
+        metrics = engine.get_metrics()
+
+        assert 'compiled_expressions' in metrics['caches']
+        assert 'hits' in metrics['caches']['compiled_expressions']
+        assert 'misses' in metrics['caches']['compiled_expressions']
+
+
+class TestRuleEvaluator:
+    """Tests for multi-condition evaluation."""
+
+    def test_all_conditions_must_pass(self):
+
+
+        """Conditions are combined with AND semantics."""
+        evaluator = RuleEvaluator(CompiledExpressionCache())
+        context = make_context({"grant_id": "G-1", "budget": 2000000, "timeline_months": 6})
+
+        assert evaluator.evaluate_conditions(
+            [Condition("grant.budget > 1000000"), Condition("grant.timeline_months < 12")], context
+        ) is True
+        assert evaluator.evaluate_conditions(
+            [Condition("grant.budget > 1000000"), Condition("grant.timeline_months > 12")], context
+        ) is False
+
+    def test_missing_attributes_are_safe(self):
+
+
+        """Missing attributes evaluate to a falsy safe value rather than raising."""
+        evaluator = RuleEvaluator(CompiledExpressionCache())
+        context = make_context({"grant_id": "G-1"})
+
+        assert evaluator.evaluate_conditions([Condition("grant.budget > 10")], context) is False
+        assert evaluator.evaluate_conditions([Condition("grant.impact_metrics.length < 1")], context) is True
+
+    @pytest.mark.asyncio
+    async def test_async_evaluation_matches_sync(self):
+        """Asynchronous evaluation agrees with synchronous evaluation."""
+        evaluator = RuleEvaluator(CompiledExpressionCache())
+        context = make_context({"grant_id": "G-1", "sdg_alignment": ["SDG3"]})
+        conditions = [Condition("'SDG3' in grant.sdg_alignment"), Condition("len(grant.sdg_alignment) == 1")]
+
+        assert await evaluator.evaluate_conditions_async(conditions, context) is True
+        assert evaluator.evaluate_conditions(conditions, context) is True
+
+
+class TestConditionEnvironment:
+    """Tests for the lazily resolved condition environment."""
+
+    def test_environment_built_once_per_context(self):
+
+
+        """All conditions evaluated against a context share one environment."""
+        evaluator = ConditionEvaluator(CompiledExpressionCache())
+        context = make_context({"grant_id": "G-1", "budget": 10})
+
+        first = evaluator.get_environment(context)
+        evaluator.evaluate(Condition("grant.budget > 5"), context)
+        assert evaluator.get_environment(context) is first
+
+        context.data = {"grant_id": "G-2"}
+        assert evaluator.get_environment(context) is not first
+
+    def test_nested_data_not_copied(self):
+
+
+        """Nested values are wrapped as views over the original data."""
+        evaluator = ConditionEvaluator(CompiledExpressionCache())
+        fields = {"missing": []}
+        context = make_context({"grant_id": "G-1", "application_fields": fields})
+
+        environment = evaluator.get_environment(context)
+        assert environment['grant'].application_fields._data is fields
+        assert environment['grant'].application_fields is environment['grant'].application_fields
+
+    def test_data_mutations_are_visible(self):
+
+
+        """Updates to context data are seen by later conditions."""
+        evaluator = ConditionEvaluator(CompiledExpressionCache())
+        context = make_context({"grant_id": "G-1", "application_fields": {"missing": ["budget"]}})
+        condition = Condition("grant.application_fields.missing == []")
+
+        assert evaluator.evaluate(condition, context) is False
+        context.data["application_fields"] = {"missing": []}
+        assert evaluator.evaluate(condition, context) is True
+
+    def test_views_behave_as_dicts_and_lists(self):
+
+
+        """Expressions see nested values as the dicts and lists they wrap."""
+        evaluator = ConditionEvaluator(CompiledExpressionCache())
+        context = make_context({"grant_id": "G-1", "team": {"members": ["a", "b"]}})
+
+        assert evaluator.evaluate(Condition("isinstance(grant.team, dict)"), context) is True
+        assert evaluator.evaluate(Condition("isinstance(grant.team.members, (list, set))"), context) is True
+        assert evaluator.evaluate(Condition("isinstance(grant.team.members, dict)"), context) is False
+        assert evaluator.evaluate(Condition("list(grant.team.members) == ['a', 'b']"), context) is True
+
+    def test_views_cannot_mutate_context_data(self):
+
+
+        """Mutating methods are rejected, so conditions cannot change the data they read."""
+        evaluator = ConditionEvaluator(CompiledExpressionCache())
+        members = ["a", "b"]
+        context = make_context({"grant_id": "G-1", "team": {"members": members}})
+
+        for expression in ("grant.team.members.append('c') is None",
+                           "grant.team.members.extend(['c']) is None",
+                           "grant.team.members.pop() == 'b'"):
+            assert evaluator.evaluate(Condition(expression), context) is False
+        assert members == ["a", "b"]
+
+    def test_aliases_parameters_and_missing_values(self):
+
+
+        """Domain aliases, parameters and missing attributes keep their semantics."""
+        evaluator = ConditionEvaluator(CompiledExpressionCache())
+        context = make_context({
+            "agent_data": {"role": "impact_intelligence", "confidence": 0.5},
+            "project_id": "movember",
+            "email": "someone@example.org"
+        })
+
+        assert evaluator.evaluate(Condition("agent.confidence < 0.6"), context) is True
+        assert evaluator.evaluate(Condition("project.id == 'movember'"), context) is True
+        assert evaluator.evaluate(Condition("'@' in data.get('email', '')"), context) is True
+        assert evaluator.evaluate(Condition("agent.confidence < limit", parameters={"limit": 0.4}), context) is False
+        assert evaluator.evaluate(Condition("operation.focus == 'men_health'"), context) is False
+        assert evaluator.evaluate(Condition("operation.focus not in ['men_health']"), context) is True
+        assert evaluator.evaluate(Condition("report.outputs.length == 0"), context) is True
+
+
+class TestAsyncConditionEvaluation:
+    """Tests for inline and offloaded asynchronous condition evaluation."""
+
+    @pytest.mark.asyncio
+    async def test_cheap_conditions_evaluated_inline(self):
+        """Cheap synchronous conditions run on the event loop thread."""
+        import threading
+
+        evaluator = RuleEvaluator(CompiledExpressionCache())
+        threads = []
+
+        def record_thread(context):
+
+
+            threads.append(threading.get_ident())
+            return True
+
+        conditions = [Condition("custom", custom_evaluator=record_thread)]
+        assert await evaluator.evaluate_conditions_async(conditions, make_context()) is True
+        assert threads == [threading.get_ident()]
+
+    @pytest.mark.asyncio
+    async def test_expensive_conditions_offloaded(self):
+        """Conditions marked as expensive run in a worker thread."""
+        import threading
+
+        evaluator = RuleEvaluator(CompiledExpressionCache())
+        threads = []
+
+        def record_thread(context):
+
+
+            threads.append(threading.get_ident())
+            return True
+
+        conditions = [Condition("custom", custom_evaluator=record_thread, expensive=True)]
+        assert await evaluator.evaluate_conditions_async(conditions, make_context()) is True
+        assert threads and threads[0] != threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_short_circuits_on_first_failure(self):
+        """Evaluation stops at the first failing condition."""
+        evaluator = RuleEvaluator(CompiledExpressionCache())
+        calls = []
+
+        def never_reached(context):
+
+
+            calls.append(context)
+            return True
+
+        conditions = [Condition("value > 10"), Condition("custom", custom_evaluator=never_reached)]
+        assert await evaluator.evaluate_conditions_async(conditions, make_context({"value": 1})) is False
+        assert calls == []
+
+    @pytest.mark.asyncio
+    async def test_async_custom_evaluators_awaited(self):
+        """Coroutine custom evaluators are awaited."""
+        evaluator = RuleEvaluator(CompiledExpressionCache())
+
+        async def passes(context):
+            return True
+
+        conditions = [Condition("custom", custom_evaluator=passes), Condition("value == 1")]
+        assert await evaluator.evaluate_conditions_async(conditions, make_context({"value": 1})) is True
+
+
+class TestVectorizedEvaluation:
+    """Tests for column-wise condition evaluation over DataFrames."""
+
+    EXPRESSIONS = [
+        "budget > 2", "1 < budget <= 10", "-score > 2", "score < limit",
+        "grant.name in ['a', 'b']", "report.score not in [1, 5]", "data['name'] != 'a'",
+        "name < 'b'", "name > 1", "budget == None", "budget != None", "flag", "grant.flag",
+        "data.missing == 1", "missing == 1", "data.name", "mixed == 1", "len(name) > 0",
+        "context_type == 'grant_evaluation'", "budget + score == 7.5",
+        "operation.focus == 'men_health'", "operation.score < 0.6", "grant.impact_metrics.length < 1",
+        "project.id != 'movember'", "data['impact_metrics'][0] == 1"
+    ]
+
+    def make_frame(self, rows=200):
+
+
+        """Build a frame of random grant data with gaps and mixed types."""
+        pd = pytest.importorskip("pandas")
+        rng = random.Random(3)
+
+        def cell(*choices):
+
+
+            return None if rng.random() < 0.2 else rng.choice(choices)
+
+        return pd.DataFrame([
+            {
+                "grant_id": cell("G-1", ""),
+                "budget": cell(0, 1, 5, 10, 2.5, -3),
+                "score": cell(0, 1, 5, -3),
+                "name": cell("", "a", "b", "impact"),
+                "flag": cell(True, False),
+                "type": cell("impact", "interim"),
+                "outputs": cell(1),
+                "outcomes": cell(2),
+                "mixed": cell(1, "x"),
+                "operation_data": cell({"focus": "men_health", "score": 0.5}, {"focus": "other"}, "invalid"),
+                "impact_metrics": cell([], [1, 2]),
+                "project_id": cell("movember", "other")
+            }
+            for _ in range(rows)
+        ])
+
+    def row_contexts(self, frame):
+
+
+        """One context per row holding the row's non-null fields."""
+        import pandas as pd
+
+        return [
+            make_context({
+                key: value for key, value in record.items()
+                if not (pd.api.types.is_scalar(value) and pd.isna(value))
+            })
+            for record in frame.to_dict('records')
+        ]
+
+    def test_matches_row_wise_evaluation(self):
+
+
+        """Vectorized masks agree with row-wise evaluation, including fallbacks."""
+        from rules.core.vectorized import VectorizedEvaluator
+
+        frame = self.make_frame()
+        evaluator = ConditionEvaluator(CompiledExpressionCache())
+        vectorized = VectorizedEvaluator(evaluator)
+        contexts = self.row_contexts(frame)
+
+        for expression in self.EXPRESSIONS:
+            condition = Condition(expression, parameters={"limit": 1})
+            mask = vectorized.evaluate_condition(condition, frame)
+            expected = [evaluator.evaluate(condition, context) for context in contexts]
+            assert mask.tolist() == expected, expression
+
+        # Mixed-type columns and function calls fall back to row-wise evaluation
+        assert vectorized.stats["fallback"] == 2
+        assert vectorized.supports(Condition("grant.name in ['a', 'b']"))
+        assert not vectorized.supports(Condition("len(name) > 0"))
+
+    def test_fallback_only_evaluates_remaining_rows(self):
+
+
+        """Row-wise conditions only run for rows still passing earlier conditions."""
+        from rules.core.vectorized import VectorizedEvaluator
+
+        frame = self.make_frame()
+        seen = []
+
+        def record(context):
+
+
+            seen.append(context.context_id)
+            return True
+
+        conditions = [Condition("budget > 2"), Condition("custom", custom_evaluator=record)]
+        mask = VectorizedEvaluator().evaluate_conditions(conditions, frame)
+
+        assert len(seen) == mask.sum()
+        assert mask.tolist() == [budget > 2 for budget in frame["budget"].fillna(0)]
+
+    def test_engine_evaluates_frame(self):
+
+
+        """The engine reports one mask column per applicable rule."""
+        from rules.types import Rule
+
+        frame = self.make_frame(50)
+        engine = RuleEngine()
+        engine.add_rule(Rule(name="large", conditions=[Condition("grant.budget >= 5")],
+                             context_types=[ContextType.GRANT_EVALUATION]))
+        engine.add_rule(Rule(name="named", conditions=[Condition("data.name"), Condition("flag")]))
+        engine.add_rule(Rule(name="login", conditions=[Condition("budget > 0")],
+                             context_types=[ContextType.USER_LOGIN]))
+
+        masks = engine.evaluate_frame(frame)
+        assert list(masks.columns) == ["large", "named"]
+        for n, context in enumerate(self.row_contexts(frame)):
+            results = {r.rule_name: r.conditions_met for r in engine.evaluate(context)}
+            assert masks["large"].iloc[n] == results["large"]
+            assert masks["named"].iloc[n] == results["named"]
+
+
+class TestRuleCodegen:
+    """Tests for rules compiled into generated functions."""
+
+    EXPRESSIONS = TestVectorizedEvaluation.EXPRESSIONS + [
+        "data.get('budget', 0) > 1", "grant.name.upper() == 'A'", "len(data) > 3", "data.count > 2",
+        "len == len", "limit == 1", "day_of_week != None", "agent.role == 'analyst'"
+    ]
+
+    def test_matches_interpreted_evaluation(self):
+
+
+        """Generated rules agree with interpreting each condition, for every context type."""
+        from rules.core.codegen import RuleCompiler
+        from rules.types import Rule
+
+        evaluator = RuleEvaluator(CompiledExpressionCache())
+        compiler = RuleCompiler(evaluator.condition_evaluator)
+        frame = TestVectorizedEvaluation().make_frame(100)
+        contexts = [
+            make_context(context.data, context_type)
+            for context in TestVectorizedEvaluation().row_contexts(frame) for context_type in ContextType
+        ]
+        rules = [
+            Rule(name=expression, conditions=[Condition(expression, parameters={"limit": 1})])
+            for expression in self.EXPRESSIONS
+        ] + [Rule(name="chain", conditions=[Condition("budget > 0"), Condition("grant.flag")])]
+
+        for rule in rules:
+            program = compiler.compile_rule(rule)
+            for context in contexts:
+                environment = evaluator.condition_evaluator.get_environment(context)
+                assert program(environment) == evaluator.evaluate_conditions(rule.conditions, context), rule.name
+
+    def test_generated_code_stays_within_the_whitelist(self):
+
+
+        """Rejected expressions never run, and names cannot reach the generated code's helpers."""
+        from rules.core.codegen import RuleCompiler
+        from rules.types import Rule
+
+        evaluator = ConditionEvaluator(CompiledExpressionCache())
+        compiler = RuleCompiler(evaluator)
+        environment = evaluator.get_environment(make_context({"_attr": 1, "budget": 5}))
+
+        rejected = compiler.compile_rule(Rule(name="r", conditions=[
+            Condition("budget > 1"), Condition("__import__('os').getcwd()")
+        ]))
+        assert "__import__" not in rejected.generated_source
+        assert rejected(environment) is False
+        assert compiler.compile_rule(Rule(name="n", conditions=[Condition("_attr == 1")]))(environment)
+        assert compiler.compile_rule(Rule(name="e", conditions=[Condition("_Error == 1")]))(environment) is False
+        assert compiler.compile_rule(Rule(name="c", conditions=[
+            Condition("custom", custom_evaluator=lambda context: True)
+        ])) is None
+
+    def test_shared_subexpressions_match_interpreted_evaluation(self):
+
+
+        """Rules compiled together share pure sub-expressions and still agree with the interpreter."""
+        from rules.core.codegen import RuleCompiler
+        from rules.core.evaluator import SubexpressionMemo, forget_memoised_values
+        from rules.types import Rule
+
+        evaluator = RuleEvaluator(CompiledExpressionCache())
+        compiler = RuleCompiler(evaluator.condition_evaluator)
+        frame = TestVectorizedEvaluation().make_frame(50)
+        rules = [
+            Rule(name=f"{expression} #{copy}", conditions=[Condition(expression, parameters={"limit": 1})])
+            for expression in self.EXPRESSIONS for copy in range(2)
+        ] + [Rule(name=f"clock {copy}", conditions=[Condition("now().year > 2000")]) for copy in range(2)]
+        programs = compiler.compile_rules(rules)
+        assert "memo.recall" in programs["len(data) > 3 #0"].generated_source
+        assert "memo" not in programs["clock 0"].generated_source
+        assert "memo" not in programs["limit == 1 #0"].generated_source
+
+        for context in TestVectorizedEvaluation().row_contexts(frame):
+            environment = evaluator.condition_evaluator.get_environment(context)
+            environment.memo = SubexpressionMemo()
+            for rule in rules:
+                assert programs[rule.name](environment) == evaluator.evaluate_conditions(rule.conditions, context)
+            assert environment.memo.get_stats()["reused"] > 0
+
+        forget_memoised_values(context)
+        assert len(environment.memo) == 0 and environment.memo.get_stats()["computed"] > 0
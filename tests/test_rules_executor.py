@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the Action Executor
+Covers async webhooks, retry backoff and per-action concurrency limits.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from rules.core import RuleEngine, RuleEngineConfig
+from rules.core.executor import ActionExecutor
+from rules.types import Action, Condition, ContextType, ExecutionContext, Rule
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Records requests and answers with the server's scripted statuses."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+
+
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server.lock:
+            server.requests.append((self.client_address, json.loads(body or b"null")))
+            status = server.statuses.pop(0) if server.statuses else 200
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+
+
+        pass
+
+
+@pytest.fixture
+def stub_server():
+
+
+    """Local HTTP server for webhook actions."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.statuses = []
+    server.delay = 0.0
+    server.in_flight = 0
+    server.max_in_flight = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/hook"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_context():
+
+
+    """Build an execution context for executor tests."""
+    return ExecutionContext(
+        context_type=ContextType.GRANT_EVALUATION,
+        context_id="test-executor",
+        data={}
+    )
+
+
+def webhook(url, **kwargs):
+
+
+    """Build a webhook action posting to url."""
+    return Action("send_webhook", parameters={"url": url, "data": {"event": "test"}}, **kwargs)
+
+
+class TestAsyncWebhooks:
+    """Tests for webhooks sent through the pooled HTTP client."""
+
+    def test_webhooks_share_pooled_connection(self, stub_server):
+
+
+        """Sequential webhooks reach the stub over one kept-alive connection."""
+        executor = ActionExecutor()
+
+        async def run():
+            results = []
+            for _ in range(3):
+                results.append(await executor.execute_action_async(webhook(stub_server.url), make_context()))
+            await executor.aclose()
+            return results
+
+        results = asyncio.run(run())
+
+        assert all(result.success for result in results)
+        assert [body for _, body in stub_server.requests] == [{"event": "test"}] * 3
+        assert len({address for address, _ in stub_server.requests}) == 1
+
+    def test_failed_webhook_retries_with_backoff(self, stub_server):
+
+
+        """Server errors are retried after a backoff until the webhook succeeds."""
+        stub_server.statuses = [500, 503]
+        executor = ActionExecutor(retry_base_delay=0.01, retry_max_delay=0.05)
+
+        async def run():
+            results = await executor.execute_actions_async(
+                [webhook(stub_server.url, retry_on_failure=True, max_retries=3)], make_context()
+            )
+            await executor.aclose()
+            return results
+
+        results = asyncio.run(run())
+
+        assert [result.success for result in results] == [False, False, True]
+        assert "500" in results[0].error
+        assert len(stub_server.requests) == 3
+
+    def test_concurrency_limit_caps_in_flight_webhooks(self, stub_server):
+
+
+        """A burst of webhooks never exceeds the action's concurrency limit."""
+        stub_server.delay = 0.05
+        executor = ActionExecutor(action_concurrency={"send_webhook": 2})
+
+        async def run():
+            results = await executor.execute_actions_async(
+                [webhook(stub_server.url) for _ in range(6)], make_context()
+            )
+            await executor.aclose()
+            return results
+
+        results = asyncio.run(run())
+
+        assert len(results) == 6 and all(result.success for result in results)
+        assert stub_server.max_in_flight == 2
+
+    def test_client_closed_when_event_loop_changes(self, stub_server):
+
+
+        """A client left open by a previous loop is closed on that loop before a new one is made."""
+        executor = ActionExecutor()
+        loop = asyncio.new_event_loop()
+        try:
+            result = loop.run_until_complete(executor.execute_action_async(webhook(stub_server.url), make_context()))
+            first_client = executor._http_client
+
+            asyncio.run(executor.execute_action_async(webhook(stub_server.url), make_context()))
+            loop.run_until_complete(asyncio.sleep(0))
+        finally:
+            loop.close()
+
+        assert result.success
+        assert first_client.is_closed
+        assert executor._http_client is not first_client
+
+    def test_sync_evaluations_close_their_clients(self, stub_server):
+
+
+        """Each synchronous evaluation closes the client its webhooks used."""
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False))
+        engine.add_rule(Rule("notify", conditions=[Condition("True")], actions=[webhook(stub_server.url)]))
+        clients = []
+        get_http_client = engine.executor.get_http_client
+
+        def tracking_client():
+            client = get_http_client()
+            clients.append(client)
+            return client
+
+        engine.executor.get_http_client = tracking_client
+        for _ in range(3):
+            engine.evaluate(make_context())
+        engine.shutdown()
+
+        assert len(clients) == 3 and all(client.is_closed for client in clients)
+        assert engine.executor._http_client is None
+
+
+class TestRetryBackoff:
+    """Tests for retry delays."""
+
+    def test_retry_delay_grows_and_is_capped(self):
+
+
+        """Delays are jittered below an exponentially growing, capped bound."""
+        executor = ActionExecutor(retry_base_delay=0.5, retry_max_delay=3.0)
+
+        for attempt, bound in enumerate([0.5, 1.0, 2.0, 3.0, 3.0]):
+            delays = [executor.get_retry_delay(attempt) for _ in range(200)]
+            assert all(0 <= delay <= bound for delay in delays)
+            assert max(delays) > bound / 2
+
+    def test_retries_do_not_block_other_actions(self):
+
+
+        """One action backing off does not delay the others."""
+        executor = ActionExecutor(retry_base_delay=0.2, retry_max_delay=0.2)
+        finished = {}
+
+        async def flaky(action, context):
+            raise RuntimeError("unavailable")
+
+        async def quick(action, context):
+            finished["quick"] = time.monotonic()
+            return "done"
+
+        async def run():
+            start = time.monotonic()
+            results = await executor.execute_actions_async([
+                Action("flaky", custom_executor=flaky, retry_on_failure=True, max_retries=1),
+                Action("quick", custom_executor=quick)
+            ], make_context())
+            return start, results
+
+        start, results = asyncio.run(run())
+
+        assert [result.action_name for result in results] == ["flaky", "flaky", "quick"]
+        assert finished["quick"] - start < 0.1
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for Rule Metrics
+Covers streaming latency percentiles, metrics export and the sampling
+profiler.
+"""
+
+import json
+import random
+
+import pytest
+
+from rules.core import RuleEngine, RuleEngineConfig
+from rules.core.metrics import MetricsCollector
+from rules.core.profiler import RuleProfiler
+from rules.core.quantiles import QuantileSketch, WindowedQuantileSketch, merge_sketches
+
+
+def exact_quantile(values, q):
+
+
+    """Reference quantile using the same rank convention as the sketch."""
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+class TestQuantileSketch:
+    """Tests for the relative-error quantile sketch."""
+
+    def test_quantiles_within_relative_accuracy(self):
+
+
+        """p50/p95/p99 stay within the configured relative error."""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(-6, 1.2) for _ in range(20000)]
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.5, 0.95, 0.99):
+            expected = exact_quantile(values, q)
+            assert sketch.quantile(q) == pytest.approx(expected, rel=0.02)
+        assert sketch.count == len(values)
+
+    def test_merge_matches_single_sketch(self):
+
+
+        """Merging sketches gives the same estimates as one sketch over all values."""
+        rng = random.Random(11)
+        values = [rng.expovariate(100) for _ in range(5000)]
+        whole, first, second = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for n, value in enumerate(values):
+            whole.add(value)
+            (first if n % 2 else second).add(value)
+
+        first.merge(second)
+        assert first.quantiles() == whole.quantiles()
+
+        restored = merge_sketches([first.to_dict(), QuantileSketch().to_dict()])
+        assert restored.quantiles() == whole.quantiles()
+
+    def test_windowed_sketch_forgets_old_values(self):
+
+
+        """Values older than the window no longer affect percentiles."""
+        now = [0.0]
+        sketch = WindowedQuantileSketch(window_seconds=60, slices=6, clock=lambda: now[0])
+        for _ in range(100):
+            sketch.add(5.0)
+
+        now[0] = 30.0
+        for _ in range(100):
+            sketch.add(0.01)
+        assert sketch.snapshot().count == 200
+
+        now[0] = 80.0
+        snapshot = sketch.snapshot()
+        assert snapshot.count == 100
+        assert snapshot.quantile(0.99) == pytest.approx(0.01, rel=0.02)
+
+
+class TestMetricsPercentiles:
+    """Tests for percentile reporting in MetricsCollector."""
+
+    def make_collector(self):
+
+
+        """Build a collector with one rule's latencies recorded."""
+        collector = MetricsCollector(quantile_windows=(60,))
+        for n in range(1, 101):
+            collector.record_rule_execution("rule", n / 1000, True)
+        collector.record_batch_execution(3, 0.25)
+        return collector
+
+    def test_percentiles_reported_per_rule_and_window(self):
+
+
+        """Rule and batch metrics report percentiles for all time and each window."""
+        metrics = self.make_collector().get_metrics()
+
+        percentiles = metrics['rules']['rule']['percentiles']
+        assert set(percentiles) == {'all', '60s'}
+        assert percentiles['all']['p50'] == pytest.approx(0.050, rel=0.02)
+        assert percentiles['60s']['p99'] == pytest.approx(0.099, rel=0.02)
+        assert metrics['rules']['rule']['median_execution_time'] == pytest.approx(0.050, rel=0.02)
+        assert metrics['system']['batch_percentiles']['all']['p50'] == pytest.approx(0.25, rel=0.02)
+
+    def test_export_includes_percentiles_and_sketches(self):
+
+
+        """Exports carry percentiles, and JSON exports can carry mergeable sketches."""
+        collector = self.make_collector()
+
+        exported = json.loads(collector.export_metrics('json', include_sketches=True))
+        sketch = merge_sketches([exported['sketches']['rules']['rule']['all']] * 2)
+        assert sketch.count == 200
+        assert sketch.quantile(0.5) == pytest.approx(0.050, rel=0.02)
+
+        csv_export = collector.export_metrics('csv')
+        assert 'P99' in csv_export
+        assert 'system_batch_p95_all' in csv_export
+
+
+class TestSamplingProfiler:
+    """Tests for per-condition and per-action profiling of sampled evaluations."""
+
+    def make_engine(self, sample_rate, **config):
+
+
+        from rules.types import Action, Condition, Rule
+
+        engine = RuleEngine(RuleEngineConfig(enable_result_cache=False, profile_sample_rate=sample_rate, **config))
+        engine.add_rules([
+            Rule("large; budget", conditions=[Condition("budget > 1000"), Condition("status == 'open'")],
+                 actions=[Action("log_message", parameters={"message": "large"})]),
+            Rule("small", conditions=[Condition("budget < 10")])
+        ])
+        return engine
+
+    @staticmethod
+    def evaluate(engine, count, budget=5000):
+
+
+        from rules.types import ContextType, ExecutionContext
+
+        for n in range(count):
+            engine.evaluate(ExecutionContext(ContextType.GRANT_EVALUATION, f"p-{n}",
+                                             {"budget": budget, "status": "open"}))
+
+    def test_sampled_evaluations_time_each_condition_and_action(self):
+
+
+        """Every condition and action run in a sampled evaluation is timed under its rule."""
+        engine = self.make_engine(1.0)
+        self.evaluate(engine, 3)
+
+        report = engine.get_profile_report(limit=None)
+        assert report["sampled_evaluations"] == report["evaluations"] == 3
+        conditions = {(entry["rule_name"], entry["label"]): entry for entry in report["conditions"]}
+        assert set(conditions) == {
+            ("large; budget", "[0] budget > 1000"), ("large; budget", "[1] status == 'open'"),
+            ("small", "[0] budget < 10")
+        }
+        assert all(entry["calls"] == 3 and entry["wall_time"] > 0 for entry in conditions.values())
+        assert [(entry["rule_name"], entry["label"], entry["calls"]) for entry in report["actions"]] == [
+            ("large; budget", "log_message", 3)
+        ]
+
+        # Conditions after the first failing one are not run, so not timed
+        engine.profiler.reset()
+        self.evaluate(engine, 1, budget=5)
+        labels = {entry["label"] for entry in engine.get_profile_report(limit=None)["conditions"]}
+        assert labels == {"[0] budget > 1000", "[0] budget < 10"}
+
+    def test_only_a_fraction_of_evaluations_is_sampled(self):
+
+
+        """Unsampled evaluations record nothing, and profiling is off by default."""
+        engine = self.make_engine(0.25)
+        engine.profiler = RuleProfiler(0.25, seed=3)
+        self.evaluate(engine, 200)
+
+        report = engine.get_profile_report()
+        assert report["evaluations"] == 200
+        assert 25 <= report["sampled_evaluations"] <= 75
+        assert {entry["calls"] for entry in report["actions"]} == {report["sampled_evaluations"]}
+
+        assert self.make_engine(0.0).get_profile_report() is None
+        with pytest.raises(ValueError):
+            RuleProfiler(1.5)
+
+    def test_generated_rules_timed_as_one_entry(self):
+
+
+        """Rules evaluated through generated functions are timed as a whole."""
+        engine = self.make_engine(1.0, enable_codegen=True)
+        self.evaluate(engine, 2)
+        labels = {(entry["rule_name"], entry["label"]) for entry in engine.profiler.hot_spots(None, "condition")}
+        assert labels == {("large; budget", "generated"), ("small", "generated")}
+
+    def test_collapsed_stacks_export(self, tmp_path):
+
+
+        """Collapsed stacks have one rule;entry frame pair per line, weighted in microseconds."""
+        profiler = RuleProfiler(1.0)
+        profiler.record("budget;rule", "condition", "[0] budget >\n 1000", 0.0025, 0.002)
+        profiler.record("budget;rule", "condition", "[0] budget >\n 1000", 0.0005, 0.0005)
+        profiler.record("budget;rule", "action", "notify", 0.01, 0.0001)
+
+        assert profiler.to_collapsed_stacks() == (
+            "budget,rule;action notify 10000\n"
+            "budget,rule;condition [0] budget > 1000 3000\n"
+        )
+        path = tmp_path / "rules.folded"
+        profiler.export_collapsed_stacks(str(path), time_kind="cpu_time")
+        assert path.read_text() == "budget,rule;action notify 100\nbudget,rule;condition [0] budget > 1000 2500\n"
+        assert [entry["label"] for entry in profiler.hot_spots(sort_by="cpu_time")] == [
+            "[0] budget >\n 1000", "notify"
+        ]